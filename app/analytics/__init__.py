@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Аналитика по портфелю проектов
+
+Модули используют numpy и загружаются только при обращении к ним,
+поэтому не влияют на время запуска приложения.
+"""
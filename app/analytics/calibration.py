@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Калибровка статистических коэффициентов A и C по фактическим данным
+
+Итоговая трудоёмкость проекта T_srok = A * V^C * K, где K — произведение
+коэффициентов уровня расчёта, долей подпроцессов с их коэффициентами и
+K_sr_srok (от A и C не зависит). После логарифмирования
+    ln T_факт - ln K = ln A + C * ln V
+получается линейная регрессия, которая решается МНК в замкнутом виде.
+Доверительные интервалы — бутстреп: все выборки строятся одной матрицей
+индексов (B × n), и оценки для них считаются одновременно.
+
+Если в наборе есть фактические трудоёмкости подпроцессов, доли подпроцессов
+оцениваются по ним (до подбора A и C), с нормировкой к сумме 1.
+
+Набор данных — CSV (разделитель «;» или «,»): столбцы project (путь к файлу
+проекта, относительно CSV), actual_labor (факт, чел.-дн.) и, по желанию,
+столбцы с названиями подпроцессов (Анализ, Проектирование, ...).
+
+Запуск:
+    python -m app.analytics.calibration факты.csv --name отдел --profiles профили/
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import numpy as np
+
+from ..models.project import Project
+from ..models.calculation import CalculationEngine
+from ..models.profiles import DEFAULT_PROFILES_DIR, EngineProfile, save_profile
+from ..planning.scope import labor_multiplier
+
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+
+@dataclass
+class Observation:
+    """Завершённый проект с фактической трудоёмкостью"""
+    project: Project
+    actual_labor: float  # Чел.-дн.
+    actual_subprocesses: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class Estimate:
+    """Оценка параметра с доверительным интервалом"""
+    value: float
+    low: float
+    high: float
+
+    def format(self, digits: int = 4) -> str:
+        return f"{self.value:.{digits}f} [{self.low:.{digits}f}; {self.high:.{digits}f}]"
+
+
+@dataclass
+class CalibrationResult:
+    """Результат калибровки"""
+    A: Estimate
+    C: Estimate
+    shares: dict[str, Estimate] = field(default_factory=dict)  # Пусто — доли методики
+    n_projects: int = 0
+    r_squared: float = 0.0  # В логарифмах
+    rmse_log: float = 0.0
+    mape: float = 0.0  # Средняя относительная ошибка с новыми коэффициентами
+    mape_default: float = 0.0  # То же с коэффициентами методики
+    confidence: float = CONFIDENCE
+    bootstrap_samples: int = BOOTSTRAP_SAMPLES
+
+    def to_profile(self, name: str, description: str = "") -> EngineProfile:
+        """Профиль движка с подобранными коэффициентами"""
+        profile = EngineProfile(name=name, A=self.A.value, C=self.C.value, description=description)
+        if self.shares:
+            profile.subprocess_coefficients = {k: e.value for k, e in self.shares.items()}
+        profile.fit = {
+            "n_projects": self.n_projects,
+            "confidence": self.confidence,
+            "bootstrap_samples": self.bootstrap_samples,
+            "A_interval": [self.A.low, self.A.high],
+            "C_interval": [self.C.low, self.C.high],
+            "share_intervals": {k: [e.low, e.high] for k, e in self.shares.items()},
+            "r_squared": self.r_squared,
+            "rmse_log": self.rmse_log,
+            "mape": self.mape,
+            "mape_default": self.mape_default,
+        }
+        return profile
+
+    def format(self) -> str:
+        level = f"{self.confidence:.0%}"
+        lines = [
+            f"Проектов: {self.n_projects}, бутстреп: {self.bootstrap_samples} выборок, интервалы {level}",
+            f"A = {self.A.format()}",
+            f"C = {self.C.format()}",
+        ]
+        for name, estimate in self.shares.items():
+            lines.append(f"Доля «{name}» = {estimate.format()}")
+        lines += [
+            f"R² (логарифмы): {self.r_squared:.3f}, СКО ln: {self.rmse_log:.3f}",
+            f"Средняя относительная ошибка: {self.mape:.1%} (методика: {self.mape_default:.1%})",
+        ]
+        return "\n".join(lines)
+
+
+def _ols(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """МНК y = a + b*x по последней оси (работает и для пачки выборок)"""
+    n = x.shape[-1]
+    sx = x.sum(axis=-1)
+    sy = y.sum(axis=-1)
+    sxx = (x * x).sum(axis=-1)
+    sxy = (x * y).sum(axis=-1)
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+    intercept = (sy - slope * sx) / n
+    return intercept, slope
+
+
+def _interval(samples: np.ndarray, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    tail = (1.0 - confidence) / 2 * 100
+    low, high = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+    return low, high
+
+
+def calibrate(observations: Iterable[Observation], fit_shares: bool = True,
+              bootstrap: int = BOOTSTRAP_SAMPLES, confidence: float = CONFIDENCE,
+              seed: Optional[int] = None) -> CalibrationResult:
+    """Подобрать A, C (и доли подпроцессов) по фактическим трудоёмкостям"""
+    observations = [o for o in observations if o.actual_labor > 0]
+    engine = CalculationEngine()
+    results = [engine.calculate(o.project) for o in observations]
+    keep = [i for i, r in enumerate(results) if r.total_volume > 0]
+    observations = [observations[i] for i in keep]
+    results = [results[i] for i in keep]
+    if len(observations) < 3:
+        raise ValueError("Для калибровки нужно не менее трёх проектов с фактом и ненулевым объёмом")
+
+    rng = np.random.default_rng(seed)
+    names = list(engine.SUBPROCESS_COEFFICIENTS)
+    shares = np.array([engine.SUBPROCESS_COEFFICIENTS[name] for name in names])
+    # Произведения коэффициентов подпроцессов: проекты × подпроцессы
+    products = np.array([[math.prod(sp.coefficients.values()) for sp in r.subprocess_results] for r in results])
+    share_estimates: dict[str, Estimate] = {}
+
+    with_subprocesses = [i for i, o in enumerate(observations)
+                         if fit_shares and all(o.actual_subprocesses.get(name, 0) > 0 for name in names)]
+    if len(with_subprocesses) >= 3:
+        actual = np.array([[observations[i].actual_subprocesses[name] for name in names] for i in with_subprocesses])
+        # Работа подпроцесса без его коэффициентов, доли в сумме проекта
+        normalized = actual / products[with_subprocesses]
+        fractions = normalized / normalized.sum(axis=1, keepdims=True)
+        shares = fractions.mean(axis=0)
+        idx = rng.integers(0, len(fractions), size=(bootstrap, len(fractions)))
+        low, high = _interval(fractions[idx].mean(axis=1), confidence)
+        share_estimates = {name: Estimate(float(shares[j]), float(low[j]), float(high[j]))
+                           for j, name in enumerate(names)}
+
+    # K без A: уровень расчёта × Σ(доля × коэффициенты) × K_sr_srok
+    default_multiplier = np.array([labor_multiplier(r) for r in results])
+    level = np.array([r.k_n * r.k_nad * r.k_proizv * r.k_dokum * r.k_teh * r.k_or * r.k_sr_srok
+                      for r in results])
+    k_rest = level * (products @ shares)
+
+    volume = np.array([r.total_volume for r in results])
+    actual_labor = np.array([o.actual_labor for o in observations])
+    x = np.log(volume)
+    y = np.log(actual_labor) - np.log(k_rest)
+
+    log_a, c = _ols(x, y)
+    if not (np.isfinite(log_a) and np.isfinite(c)):
+        raise ValueError("Степень C не определяется: у проектов калибровки одинаковый объём")
+    residuals = y - (log_a + c * x)
+    total = ((y - y.mean()) ** 2).sum()
+    r_squared = 1.0 - (residuals ** 2).sum() / total if total > 0 else 1.0
+
+    idx = rng.integers(0, len(x), size=(bootstrap, len(x)))
+    boot_log_a, boot_c = _ols(x[idx], y[idx])
+    (a_low, c_low), (a_high, c_high) = _interval(np.column_stack([np.exp(boot_log_a), boot_c]), confidence)
+
+    predicted = np.exp(log_a) * volume ** c * k_rest
+    default_predicted = default_multiplier * volume ** engine.C
+    return CalibrationResult(
+        A=Estimate(float(np.exp(log_a)), float(a_low), float(a_high)),
+        C=Estimate(float(c), float(c_low), float(c_high)),
+        shares=share_estimates,
+        n_projects=len(x),
+        r_squared=float(r_squared),
+        rmse_log=float(np.sqrt((residuals ** 2).mean())),
+        mape=float(np.mean(np.abs(predicted - actual_labor) / actual_labor)),
+        mape_default=float(np.mean(np.abs(default_predicted - actual_labor) / actual_labor)),
+        confidence=confidence,
+        bootstrap_samples=bootstrap,
+    )
+
+
+def load_dataset(csv_path: str) -> list[Observation]:
+    """Набор фактов из CSV (пути к проектам — относительно файла набора)"""
+    base = os.path.dirname(os.path.abspath(csv_path))
+    names = list(CalculationEngine.SUBPROCESS_COEFFICIENTS)
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.readline()
+        f.seek(0)
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        observations = []
+        for row in csv.DictReader(f, delimiter=delimiter):
+            path = os.path.join(base, row["project"])
+            subprocesses = {
+                name: float(row[name].replace(",", "."))
+                for name in names if (row.get(name) or "").strip()
+            }
+            observations.append(Observation(
+                project=Project.load(path),
+                actual_labor=float(row["actual_labor"].replace(",", ".")),
+                actual_subprocesses=subprocesses,
+            ))
+    return observations
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Калибровка коэффициентов A и C по фактам")
+    parser.add_argument("dataset", help="CSV: project;actual_labor[;Анализ;...]")
+    parser.add_argument("--name", help="Имя профиля движка (сохранить профиль)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_DIR, help="Каталог профилей")
+    parser.add_argument("--description", default="")
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_SAMPLES)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--no-shares", action="store_true", help="Не подбирать доли подпроцессов")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    result = calibrate(load_dataset(args.dataset), fit_shares=not args.no_shares,
+                       bootstrap=args.bootstrap, confidence=args.confidence, seed=args.seed)
+    print(result.format())
+    if args.name:
+        profile = result.to_profile(args.name, args.description)
+        path = save_profile(profile, args.profiles)
+        print(f"Профиль {profile.label}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Колоночная аналитика по портфелю проектов
+
+Функции всех проектов загружаются в таблицу из массивов numpy: одна
+строка на функцию, измерения словарно закодированы целыми кодами
+(проект, компонент, средство разработки, тип операции, категория и
+номер функции каталога, тип функции, сложность, опыт), меры — Vi, Vm,
+Vk и трудоёмкость. Метаданные каталога присоединяются по коду функции:
+таблица «код функции -> код категории» индексируется столбцом кодов.
+
+Трудоёмкость нелинейна по объёму (T_srok = M * V^C), поэтому на функцию
+относится доля T_srok своего проекта, пропорциональная её Vk.
+
+Группировка — np.bincount по кодам ключей (для нескольких ключей коды
+объединяются в один), квантили — устойчивая поразрядная сортировка по
+коду группы и сортировка значений внутри каждой группы.
+
+Запуск:
+    python -m app.analytics.portfolio проекты/ --by language --by category --quantiles 0.5 0.9
+    python -m app.analytics.portfolio проекты/ --save портфель.npz
+    python -m app.analytics.portfolio портфель.npz --by component --values labor --stats sum mean
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from ..models.project import Project, project_files
+from ..models.calculation import CalculationEngine
+from ..models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+from ..models.coefficients import (
+    COMPLEXITY_COEFFICIENTS,
+    DEV_ENVIRONMENT_COEFFICIENTS,
+    DEVELOPER_EXPERIENCE,
+)
+from ..models.function_catalog import get_function_by_id
+from ..planning.scope import labor_multiplier
+
+# Измерения: имя -> подпись
+DIMENSIONS = {
+    "project": "Проект",
+    "component": "Компонент",
+    "language": "Средство разработки",
+    "operation_type": "Тип операции",
+    "category": "Категория",
+    "function_id": "Функция",
+    "function_type": "Тип функции",
+    "complexity": "Сложность",
+    "experience": "Опыт",
+}
+# Меры: имя -> подпись
+MEASURES = {
+    "Vi": "Vi",
+    "Vm": "Vm",
+    "Vk": "Vk",
+    "labor": "T_srok, чел.-дн.",
+}
+STATS = ("sum", "mean", "min", "max", "count")
+SEGMENT_SORT_GROUPS = 100_000  # До стольких групп квантили считаются сортировкой по сегментам
+NO_CATEGORY = "Вне каталога"
+
+
+def _code_dtype(size: int) -> np.dtype:
+    """Наименьший беззнаковый тип для кодов словаря"""
+    return np.min_scalar_type(max(size - 1, 0))
+
+
+class PortfolioTable:
+    """Таблица функций портфеля в колоночном виде"""
+
+    def __init__(self, codes: dict[str, np.ndarray], labels: dict[str, list[str]],
+                 measures: dict[str, np.ndarray]):
+        self.codes = codes  # Измерение -> коды строк
+        self.labels = labels  # Измерение -> значения словаря
+        self.measures = measures  # Мера -> значения строк
+
+    def __len__(self) -> int:
+        return len(self.measures["Vk"])
+
+    # --- Загрузка ---
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Project], profile: Optional[EngineProfile] = None) -> "PortfolioTable":
+        builder = _TableBuilder(profile)
+        for project in projects:
+            builder.add(project)
+        return builder.build()
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], profile: Optional[EngineProfile] = None) -> "PortfolioTable":
+        """Файлы проектов и каталоги (рекурсивно, *.json)"""
+        return cls.from_projects((Project.load(path) for path in project_files(paths)), profile)
+
+    def save(self, file_path: str) -> None:
+        """Сохранить таблицу (.npz) для повторных запросов без разбора проектов"""
+        arrays = {f"code_{name}": values for name, values in self.codes.items()}
+        arrays.update({f"measure_{name}": values for name, values in self.measures.items()})
+        arrays["labels"] = np.array(json.dumps(self.labels, ensure_ascii=False))
+        with open(file_path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, file_path: str) -> "PortfolioTable":
+        with np.load(file_path) as data:
+            labels = json.loads(str(data["labels"]))
+            codes = {name: data[f"code_{name}"] for name in DIMENSIONS}
+            measures = {name: data[f"measure_{name}"] for name in MEASURES}
+        return cls(codes, labels, measures)
+
+    # --- Запросы ---
+
+    def filter(self, **equals: str) -> "PortfolioTable":
+        """Строки, где измерения равны заданным значениям"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            try:
+                code = self.labels[name].index(value)
+            except ValueError:
+                mask[:] = False
+                break
+            mask &= self.codes[name] == code
+        return PortfolioTable(
+            {name: values[mask] for name, values in self.codes.items()},
+            self.labels,
+            {name: values[mask] for name, values in self.measures.items()},
+        )
+
+    def _group_codes(self, keys: Sequence[str]) -> tuple[np.ndarray, int, list[tuple]]:
+        """Общий код группы строки, число групп и значения ключей групп"""
+        sizes = [len(self.labels[key]) for key in keys]
+        total = int(np.prod(sizes, dtype=np.int64))
+        if total <= max(4 * len(self), 1 << 16):
+            # Смешанная система счисления: без сортировки и unique
+            group = np.zeros(len(self), dtype=np.int64)
+            for key, size in zip(keys, sizes):
+                group *= size
+                group += self.codes[key]
+            present = np.flatnonzero(np.bincount(group, minlength=total))
+            remap = np.full(total, -1, dtype=np.int64)
+            remap[present] = np.arange(len(present))
+            group = remap[group]
+            combos = present
+        else:
+            stacked = np.stack([self.codes[key].astype(np.int64) for key in keys])
+            unique, group = np.unique(stacked, axis=1, return_inverse=True)
+            group = group.reshape(-1)
+            combos = np.ravel_multi_index(unique, sizes) if unique.size else np.empty(0, dtype=np.int64)
+        key_values = []
+        for combo in combos.tolist():
+            parts = []
+            for key, size in zip(reversed(keys), reversed(sizes)):
+                combo, code = divmod(combo, size)
+                parts.append(self.labels[key][code])
+            key_values.append(tuple(reversed(parts)))
+        return group, len(key_values), key_values
+
+    def group_by(self, keys: Sequence[str] | str, values: Sequence[str] = ("Vk", "labor"),
+                 stats: Sequence[str] = ("sum",), quantiles: Sequence[float] = ()) -> "Aggregate":
+        """Агрегаты мер по группам ключей (измерений)"""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        unknown = [k for k in keys if k not in DIMENSIONS] + [v for v in values if v not in MEASURES]
+        unknown += [s for s in stats if s not in STATS]
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+
+        group, n_groups, key_values = self._group_codes(keys)
+        counts = np.bincount(group, minlength=n_groups)
+        columns: dict[str, np.ndarray] = {}
+        for value in values:
+            data = self.measures[value]
+            sums = np.bincount(group, weights=data, minlength=n_groups)
+            for stat in stats:
+                if stat == "sum":
+                    columns[f"{value}:sum"] = sums
+                elif stat == "mean":
+                    columns[f"{value}:mean"] = sums / np.maximum(counts, 1)
+                elif stat == "min":
+                    result = np.full(n_groups, np.inf)
+                    np.minimum.at(result, group, data)
+                    columns[f"{value}:min"] = result
+                elif stat == "max":
+                    result = np.full(n_groups, -np.inf)
+                    np.maximum.at(result, group, data)
+                    columns[f"{value}:max"] = result
+            if quantiles:
+                for q, result in zip(quantiles, _group_quantiles(group, data, counts, quantiles)):
+                    columns[f"{value}:q{q:g}"] = result
+        if "count" in stats:
+            columns["count"] = counts
+        return Aggregate(keys=keys, key_values=key_values, columns=columns)
+
+
+def _group_quantiles(group: np.ndarray, data: np.ndarray, counts: np.ndarray,
+                     quantiles: Sequence[float]) -> list[np.ndarray]:
+    """Квантили по группам (линейная интерполяция, как np.quantile)"""
+    if len(counts) <= SEGMENT_SORT_GROUPS:
+        # Устойчивая сортировка по малым кодам групп (поразрядная), затем
+        # сортировка значений внутри каждой группы — быстрее lexsort
+        order = np.argsort(group.astype(_code_dtype(len(counts))), kind="stable")
+        ordered = data[order]
+        bounds = np.cumsum(counts).tolist()
+        start = 0
+        for end in bounds:
+            if end - start > 1:
+                ordered[start:end].sort()
+            start = end
+    else:
+        ordered = data[np.lexsort((data, group))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    results = []
+    for q in quantiles:
+        position = starts + q * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts + np.maximum(counts - 1, 0))
+        fraction = position - lower
+        if len(ordered):
+            result = ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+        else:
+            result = np.zeros(len(counts))
+        results.append(np.where(counts > 0, result, np.nan))
+    return results
+
+
+@dataclass
+class Aggregate:
+    """Результат группировки"""
+    keys: list[str]
+    key_values: list[tuple]
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def rows(self, sort_by: Optional[str] = None, descending: bool = True) -> list[tuple]:
+        """Строки (значения ключей..., агрегаты...)"""
+        order = range(len(self.key_values))
+        if sort_by is not None:
+            order = np.argsort(self.columns[sort_by], kind="stable")
+            if descending:
+                order = order[::-1]
+        columns = list(self.columns.values())
+        return [(*self.key_values[i], *(c[i].item() for c in columns)) for i in order]
+
+    def format(self, sort_by: Optional[str] = None) -> str:
+        """Текстовая таблица"""
+        header = [DIMENSIONS[k] for k in self.keys] + list(self.columns)
+        rows = [
+            [str(v) if isinstance(v, str) else f"{v:,.2f}" if isinstance(v, float) else str(v) for v in row]
+            for row in self.rows(sort_by)
+        ]
+        widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h) for i, h in enumerate(header)]
+        n_keys = len(self.keys)
+        lines = ["  ".join(h.ljust(w) if i < n_keys else h.rjust(w) for i, (h, w) in enumerate(zip(header, widths)))]
+        for row in rows:
+            lines.append("  ".join(v.ljust(w) if i < n_keys else v.rjust(w) for i, (v, w) in enumerate(zip(row, widths))))
+        return "\n".join(lines)
+
+
+class _Dictionary:
+    """Словарное кодирование значений измерения"""
+
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self.codes)
+
+
+class _TableBuilder:
+    """Накопление строк проектов и расчёт мер массивами"""
+
+    def __init__(self, profile: Optional[EngineProfile] = None):
+        self.engine = CalculationEngine(profile)
+        self.dictionaries = {name: _Dictionary() for name in ("component", "language", "function_id", "experience")}
+        self.project_names: list[str] = []
+        self.multipliers: list[float] = []
+        self.columns: dict[str, list] = {name: [] for name in
+                                         ("project", "component", "language", "function_id",
+                                          "experience", "complexity", "Vi", "ri", "ki")}
+
+    def add(self, project: Project) -> None:
+        project_code = len(self.project_names)
+        self.project_names.append(project.name)
+        # Множитель M не зависит от объёма: достаточно расчёта без функций
+        bare = Project(name=project.name, work_fund=project.work_fund,
+                       constraint_type=project.constraint_type, constraint_value=project.constraint_value)
+        bare.coefficients = project.coefficients
+        self.multipliers.append(labor_multiplier(self.engine.calculate(bare)))
+
+        columns = self.columns
+        component_code = self.dictionaries["component"].code
+        language_code = self.dictionaries["language"].code
+        function_code = self.dictionaries["function_id"].code
+        experience_code = self.dictionaries["experience"].code
+        for component in project.components:
+            component_id = component_code(component.name)
+            for func in component.functions:
+                columns["project"].append(project_code)
+                columns["component"].append(component_id)
+                columns["language"].append(language_code(func.language))
+                columns["function_id"].append(function_code(func.function_id))
+                columns["experience"].append(experience_code(func.developer_experience))
+                columns["complexity"].append(func.complexity_level)
+                columns["Vi"].append(func.volume)
+                columns["ri"].append(func.reuse_count)
+                columns["ki"].append(func.reuse_coefficient)
+
+    def build(self) -> PortfolioTable:
+        labels = {name: d.labels for name, d in self.dictionaries.items()}
+        labels["project"] = self.project_names
+        codes = {}
+        for name in ("project", "component", "language", "function_id", "experience"):
+            codes[name] = np.array(self.columns[name], dtype=_code_dtype(len(labels[name])))
+
+        complexity = np.array(self.columns["complexity"], dtype=np.int64)
+        levels = sorted(set(COMPLEXITY_COEFFICIENTS) | set(np.unique(complexity).tolist()))
+        labels["complexity"] = [str(level) for level in levels]
+        level_index = np.full(max(levels) + 1 if levels else 1, 0, dtype=np.int64)
+        level_index[levels] = np.arange(len(levels))
+        codes["complexity"] = level_index[complexity].astype(_code_dtype(len(levels)))
+
+        # Присоединение каталога: таблицы по коду функции
+        operation = _Dictionary()
+        category = _Dictionary()
+        function_type = _Dictionary()
+        op_of, cat_of, type_of = [], [], []
+        for function_id in labels["function_id"]:
+            info = get_function_by_id(function_id)
+            op_of.append(operation.code(info.operation_type.value if info else NO_CATEGORY))
+            cat_of.append(category.code(info.category if info and info.category else NO_CATEGORY))
+            type_of.append(function_type.code(info.function_type.value if info else NO_CATEGORY))
+        function_codes = codes["function_id"]
+        for name, dictionary, table in (("operation_type", operation, op_of), ("category", category, cat_of),
+                                        ("function_type", function_type, type_of)):
+            labels[name] = dictionary.labels
+            lookup = np.array(table, dtype=_code_dtype(len(dictionary.codes)))
+            codes[name] = lookup[function_codes] if len(lookup) else np.zeros(0, dtype=lookup.dtype)
+
+        # Меры: формулы 3.3-3.4 по столбцам
+        k_slozhn = np.array([COMPLEXITY_COEFFICIENTS.get(level, 1.00) for level in levels])
+        k_sr_razr = np.array([DEV_ENVIRONMENT_COEFFICIENTS.get(v, 1.00) for v in labels["language"]])
+        k_opyt = np.array([DEVELOPER_EXPERIENCE.get(v, 1.00) for v in labels["experience"]])
+        vi = np.array(self.columns["Vi"], dtype=np.float64)
+        vm = vi * np.array(self.columns["ri"], dtype=np.float64) * np.array(self.columns["ki"], dtype=np.float64)
+        vk = vm
+        if len(vi):
+            vk = vm * k_slozhn[codes["complexity"]] * k_sr_razr[codes["language"]] * k_opyt[codes["experience"]]
+
+        # T_srok проекта по его объёму и доля функции пропорционально Vk
+        project_codes = codes["project"]
+        n_projects = len(self.project_names)
+        volume = np.bincount(project_codes, weights=vk, minlength=n_projects)
+        final_labor = np.asarray(self.multipliers) * volume ** self.engine.C
+        share = np.divide(final_labor, volume, out=np.zeros(n_projects), where=volume > 0)
+        labor = vk * share[project_codes] if len(vk) else vk
+
+        measures = {"Vi": vi, "Vm": vm, "Vk": vk, "labor": labor}
+        return PortfolioTable(codes, labels, measures)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Аналитика по портфелю проектов")
+    parser.add_argument("inputs", nargs="+", help="Файлы/каталоги проектов или сохранённая таблица .npz")
+    parser.add_argument("--by", action="append", nargs="+", choices=list(DIMENSIONS), default=[],
+                        help="Ключи группировки (несколько ключей — одна группировка)")
+    parser.add_argument("--values", nargs="+", choices=list(MEASURES), default=["Vk", "labor"])
+    parser.add_argument("--stats", nargs="+", choices=STATS, default=["sum", "count"])
+    parser.add_argument("--quantiles", nargs="*", type=float, default=[])
+    parser.add_argument("--where", nargs=2, action="append", metavar=("ИЗМЕРЕНИЕ", "ЗНАЧЕНИЕ"), default=[])
+    parser.add_argument("--save", help="Сохранить таблицу в .npz")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if len(args.inputs) == 1 and args.inputs[0].endswith(".npz"):
+        table = PortfolioTable.load(args.inputs[0])
+    else:
+        table = PortfolioTable.from_paths(args.inputs, profile_from_args(parser, args))
+    if args.save:
+        table.save(args.save)
+    if args.where:
+        table = table.filter(**dict(args.where))
+
+    print(f"Функций: {len(table):,}, проектов: {len(table.labels['project']):,}")
+    for keys in args.by or [["language"]]:
+        aggregate = table.group_by(keys, args.values, args.stats, args.quantiles)
+        print()
+        print(aggregate.format(sort_by=f"{args.values[0]}:sum" if "sum" in args.stats else None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
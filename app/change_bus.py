@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Шина уведомлений об изменениях проекта
+
+Редакторы публикуют типизированные события, шина объединяет их
+в пределах одного прохода цикла событий и вызывает каждого подписчика
+не более одного раза — только если изменилось то, от чего он зависит.
+"""
+
+from enum import Enum
+from typing import Callable, Iterable, Optional
+
+from PySide6.QtCore import QObject, QTimer
+
+
+class ChangeKind(Enum):
+    """Тип изменения проекта"""
+    NAME = "name"  # Название проекта
+    DESCRIPTION = "description"  # Описания проекта, компонентов и функций
+    PARAMETERS = "parameters"  # Фонд рабочего времени, ограничения
+    STRUCTURE = "structure"  # Состав компонентов и функций
+    FUNCTION = "function"  # Параметры функции (объём, язык, сложность...)
+    COEFFICIENTS = "coefficients"  # Коэффициенты проекта
+    PROJECT = "project"  # Проект заменён целиком (новый, открытый, пример)
+
+
+# Изменения, влияющие на объём и число функций
+VOLUME_CHANGES = frozenset({ChangeKind.STRUCTURE, ChangeKind.FUNCTION, ChangeKind.PROJECT})
+
+# Изменения, влияющие на результат расчёта
+CALCULATION_CHANGES = frozenset({
+    ChangeKind.PARAMETERS,
+    ChangeKind.STRUCTURE,
+    ChangeKind.FUNCTION,
+    ChangeKind.COEFFICIENTS,
+    ChangeKind.PROJECT,
+})
+
+
+class ChangeBus(QObject):
+    """Шина изменений с объединением событий за один проход цикла событий"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscribers: list[tuple[Callable[[frozenset], None], Optional[frozenset]]] = []
+        self._pending: set[ChangeKind] = set()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def subscribe(
+        self,
+        callback: Callable[[frozenset], None],
+        kinds: Optional[Iterable[ChangeKind]] = None,
+    ) -> None:
+        """Подписаться на изменения; kinds=None — на все типы.
+
+        Подписчик получает множество типов изменений, накопленных за проход.
+        """
+        self._subscribers.append((callback, frozenset(kinds) if kinds is not None else None))
+
+    def unsubscribe(self, callback: Callable[[frozenset], None]) -> None:
+        """Отписаться от изменений"""
+        self._subscribers = [(cb, kinds) for cb, kinds in self._subscribers if cb != callback]
+
+    def publish(self, kind: ChangeKind) -> None:
+        """Опубликовать изменение (доставка — в следующем проходе цикла событий)"""
+        self._pending.add(kind)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Немедленно доставить накопленные изменения подписчикам"""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+
+        changes = frozenset(self._pending)
+        self._pending.clear()
+
+        for callback, kinds in list(self._subscribers):
+            if kinds is None:
+                callback(changes)
+            elif changes & kinds:
+                callback(changes & kinds)
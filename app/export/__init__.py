@@ -1,7 +1,44 @@
 # -*- coding: utf-8 -*-
 """
 Модули экспорта результатов
+
+python-docx и openpyxl загружаются при первом обращении к функции
+экспорта, а не при импорте пакета.
 """
 
-from .docx_export import export_to_docx
-from .xlsx_export import export_to_xlsx
+__all__ = ["EXPORTERS", "export_to_docx", "export_to_xlsx", "export_to_json", "export_to_csv"]
+
+# Форматы экспорта: функция, библиотека (для сообщения об ошибке)
+EXPORTERS = {
+    "docx": ("export_to_docx", "python-docx"),
+    "xlsx": ("export_to_xlsx", "openpyxl"),
+    "json": ("export_to_json", None),
+    "csv": ("export_to_csv", None),
+}
+
+
+def get_exporter(fmt: str):
+    """Функция экспорта для формата (модуль загружается при первом вызове)
+
+    Импорты записаны явно, чтобы сборщик (PyInstaller) видел модули экспорта.
+    """
+    if fmt == "docx":
+        from .docx_export import export_to_docx
+        return export_to_docx
+    if fmt == "xlsx":
+        from .xlsx_export import export_to_xlsx
+        return export_to_xlsx
+    if fmt == "json":
+        from .json_export import export_to_json
+        return export_to_json
+    if fmt == "csv":
+        from .columnar import export_to_csv
+        return export_to_csv
+    raise KeyError(fmt)
+
+
+def __getattr__(name):
+    for fmt, (func_name, _) in EXPORTERS.items():
+        if name == func_name:
+            return get_exporter(fmt)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Колоночный экспорт результатов по функциям для аналитики
+
+Одна строка на функцию: project, component, function_id, Vi, ri, ki,
+Vm, K_slozhn, K_sr_razr, K_opyt, Vk. Набор данных может собираться из
+многих проектов: каждый проект дописывается отдельной порцией.
+
+CSV пишется напрямую из результатов расчёта; Parquet и Arrow IPC —
+при наличии pyarrow (порция проекта — одна группа строк / один батч).
+Файл набора записывается атомарно при закрытии writer-а.
+
+Запуск из командной строки:
+    python -m app.export.columnar набор.parquet проект1.json проект2.json ...
+"""
+
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+from itertools import repeat
+from typing import Callable, Optional
+
+from ..models.project import Project
+from ..models.calculation import CalculationEngine, CalculationResult, FunctionResultTable
+from ..models.profiles import add_profile_arguments, profile_from_args
+from .common import ExportProgress, ProgressCallback, create_temp_file
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Столбцы набора данных и соответствующие поля FunctionResult
+FUNCTION_COLUMNS = (
+    ("component", "component_name", "string"),
+    ("function_id", "function_id", "string"),
+    ("Vi", "volume_base", "int64"),
+    ("ri", "reuse_count", "int64"),
+    ("ki", "reuse_coefficient", "float64"),
+    ("Vm", "volume_corrected", "float64"),
+    ("K_slozhn", "k_slozhn", "float64"),
+    ("K_sr_razr", "k_sr_razr", "float64"),
+    ("K_opyt", "k_opyt", "float64"),
+    ("Vk", "volume_adjusted", "float64"),
+)
+COLUMN_NAMES = ("project",) + tuple(name for name, _, _ in FUNCTION_COLUMNS)
+
+# Форматы набора по расширению файла
+FORMAT_BY_SUFFIX = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+def _integer_values(name: str, values: list) -> list:
+    """Целые значения столбца; дробные — ошибка, а не усечение"""
+    result = []
+    for value in values:
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"Столбец {name}: нецелое значение {value} в целочисленном столбце")
+            value = int(value)
+        result.append(value)
+    return result
+
+
+class FunctionDatasetWriter:
+    """Набор данных по функциям, дописываемый порциями по проектам
+
+    Использование:
+        with FunctionDatasetWriter("набор.parquet") as writer:
+            for project, result in ...:
+                writer.append(project.name, result)
+    """
+
+    def __init__(self, file_path: str, fmt: Optional[str] = None):
+        if fmt is None:
+            suffix = os.path.splitext(file_path)[1].lower()
+            if suffix not in FORMAT_BY_SUFFIX:
+                raise ValueError(f"Неизвестный формат набора данных: {suffix or file_path}")
+            fmt = FORMAT_BY_SUFFIX[suffix]
+        if fmt != "csv" and not PYARROW_AVAILABLE:
+            raise ImportError("Для записи Parquet/Arrow установите pyarrow")
+
+        self.file_path = file_path
+        self.fmt = fmt
+        self.rows_written = 0
+
+        self._temp_path = create_temp_file(file_path, ".tmp")
+
+        self._file = None
+        self._csv = None
+        self._arrow_writer = None
+        self._schema = None
+        try:
+            if fmt == "csv":
+                self._file = open(self._temp_path, "w", encoding="utf-8", newline="")
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(COLUMN_NAMES)
+            else:
+                self._open_arrow()
+        except BaseException:
+            self.abort()
+            raise
+
+    def _open_arrow(self):
+        import pyarrow as pa
+
+        self._schema = pa.schema(
+            [("project", pa.string())] +
+            [(name, getattr(pa, type_name)()) for name, _, type_name in FUNCTION_COLUMNS]
+        )
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._arrow_writer = pq.ParquetWriter(self._temp_path, self._schema)
+        else:
+            self._file = pa.OSFile(self._temp_path, "wb")
+            self._arrow_writer = pa.ipc.new_file(self._file, self._schema)
+
+    def append(self, project_name: str, result: CalculationResult) -> int:
+        """Дописать функции одного проекта; возвращает число строк"""
+        functions = result.functions_results
+        if self._csv is not None:
+            # Строки собираются из столбцов результата прямо в csv.writer
+            columns = [functions.column(field) for _, field, _ in FUNCTION_COLUMNS]
+            self._csv.writerows(zip(repeat(project_name), *columns))
+        elif functions:
+            self._arrow_writer.write_table(self._arrow_batch(project_name, functions))
+        self.rows_written += len(functions)
+        return len(functions)
+
+    def _arrow_batch(self, project_name: str, functions: FunctionResultTable):
+        """Порция Arrow: столбцы результата передаются в pyarrow как есть"""
+        import pyarrow as pa
+
+        columns = [pa.array([project_name] * len(functions), pa.string())]
+        for (name, field, _), column_type in zip(FUNCTION_COLUMNS, self._schema.types[1:]):
+            values = functions.column(field)
+            if isinstance(values, list) and pa.types.is_integer(column_type):
+                # Расширенный целочисленный столбец: pyarrow молча усекает дробные значения
+                values = _integer_values(name, values)
+            try:
+                columns.append(pa.array(values, column_type))
+            except OverflowError as e:
+                raise ValueError(f"Столбец {name}: значение вне диапазона {column_type}") from e
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def close(self) -> None:
+        """Завершить запись и заменить целевой файл"""
+        self._finish()
+        os.replace(self._temp_path, self.file_path)
+
+    def abort(self) -> None:
+        """Прервать запись: временный файл удаляется, целевой не меняется"""
+        try:
+            self._finish()
+        finally:
+            try:
+                os.unlink(self._temp_path)
+            except OSError:
+                pass
+
+    def _finish(self):
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "FunctionDatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def export_to_csv(project: Project, result: CalculationResult, file_path: str,
+                  on_progress: Optional[ProgressCallback] = None,
+                  is_cancelled: Optional[Callable[[], bool]] = None,
+                  report=None):
+    """Экспорт функций одного проекта в CSV (для конвейера отчётов)"""
+    progress = ExportProgress(1, on_progress, is_cancelled)
+    progress.step('Запись строк')
+    with FunctionDatasetWriter(file_path, "csv") as writer:
+        writer.append(project.name, result)
+        progress.check()
+    progress.finish()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Набор данных по функциям из файлов проектов")
+    parser.add_argument("output", help="Файл набора (.csv, .parquet, .arrow)")
+    parser.add_argument("projects", nargs="+", help="Файлы проектов (.json)")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    engine = CalculationEngine(profile_from_args(parser, args))
+    with FunctionDatasetWriter(args.output) as writer:
+        for path in args.projects:
+            project = Project.load(path)
+            writer.append(project.name, engine.calculate(project))
+    print(f"Записано строк: {writer.rows_written} из {len(args.projects)} проектов в {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Общие средства экспорта: ход выполнения, отмена и атомарная запись файла
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# Обработчик хода экспорта: (выполнено этапов, всего этапов, текущий этап)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Маска прав процесса читается один раз при импорте: os.umask меняет её
+# для всех потоков, а экспорт выполняется в фоновых потоках
+_UMASK = _read_umask()
+
+
+class ExportCancelled(Exception):
+    """Экспорт отменён пользователем"""
+
+
+class ExportProgress:
+    """Ход экспорта по этапам (листы, разделы) с проверкой отмены
+
+    Отмена проверяется на границах этапов и внутри длинных циклов
+    (check), после чего выбрасывается ExportCancelled.
+    """
+
+    def __init__(self, total: int, callback: Optional[ProgressCallback] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None):
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._is_cancelled = is_cancelled
+
+    def check(self) -> None:
+        """Прервать экспорт, если он отменён"""
+        if self._is_cancelled is not None and self._is_cancelled():
+            raise ExportCancelled()
+
+    def step(self, message: str) -> None:
+        """Начать следующий этап"""
+        self.check()
+        if self._callback is not None:
+            self._callback(self.done, self.total, message)
+        self.done += 1
+
+    def finish(self) -> None:
+        """Все этапы выполнены"""
+        if self._callback is not None:
+            self._callback(self.total, self.total, "Готово")
+
+
+def create_temp_file(file_path: str, suffix: str = "") -> str:
+    """Создать пустой временный файл рядом с целевым и вернуть его путь
+
+    mkstemp создаёт файл только для владельца (0600); права выставляются
+    как у обычного создания файла (0666 с учётом umask) или как у уже
+    существующего целевого файла, чтобы os.replace их не сужал.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=suffix, dir=directory)
+    os.close(fd)
+    try:
+        mode = os.stat(file_path).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(temp_path, mode)
+    return temp_path
+
+
+@contextmanager
+def atomic_output(file_path: str) -> Iterator[str]:
+    """Путь для записи во временный файл рядом с целевым
+
+    Целевой файл заменяется только после успешной записи; при ошибке
+    или отмене временный файл удаляется, а прежний файл остаётся нетронутым.
+    """
+    temp_path = create_temp_file(file_path, os.path.splitext(file_path)[1])
+    try:
+        yield temp_path
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
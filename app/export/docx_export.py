@@ -1,35 +1,84 @@
 # -*- coding: utf-8 -*-
 """
 Экспорт результатов в Word (.docx)
+
+Строки больших таблиц (функции компонентов, каталог функций) вставляются
+в документ готовым XML пачками, а не через ячейки python-docx: время
+растёт линейно с числом строк.
+
+Неизменная часть отчёта (стили, титульная страница) собирается один раз
+в заготовку (DocxReportTemplate), которая хранится сериализованным пакетом
+и копируется для каждого проекта. Стили в теле документа задаются по
+идентификаторам, найденным при сборке заготовки, а не поиском по имени.
 """
 
+import threading
 from datetime import datetime
+from io import BytesIO
+from typing import Callable, Iterable, Optional
+from xml.sax.saxutils import escape
+
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsdecls
 from docx.shared import Inches, Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
 from ..models.project import Project
 from ..models.calculation import CalculationResult
+from .common import ExportProgress, ProgressCallback, atomic_output
+from .report_data import ReportData
+
+# Этапы экспорта: титульная страница, 7 разделов и сохранение
+DOCX_STEPS = 9
+
+# Сколько строк таблицы разбирается и вставляется за раз
+BULK_CHUNK_ROWS = 1000
+
+# Управляющие символы, недопустимые в XML (python-docx на них падает)
+_XML_INVALID = dict.fromkeys(c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D))
 
+# Табуляция и переводы строк внутри w:t — как в cell.text: <w:tab/> и <w:br/>
+_T_OPEN = '<w:t xml:space="preserve">'
+_RUN_BREAKS = str.maketrans({
+    "\t": f'</w:t><w:tab/>{_T_OPEN}',
+    "\n": f'</w:t><w:br/>{_T_OPEN}',
+    "\r": f'</w:t><w:br/>{_T_OPEN}',
+})
 
-def export_to_docx(project: Project, result: CalculationResult, file_path: str):
-    """Экспорт результатов расчёта в Word документ"""
-    doc = Document()
 
-    # Настройка стилей
-    style = doc.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(12)
+def _cell_text_xml(text: str) -> str:
+    """Содержимое w:t для текста ячейки (разрывы закрывают и снова открывают w:t)"""
+    return escape(text.translate(_XML_INVALID)).translate(_RUN_BREAKS)
+
+
+def export_to_docx(project: Project, result: CalculationResult, file_path: str,
+                   on_progress: Optional[ProgressCallback] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None,
+                   report: Optional[ReportData] = None):
+    """Экспорт результатов расчёта в Word документ
+
+    on_progress получает ход по разделам; если is_cancelled вернёт True,
+    экспорт прерывается с ExportCancelled. Файл записывается атомарно.
+    report — заранее вычисленные данные отчёта (см. конвейер отчётов).
+    """
+    progress = ExportProgress(DOCX_STEPS, on_progress, is_cancelled)
+    if report is None:
+        report = ReportData.build(project, result)
+    template = get_report_template()
+    styles = template.style_ids
 
     # === 1. Титульная страница ===
-    _add_title_page(doc, project)
+    progress.step('Титульная страница')
+    doc = template.new_document(project.name, report.generated_at)
 
     # === 2. Общие сведения о ПС ===
-    doc.add_heading('1. Общие сведения о программном средстве', level=1)
+    progress.step('Раздел «Общие сведения»')
+    _add_heading(doc, '1. Общие сведения о программном средстве', styles['Heading 1'])
 
     table = doc.add_table(rows=5, cols=2)
-    table.style = 'Table Grid'
+    table._tbl.tblPr.style = styles['Table Grid']
 
     rows_data = [
         ('Название ПС', project.name),
@@ -39,65 +88,43 @@ def export_to_docx(project: Project, result: CalculationResult, file_path: str):
         ('Значение ограничения', f'{project.constraint_value} {"месяцев" if project.constraint_type == "duration" else "человек"}'),
     ]
 
-    for i, (name, value) in enumerate(rows_data):
-        table.rows[i].cells[0].text = name
-        table.rows[i].cells[1].text = str(value)
+    for row, (name, value) in zip(table.rows, rows_data):
+        cells = row.cells
+        cells[0].text = name
+        cells[1].text = str(value)
 
     doc.add_paragraph()
 
     # === 3. Перечень компонентов ===
-    doc.add_heading('2. Перечень компонентов', level=1)
+    progress.step('Раздел «Перечень компонентов»')
+    _add_heading(doc, '2. Перечень компонентов', styles['Heading 1'])
 
-    for i, comp in enumerate(project.components, 1):
-        doc.add_heading(f'2.{i}. {comp.name}', level=2)
+    for i, (comp, rows) in enumerate(zip(project.components, report.component_rows), 1):
+        _add_heading(doc, f'2.{i}. {comp.name}', styles['Heading 2'])
         if comp.description:
             doc.add_paragraph(comp.description)
+        progress.check()
 
         if comp.functions:
-            table = doc.add_table(rows=len(comp.functions) + 1, cols=5)
-            table.style = 'Table Grid'
-
-            # Заголовки
-            headers = ['№', 'Функция', 'Vi', 'ri', 'ki']
-            for j, h in enumerate(headers):
-                table.rows[0].cells[j].text = h
-                table.rows[0].cells[j].paragraphs[0].runs[0].bold = True
-
-            # Данные
-            for k, func in enumerate(comp.functions):
-                table.rows[k + 1].cells[0].text = func.function_id
-                table.rows[k + 1].cells[1].text = func.function_name[:50]
-                table.rows[k + 1].cells[2].text = str(func.volume)
-                table.rows[k + 1].cells[3].text = str(func.reuse_count)
-                table.rows[k + 1].cells[4].text = f'{func.reuse_coefficient:.2f}'
+            _add_bulk_table(doc, ['№', 'Функция', 'Vi', 'ri', 'ki'], rows, styles['Table Grid'], progress)
 
     doc.add_paragraph()
 
     # === 4. Каталог функций ===
-    doc.add_heading('3. Детальный каталог функций', level=1)
-
-    table = doc.add_table(rows=len(result.functions_results) + 1, cols=7)
-    table.style = 'Table Grid'
-
-    headers = ['Компонент', 'Функция', 'Vi', 'ri', 'ki', 'Vm', 'Vk']
-    for j, h in enumerate(headers):
-        table.rows[0].cells[j].text = h
-        table.rows[0].cells[j].paragraphs[0].runs[0].bold = True
+    progress.step('Раздел «Каталог функций»')
+    _add_heading(doc, '3. Детальный каталог функций', styles['Heading 1'])
 
-    for k, fr in enumerate(result.functions_results):
-        table.rows[k + 1].cells[0].text = fr.component_name[:15]
-        table.rows[k + 1].cells[1].text = fr.function_name[:30]
-        table.rows[k + 1].cells[2].text = str(fr.volume_base)
-        table.rows[k + 1].cells[3].text = str(fr.reuse_count)
-        table.rows[k + 1].cells[4].text = f'{fr.reuse_coefficient:.2f}'
-        table.rows[k + 1].cells[5].text = f'{fr.volume_corrected:.0f}'
-        table.rows[k + 1].cells[6].text = f'{fr.volume_adjusted:.0f}'
+    _add_bulk_table(
+        doc, ['Компонент', 'Функция', 'Vi', 'ri', 'ki', 'Vm', 'Vk'], report.catalog_rows,
+        styles['Table Grid'], progress,
+    )
 
     doc.add_paragraph()
     doc.add_paragraph(f'Общий объём ПС: V = {result.total_volume:.2f} строк условного кода')
 
     # === 5. Коэффициенты уровня расчёта ===
-    doc.add_heading('4. Коэффициенты уровня расчёта', level=1)
+    progress.step('Раздел «Коэффициенты»')
+    _add_heading(doc, '4. Коэффициенты уровня расчёта', styles['Heading 1'])
 
     coeffs = project.coefficients
     coef_data = [
@@ -109,23 +136,15 @@ def export_to_docx(project: Project, result: CalculationResult, file_path: str):
         ('K_or (опыт разработки)', coeffs.dev_experience, result.k_or),
     ]
 
-    table = doc.add_table(rows=len(coef_data) + 1, cols=3)
-    table.style = 'Table Grid'
-
-    headers = ['Коэффициент', 'Значение', 'Числовое значение']
-    for j, h in enumerate(headers):
-        table.rows[0].cells[j].text = h
-        table.rows[0].cells[j].paragraphs[0].runs[0].bold = True
-
-    for k, (name, value, num) in enumerate(coef_data):
-        table.rows[k + 1].cells[0].text = name
-        table.rows[k + 1].cells[1].text = str(value)[:50]
-        table.rows[k + 1].cells[2].text = f'{num:.4f}'
+    _add_bulk_table(doc, ['Коэффициент', 'Значение', 'Числовое значение'], (
+        (name, str(value)[:50], f'{num:.4f}') for name, value, num in coef_data
+    ), styles['Table Grid'])
 
     doc.add_paragraph()
 
     # === 6. Расчёт базовой трудоёмкости ===
-    doc.add_heading('5. Расчёт базовой трудоёмкости', level=1)
+    progress.step('Раздел «Базовая трудоёмкость»')
+    _add_heading(doc, '5. Расчёт базовой трудоёмкости', styles['Heading 1'])
 
     doc.add_paragraph('Формула расчёта базовой трудоёмкости:')
     doc.add_paragraph('T_baz = A × V^C × K_n × K_nad × K_proizv × K_dokum × K_teh × K_or')
@@ -144,32 +163,20 @@ def export_to_docx(project: Project, result: CalculationResult, file_path: str):
     doc.add_paragraph()
 
     # === 7. Таблица подпроцессов ===
-    doc.add_heading('6. Трудоёмкость подпроцессов', level=1)
-
-    table = doc.add_table(rows=len(result.subprocess_results) + 2, cols=5)
-    table.style = 'Table Grid'
+    progress.step('Раздел «Подпроцессы»')
+    _add_heading(doc, '6. Трудоёмкость подпроцессов', styles['Heading 1'])
 
     headers = ['Подпроцесс', 'Коэфф. A', 'Трудоёмкость [чел.-дн.]', 'Численность [чел.]', 'Срок [мес.]']
-    for j, h in enumerate(headers):
-        table.rows[0].cells[j].text = h
-        table.rows[0].cells[j].paragraphs[0].runs[0].bold = True
-
-    for k, sp in enumerate(result.subprocess_results):
-        table.rows[k + 1].cells[0].text = sp.name
-        table.rows[k + 1].cells[1].text = f'{sp.base_coefficient}'
-        table.rows[k + 1].cells[2].text = f'{sp.labor:.2f}'
-        table.rows[k + 1].cells[3].text = f'{sp.staff:.2f}'
-        table.rows[k + 1].cells[4].text = f'{sp.duration:.2f}'
-
+    rows = [
+        (sp.name, f'{sp.base_coefficient}', f'{sp.labor:.2f}', f'{sp.staff:.2f}', f'{sp.duration:.2f}')
+        for sp in result.subprocess_results
+    ]
     # Итого
-    last_row = len(result.subprocess_results) + 1
-    table.rows[last_row].cells[0].text = 'ИТОГО'
-    table.rows[last_row].cells[1].text = '1.00'
-    table.rows[last_row].cells[2].text = f'{result.total_labor:.2f}'
-    table.rows[last_row].cells[3].text = f'{result.average_staff:.2f}'
-    table.rows[last_row].cells[4].text = f'{result.total_duration:.2f}'
-
-    for cell in table.rows[last_row].cells:
+    rows.append(('ИТОГО', '1.00', f'{result.total_labor:.2f}',
+                 f'{result.average_staff:.2f}', f'{result.total_duration:.2f}'))
+    table = _add_bulk_table(doc, headers, rows, styles['Table Grid'])
+
+    for cell in table.rows[-1].cells:
         for paragraph in cell.paragraphs:
             for run in paragraph.runs:
                 run.bold = True
@@ -177,7 +184,8 @@ def export_to_docx(project: Project, result: CalculationResult, file_path: str):
     doc.add_paragraph()
 
     # === 8. Выводы ===
-    doc.add_heading('7. Итоговые показатели', level=1)
+    progress.step('Раздел «Итоговые показатели»')
+    _add_heading(doc, '7. Итоговые показатели', styles['Heading 1'])
 
     conclusions = [
         f'Трудоёмкость разработки: T_razr = {result.total_labor:.2f} чел.-дн.',
@@ -188,20 +196,129 @@ def export_to_docx(project: Project, result: CalculationResult, file_path: str):
     ]
 
     for c in conclusions:
-        doc.add_paragraph(c, style='List Bullet')
+        doc.add_paragraph(c)._p.style = styles['List Bullet']
 
     doc.add_paragraph()
     doc.add_paragraph(
-        f'Расчёт выполнен {datetime.now().strftime("%d.%m.%Y %H:%M")} '
+        f'Расчёт выполнен {report.generated_at.strftime("%d.%m.%Y %H:%M")} '
         f'с использованием методики СПбГУТ им. проф. М.А. Бонч-Бруевича.'
     )
 
     # Сохранение
-    doc.save(file_path)
-
-
-def _add_title_page(doc: Document, project: Project):
-    """Добавить титульную страницу"""
+    progress.step('Сохранение файла')
+    with atomic_output(file_path) as temp_path:
+        doc.save(temp_path)
+        progress.check()
+    progress.finish()
+
+
+def _add_bulk_table(doc: Document, headers: list[str], rows: Iterable[tuple[str, ...]],
+                    style_id: str, progress: Optional[ExportProgress] = None):
+    """Таблица в стиле style_id ('Table Grid') с полужирной шапкой
+
+    Шапка создаётся через python-docx, а строки данных собираются в XML
+    (та же разметка, что даёт cell.text) и вставляются пачками
+    по BULK_CHUNK_ROWS строк.
+    """
+    table = doc.add_table(rows=1, cols=len(headers))
+    table._tbl.tblPr.style = style_id
+    for cell, h in zip(table.rows[0].cells, headers):
+        cell.text = h
+        cell.paragraphs[0].runs[0].bold = True
+
+    # Шаблоны ячеек с шириной столбцов из шапки
+    tbl = table._tbl
+    prefixes = []
+    for tc in tbl.tr_lst[0].tc_lst:
+        width = tc.tcPr.find(qn('w:tcW')).get(qn('w:w'))
+        prefixes.append(
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+            f'<w:p><w:r>{_T_OPEN}'
+        )
+    suffix = '</w:t></w:r></w:p></w:tc>'
+
+    def flush(chunk: list[str]):
+        container = parse_xml(f'<w:tbl {nsdecls("w")}>{"".join(chunk)}</w:tbl>')
+        tbl.extend(list(container))
+        if progress is not None:
+            progress.check()
+
+    chunk = []
+    for row in rows:
+        cells = ''.join(
+            prefix + _cell_text_xml(text) + suffix
+            for prefix, text in zip(prefixes, row)
+        )
+        chunk.append(f'<w:tr>{cells}</w:tr>')
+        if len(chunk) >= BULK_CHUNK_ROWS:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    return table
+
+
+def _add_heading(doc: Document, text: str, style_id: str):
+    """Заголовок раздела по идентификатору стиля (без поиска стиля по имени)"""
+    paragraph = doc.add_paragraph(text)
+    paragraph._p.style = style_id
+    return paragraph
+
+
+class DocxReportTemplate:
+    """Заготовка отчёта Word: стили и титульная страница
+
+    Собирается один раз и хранится сериализованным пакетом (bytes);
+    new_document() открывает копию и подставляет название ПС и дату.
+    """
+
+    # Стили тела отчёта, идентификаторы которых находятся заранее
+    STYLE_NAMES = ('Heading 1', 'Heading 2', 'List Bullet', 'Table Grid')
+
+    def __init__(self):
+        doc = Document()
+
+        # Настройка стилей
+        style = doc.styles['Normal']
+        style.font.name = 'Times New Roman'
+        style.font.size = Pt(12)
+
+        self._name_index, self._date_index = _add_title_page(doc)
+        self.style_ids = {name: doc.styles[name].style_id for name in self.STYLE_NAMES}
+
+        buffer = BytesIO()
+        doc.save(buffer)
+        self.data = buffer.getvalue()
+
+    def new_document(self, project_name: str, generated_at: datetime) -> Document:
+        """Копия заготовки с заполненной титульной страницей"""
+        doc = Document(BytesIO(self.data))
+        paragraphs = doc.paragraphs
+        paragraphs[self._name_index].runs[0].text = project_name
+        paragraphs[self._date_index].runs[0].text = generated_at.strftime('%d.%m.%Y')
+        return doc
+
+
+_template: Optional[DocxReportTemplate] = None
+_template_lock = threading.Lock()
+
+
+def get_report_template() -> DocxReportTemplate:
+    """Заготовка отчёта (создаётся при первом экспорте в процессе)"""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = DocxReportTemplate()
+        return _template
+
+
+def _add_title_page(doc: Document) -> tuple[int, int]:
+    """Добавить титульную страницу
+
+    Возвращает номера абзацев для названия ПС и даты (заполняются
+    в копии заготовки).
+    """
     # Заголовок
     p = doc.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -219,9 +336,10 @@ def _add_title_page(doc: Document, project: Project):
     doc.add_paragraph()
 
     # Название ПС
+    name_index = len(doc.paragraphs)
     p = doc.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run(project.name)
+    run = p.add_run()
     run.bold = True
     run.font.size = Pt(14)
 
@@ -238,9 +356,12 @@ def _add_title_page(doc: Document, project: Project):
     doc.add_paragraph()
 
     # Дата
+    date_index = len(doc.paragraphs)
     p = doc.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p.add_run(datetime.now().strftime('%d.%m.%Y'))
+    p.add_run()
 
     # Разрыв страницы
     doc.add_page_break()
+
+    return name_index, date_index
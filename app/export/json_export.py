@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Машиночитаемый отчёт (.json): исходные данные проекта, полный результат
+расчёта и итоги по компонентам
+"""
+
+import json
+from dataclasses import asdict
+from typing import Callable, Optional
+
+from ..models.project import Project
+from ..models.calculation import CalculationResult
+from .common import ExportProgress, ProgressCallback, atomic_output
+from .report_data import ReportData
+
+# Этапы экспорта: подготовка данных и сохранение
+JSON_STEPS = 2
+
+# Версия формата машиночитаемого отчёта
+REPORT_FORMAT_VERSION = 1
+
+
+def export_to_json(project: Project, result: CalculationResult, file_path: str,
+                   on_progress: Optional[ProgressCallback] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None,
+                   report: Optional[ReportData] = None):
+    """Экспорт результатов расчёта в JSON (файл записывается атомарно)"""
+    progress = ExportProgress(JSON_STEPS, on_progress, is_cancelled)
+    if report is None:
+        report = ReportData.build(project, result)
+
+    progress.step('Подготовка данных')
+    data = {
+        "format_version": REPORT_FORMAT_VERSION,
+        "generated_at": report.generated_at.isoformat(timespec="seconds"),
+        "project": project.to_dict(),
+        "components": [asdict(c) for c in report.components],
+        "result": result.to_dict(),
+    }
+
+    progress.step('Сохранение файла')
+    with atomic_output(file_path) as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        progress.check()
+    progress.finish()
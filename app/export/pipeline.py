@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Конвейер отчётов: один результат расчёта — несколько форматов
+
+Общие данные отчёта (ReportData) вычисляются один раз в основном
+процессе, затем экспортёры выбранных форматов работают параллельно
+в отдельных процессах. Каждый формат пишется во временный файл рядом
+с целевым; целевые файлы заменяются только когда успешно записаны все
+форматы, поэтому при ошибке не остаётся частично обновлённого набора.
+
+Запуск из командной строки:
+    python -m app.export.pipeline проект.json --docx отчёт.docx --xlsx отчёт.xlsx --json отчёт.json
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..models.project import Project
+from ..models.calculation import CalculationEngine, CalculationResult
+from ..models.profiles import add_profile_arguments, profile_from_args
+from . import EXPORTERS, get_exporter
+from .report_data import ReportData
+from .common import create_temp_file
+
+
+@dataclass
+class PipelineSummary:
+    """Сводка по времени работы конвейера"""
+    prepare_seconds: float = 0.0  # Общие данные отчёта
+    timings: dict[str, float] = field(default_factory=dict)  # Формат -> время экспорта в процессе
+    files: dict[str, str] = field(default_factory=dict)  # Формат -> путь к файлу
+    total_seconds: float = 0.0
+
+    def format(self) -> str:
+        """Текстовая сводка"""
+        lines = [f"Подготовка данных отчёта: {self.prepare_seconds:.2f} с"]
+        for fmt, seconds in self.timings.items():
+            lines.append(f"  {fmt:<5} {seconds:8.2f} с  {self.files[fmt]}")
+        lines.append(f"Всего: {self.total_seconds:.2f} с")
+        return "\n".join(lines)
+
+
+def _export_job(fmt: str, project_data: dict, result: CalculationResult,
+                report: ReportData, file_path: str) -> float:
+    """Экспорт одного формата в дочернем процессе; возвращает время работы"""
+    started = time.perf_counter()
+    project = Project.from_dict(project_data)
+    get_exporter(fmt)(project, result, file_path, report=report)
+    return time.perf_counter() - started
+
+
+def run_report_pipeline(project: Project, result: CalculationResult, outputs: dict[str, str],
+                        max_workers: Optional[int] = None) -> PipelineSummary:
+    """Сформировать отчёты выбранных форматов параллельно
+
+    outputs — формат ("docx", "xlsx", "json") -> путь к файлу.
+    """
+    unknown = set(outputs) - set(EXPORTERS)
+    if unknown:
+        raise ValueError(f"Неизвестные форматы отчёта: {', '.join(sorted(unknown))}")
+
+    summary = PipelineSummary()
+    started = time.perf_counter()
+
+    report = ReportData.build(project, result)
+    project_data = project.to_dict()
+    summary.prepare_seconds = time.perf_counter() - started
+
+    temp_paths: dict[str, str] = {}
+    try:
+        for fmt, file_path in outputs.items():
+            temp_paths[fmt] = create_temp_file(file_path, f".{fmt}")
+
+        # spawn: дочерние процессы не наследуют потоки и состояние Qt
+        workers = max_workers or min(len(outputs), os.cpu_count() or 1)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                fmt: pool.submit(_export_job, fmt, project_data, result, report, temp_paths[fmt])
+                for fmt in outputs
+            }
+            for fmt, future in futures.items():
+                summary.timings[fmt] = future.result()
+    except BaseException:
+        for temp_path in temp_paths.values():
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+        raise
+
+    for fmt, file_path in outputs.items():
+        os.replace(temp_paths[fmt], file_path)
+        summary.files[fmt] = file_path
+
+    summary.total_seconds = time.perf_counter() - started
+    return summary
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Отчёты нескольких форматов по файлу проекта")
+    parser.add_argument("project", help="Файл проекта (.json)")
+    for fmt in EXPORTERS:
+        parser.add_argument(f"--{fmt}", metavar="ПУТЬ", help=f"Записать отчёт {fmt.upper()}")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    profile = profile_from_args(parser, args)
+
+    outputs = {fmt: getattr(args, fmt) for fmt in EXPORTERS if getattr(args, fmt)}
+    if not outputs:
+        parser.error("укажите хотя бы один формат отчёта")
+
+    project = Project.load(args.project)
+    result = CalculationEngine(profile).calculate(project)
+    summary = run_report_pipeline(project, result, outputs, max_workers=args.workers)
+    print(summary.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
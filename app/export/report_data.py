@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Общие данные отчёта, вычисляемые один раз для всех форматов
+
+Итоги по компонентам, отформатированные строки таблиц и момент
+формирования отчёта. Конвейер отчётов строит их один раз и передаёт
+во все экспортёры; при одиночном экспорте экспортёр строит их сам.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from ..models.project import Project
+from ..models.calculation import CalculationResult
+
+
+@dataclass
+class ComponentTotals:
+    """Итоги по компоненту"""
+    name: str
+    function_count: int = 0
+    volume_corrected: float = 0.0  # ΣVm
+    volume_adjusted: float = 0.0  # ΣVk
+
+
+@dataclass
+class ReportData:
+    """Производные данные отчёта, общие для DOCX, XLSX и JSON"""
+    generated_at: datetime
+    components: list[ComponentTotals] = field(default_factory=list)
+    total_corrected: float = 0.0  # ΣVm по всем функциям
+    # Строки таблиц DOCX: функции каждого компонента и детальный каталог
+    component_rows: list[list[tuple[str, ...]]] = field(default_factory=list)
+    catalog_rows: list[tuple[str, ...]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, project: Project, result: CalculationResult) -> "ReportData":
+        """Вычислить данные отчёта за один проход по функциям"""
+        report = cls(generated_at=datetime.now())
+
+        totals: dict[str, ComponentTotals] = {}
+        for comp in project.components:
+            totals.setdefault(comp.name, ComponentTotals(comp.name))
+            report.component_rows.append([
+                (
+                    func.function_id,
+                    func.function_name[:50],
+                    str(func.volume),
+                    str(func.reuse_count),
+                    f'{func.reuse_coefficient:.2f}',
+                )
+                for func in comp.functions
+            ])
+
+        total_corrected = 0.0
+        # Столбцы результата читаются напрямую, без объектов FunctionResult
+        functions = result.functions_results
+        for component_name, function_name, volume_base, reuse_count, reuse_coefficient, \
+                volume_corrected, volume_adjusted in zip(
+                    functions.column('component_name'), functions.column('function_name'),
+                    functions.column('volume_base'), functions.column('reuse_count'),
+                    functions.column('reuse_coefficient'), functions.column('volume_corrected'),
+                    functions.column('volume_adjusted')):
+            comp_totals = totals.setdefault(component_name, ComponentTotals(component_name))
+            comp_totals.function_count += 1
+            comp_totals.volume_corrected += volume_corrected
+            comp_totals.volume_adjusted += volume_adjusted
+            total_corrected += volume_corrected
+            report.catalog_rows.append((
+                component_name[:15],
+                function_name[:30],
+                str(volume_base),
+                str(reuse_count),
+                f'{reuse_coefficient:.2f}',
+                f'{volume_corrected:.0f}',
+                f'{volume_adjusted:.0f}',
+            ))
+
+        report.components = list(totals.values())
+        report.total_corrected = total_corrected
+        return report
@@ -1,105 +1,158 @@
 # -*- coding: utf-8 -*-
 """
 Экспорт результатов в Excel (.xlsx)
+
+Книга пишется в потоковом режиме openpyxl (write_only): строки листов
+формируются генераторами и сбрасываются в файл по мере записи, а
+оформление задаётся зарегистрированными именованными стилями, а не
+копией стиля в каждой ячейке. Память не растёт с числом функций.
 """
 
-from datetime import datetime
+from typing import Callable, Iterator, Optional
+
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 from openpyxl.utils import get_column_letter
 
 from ..models.project import Project
-from ..models.calculation import CalculationResult
-
-
-def export_to_xlsx(project: Project, result: CalculationResult, file_path: str):
-    """Экспорт результатов расчёта в Excel"""
-    wb = Workbook()
-
-    # Стили
+from ..models.calculation import CalculationResult, FunctionResultTable
+from .common import ExportProgress, ProgressCallback, atomic_output
+from .report_data import ReportData
+
+# Этапы экспорта: 5 листов и сохранение
+XLSX_STEPS = 6
+
+# Как часто проверять отмену в длинных таблицах
+CANCEL_CHECK_ROWS = 500
+
+# Именованные стили книги
+STYLE_TITLE = 'Заголовок отчёта'
+STYLE_SUBTITLE = 'Заголовок листа'
+STYLE_HEADER = 'Шапка таблицы'
+STYLE_HEADER_CENTER = 'Шапка таблицы (по центру)'
+STYLE_CELL = 'Ячейка таблицы'
+STYLE_TOTAL = 'Итоговая строка'
+STYLE_BOLD = 'Выделение'
+
+
+def _register_styles(wb: Workbook) -> None:
+    """Зарегистрировать именованные стили (один раз на книгу)"""
+    thin = Side(style='thin')
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
     header_font = Font(bold=True, size=11)
     header_fill = PatternFill(start_color='DDEEFF', end_color='DDEEFF', fill_type='solid')
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
     center_align = Alignment(horizontal='center', vertical='center')
 
+    styles = [
+        NamedStyle(name=STYLE_TITLE, font=Font(bold=True, size=14)),
+        NamedStyle(name=STYLE_SUBTITLE, font=Font(bold=True, size=12)),
+        NamedStyle(name=STYLE_HEADER, font=header_font, fill=header_fill, border=thin_border),
+        NamedStyle(name=STYLE_HEADER_CENTER, font=header_font, fill=header_fill,
+                   border=thin_border, alignment=center_align),
+        NamedStyle(name=STYLE_CELL, border=thin_border),
+        NamedStyle(name=STYLE_TOTAL, font=header_font, border=thin_border,
+                   fill=PatternFill(start_color='FFFFCC', end_color='FFFFCC', fill_type='solid')),
+        NamedStyle(name=STYLE_BOLD, font=header_font),
+    ]
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _cell(ws, value, style: str) -> WriteOnlyCell:
+    """Ячейка с именованным стилем для потоковой записи"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _styled_row(ws, values, style: str) -> list:
+    return [_cell(ws, value, style) for value in values]
+
+
+def _set_widths(ws, widths: dict) -> None:
+    """Ширины столбцов (в потоковом режиме — до записи первой строки)"""
+    for column, width in widths.items():
+        ws.column_dimensions[column].width = width
+
+
+# Поля FunctionResult в столбцах листа «Функции»
+FUNCTION_SHEET_FIELDS = (
+    'component_name', 'function_id', 'function_name',
+    'volume_base', 'reuse_count', 'reuse_coefficient', 'volume_corrected',
+    'k_slozhn', 'k_sr_razr', 'k_opyt', 'volume_adjusted',
+)
+
+
+def _function_rows(ws, functions_results: FunctionResultTable, progress: ExportProgress) -> Iterator[list]:
+    """Строки листа «Функции» из столбцов результата — по одной, без накопления в памяти"""
+    columns = [functions_results.column(name) for name in FUNCTION_SHEET_FIELDS]
+    for i, values in enumerate(zip(*columns), 1):
+        if i % CANCEL_CHECK_ROWS == 0:
+            progress.check()
+        yield _styled_row(ws, values, STYLE_CELL)
+
+
+def export_to_xlsx(project: Project, result: CalculationResult, file_path: str,
+                   on_progress: Optional[ProgressCallback] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None,
+                   report: Optional[ReportData] = None):
+    """Экспорт результатов расчёта в Excel
+
+    on_progress получает ход по листам; если is_cancelled вернёт True,
+    экспорт прерывается с ExportCancelled. Файл записывается атомарно.
+    report — заранее вычисленные данные отчёта (см. конвейер отчётов).
+    """
+    progress = ExportProgress(XLSX_STEPS, on_progress, is_cancelled)
+    if report is None:
+        report = ReportData.build(project, result)
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+
     # === Лист 1: Общие сведения ===
-    ws1 = wb.active
-    ws1.title = 'Общие сведения'
-
-    ws1['A1'] = 'РАСЧЁТ ТРУДОЁМКОСТИ РАЗРАБОТКИ ПС'
-    ws1['A1'].font = Font(bold=True, size=14)
-    ws1.merge_cells('A1:D1')
-
-    ws1['A3'] = 'Название ПС:'
-    ws1['B3'] = project.name
-    ws1['A4'] = 'Описание:'
-    ws1['B4'] = project.description or '-'
-    ws1['A5'] = 'Фонд рабочего времени:'
-    ws1['B5'] = f'{project.work_fund} дней/месяц'
-    ws1['A6'] = 'Тип ограничения:'
-    ws1['B6'] = 'По продолжительности' if project.constraint_type == 'duration' else 'По численности'
-    ws1['A7'] = 'Значение ограничения:'
-    ws1['B7'] = f'{project.constraint_value} {"месяцев" if project.constraint_type == "duration" else "человек"}'
-
-    ws1['A9'] = 'Дата расчёта:'
-    ws1['B9'] = datetime.now().strftime('%d.%m.%Y %H:%M')
-
-    ws1.column_dimensions['A'].width = 25
-    ws1.column_dimensions['B'].width = 50
+    progress.step('Лист «Общие сведения»')
+    ws1 = wb.create_sheet('Общие сведения')
+    _set_widths(ws1, {'A': 25, 'B': 50})
+    ws1.merged_cells.add('A1:D1')
+
+    ws1.append([_cell(ws1, 'РАСЧЁТ ТРУДОЁМКОСТИ РАЗРАБОТКИ ПС', STYLE_TITLE)])
+    ws1.append([])
+    ws1.append(['Название ПС:', project.name])
+    ws1.append(['Описание:', project.description or '-'])
+    ws1.append(['Фонд рабочего времени:', f'{project.work_fund} дней/месяц'])
+    ws1.append(['Тип ограничения:', 'По продолжительности' if project.constraint_type == 'duration' else 'По численности'])
+    ws1.append(['Значение ограничения:', f'{project.constraint_value} {"месяцев" if project.constraint_type == "duration" else "человек"}'])
+    ws1.append([])
+    ws1.append(['Дата расчёта:', report.generated_at.strftime('%d.%m.%Y %H:%M')])
 
     # === Лист 2: Функции ===
+    progress.step('Лист «Функции»')
     ws2 = wb.create_sheet('Функции')
+    widths = {get_column_letter(col): 15 for col in range(1, 12)}
+    widths['C'] = 40
+    _set_widths(ws2, widths)
 
     headers = ['Компонент', 'ID функции', 'Название функции', 'Vi', 'ri', 'ki', 'Vm', 'K_slozhn', 'K_sr_razr', 'K_opyt', 'Vk']
-    for col, header in enumerate(headers, 1):
-        cell = ws2.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
-        cell.alignment = center_align
-
-    row = 2
-    for fr in result.functions_results:
-        ws2.cell(row=row, column=1, value=fr.component_name).border = thin_border
-        ws2.cell(row=row, column=2, value=fr.function_id).border = thin_border
-        ws2.cell(row=row, column=3, value=fr.function_name).border = thin_border
-        ws2.cell(row=row, column=4, value=fr.volume_base).border = thin_border
-        ws2.cell(row=row, column=5, value=fr.reuse_count).border = thin_border
-        ws2.cell(row=row, column=6, value=fr.reuse_coefficient).border = thin_border
-        ws2.cell(row=row, column=7, value=fr.volume_corrected).border = thin_border
-        ws2.cell(row=row, column=8, value=fr.k_slozhn).border = thin_border
-        ws2.cell(row=row, column=9, value=fr.k_sr_razr).border = thin_border
-        ws2.cell(row=row, column=10, value=fr.k_opyt).border = thin_border
-        ws2.cell(row=row, column=11, value=fr.volume_adjusted).border = thin_border
-        row += 1
+    ws2.append(_styled_row(ws2, headers, STYLE_HEADER_CENTER))
+    for row in _function_rows(ws2, result.functions_results, progress):
+        ws2.append(row)
 
     # Итого
-    ws2.cell(row=row, column=1, value='ИТОГО').font = header_font
-    ws2.cell(row=row, column=7, value=sum(fr.volume_corrected for fr in result.functions_results)).font = header_font
-    ws2.cell(row=row, column=11, value=result.total_volume).font = header_font
-
-    for col in range(1, 12):
-        ws2.column_dimensions[get_column_letter(col)].width = 15
-    ws2.column_dimensions['C'].width = 40
+    ws2.append([
+        _cell(ws2, 'ИТОГО', STYLE_BOLD), None, None, None, None, None,
+        _cell(ws2, report.total_corrected, STYLE_BOLD), None, None, None,
+        _cell(ws2, result.total_volume, STYLE_BOLD),
+    ])
 
     # === Лист 3: Коэффициенты ===
+    progress.step('Лист «Коэффициенты»')
     ws3 = wb.create_sheet('Коэффициенты')
+    _set_widths(ws3, {'A': 30, 'B': 50, 'C': 20})
+    ws3.merged_cells.add('A1:C1')
 
-    ws3['A1'] = 'Коэффициенты уровня расчёта'
-    ws3['A1'].font = Font(bold=True, size=12)
-    ws3.merge_cells('A1:C1')
-
-    coef_headers = ['Коэффициент', 'Значение', 'Числовое значение']
-    for col, header in enumerate(coef_headers, 1):
-        cell = ws3.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
+    ws3.append([_cell(ws3, 'Коэффициенты уровня расчёта', STYLE_SUBTITLE)])
+    ws3.append([])
+    ws3.append(_styled_row(ws3, ['Коэффициент', 'Значение', 'Числовое значение'], STYLE_HEADER))
 
     coeffs = project.coefficients
     coef_data = [
@@ -111,69 +164,37 @@ def export_to_xlsx(project: Project, result: CalculationResult, file_path: str):
         ('K_or (опыт разработки)', coeffs.dev_experience, result.k_or),
         ('K_sr_srok (влияние сроков)', coeffs.deadline, result.k_sr_srok),
     ]
-
-    for row, (name, value, num) in enumerate(coef_data, 4):
-        ws3.cell(row=row, column=1, value=name).border = thin_border
-        ws3.cell(row=row, column=2, value=str(value)[:50]).border = thin_border
-        ws3.cell(row=row, column=3, value=num).border = thin_border
-
-    ws3.column_dimensions['A'].width = 30
-    ws3.column_dimensions['B'].width = 50
-    ws3.column_dimensions['C'].width = 20
+    for name, value, num in coef_data:
+        ws3.append(_styled_row(ws3, (name, str(value)[:50], num), STYLE_CELL))
 
     # === Лист 4: Подпроцессы ===
+    progress.step('Лист «Подпроцессы»')
     ws4 = wb.create_sheet('Подпроцессы')
+    _set_widths(ws4, {get_column_letter(col): 20 for col in range(1, 6)})
+    ws4.merged_cells.add('A1:E1')
 
-    ws4['A1'] = 'Трудоёмкость подпроцессов'
-    ws4['A1'].font = Font(bold=True, size=12)
-    ws4.merge_cells('A1:E1')
-
+    ws4.append([_cell(ws4, 'Трудоёмкость подпроцессов', STYLE_SUBTITLE)])
+    ws4.append([])
     sp_headers = ['Подпроцесс', 'Коэфф. A', 'Трудоёмкость [чел.-дн.]', 'Численность [чел.]', 'Срок [мес.]']
-    for col, header in enumerate(sp_headers, 1):
-        cell = ws4.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
-        cell.alignment = center_align
-
-    row = 4
+    ws4.append(_styled_row(ws4, sp_headers, STYLE_HEADER_CENTER))
+
     for sp in result.subprocess_results:
-        ws4.cell(row=row, column=1, value=sp.name).border = thin_border
-        ws4.cell(row=row, column=2, value=sp.base_coefficient).border = thin_border
-        ws4.cell(row=row, column=3, value=sp.labor).border = thin_border
-        ws4.cell(row=row, column=4, value=sp.staff).border = thin_border
-        ws4.cell(row=row, column=5, value=sp.duration).border = thin_border
-        row += 1
+        ws4.append(_styled_row(ws4, (sp.name, sp.base_coefficient, sp.labor, sp.staff, sp.duration), STYLE_CELL))
 
     # Итого
-    for col in range(1, 6):
-        ws4.cell(row=row, column=col).font = header_font
-        ws4.cell(row=row, column=col).fill = PatternFill(start_color='FFFFCC', end_color='FFFFCC', fill_type='solid')
-        ws4.cell(row=row, column=col).border = thin_border
-
-    ws4.cell(row=row, column=1, value='ИТОГО')
-    ws4.cell(row=row, column=2, value=1.00)
-    ws4.cell(row=row, column=3, value=result.total_labor)
-    ws4.cell(row=row, column=4, value=result.average_staff)
-    ws4.cell(row=row, column=5, value=result.total_duration)
-
-    for col in range(1, 6):
-        ws4.column_dimensions[get_column_letter(col)].width = 20
+    ws4.append(_styled_row(
+        ws4, ('ИТОГО', 1.00, result.total_labor, result.average_staff, result.total_duration), STYLE_TOTAL
+    ))
 
     # === Лист 5: Итоги ===
+    progress.step('Лист «Итоги»')
     ws5 = wb.create_sheet('Итоги')
+    _set_widths(ws5, {'A': 35, 'B': 20, 'C': 20})
+    ws5.merged_cells.add('A1:C1')
 
-    ws5['A1'] = 'ИТОГОВЫЕ РЕЗУЛЬТАТЫ РАСЧЁТА'
-    ws5['A1'].font = Font(bold=True, size=14)
-    ws5.merge_cells('A1:C1')
-
-    ws5['A3'] = 'Показатель'
-    ws5['B3'] = 'Значение'
-    ws5['C3'] = 'Единица измерения'
-    for col in range(1, 4):
-        ws5.cell(row=3, column=col).font = header_font
-        ws5.cell(row=3, column=col).fill = header_fill
-        ws5.cell(row=3, column=col).border = thin_border
+    ws5.append([_cell(ws5, 'ИТОГОВЫЕ РЕЗУЛЬТАТЫ РАСЧЁТА', STYLE_TITLE)])
+    ws5.append([])
+    ws5.append(_styled_row(ws5, ['Показатель', 'Значение', 'Единица измерения'], STYLE_HEADER))
 
     results_data = [
         ('Общий объём ПС (V)', result.total_volume, 'строк'),
@@ -183,23 +204,20 @@ def export_to_xlsx(project: Project, result: CalculationResult, file_path: str):
         ('Общий срок разработки', result.total_duration, 'месяцев'),
         ('Средняя численность', result.average_staff, 'человек'),
     ]
-
-    for row, (name, value, unit) in enumerate(results_data, 4):
-        ws5.cell(row=row, column=1, value=name).border = thin_border
-        ws5.cell(row=row, column=2, value=round(value, 2)).border = thin_border
-        ws5.cell(row=row, column=3, value=unit).border = thin_border
-
-    ws5.column_dimensions['A'].width = 35
-    ws5.column_dimensions['B'].width = 20
-    ws5.column_dimensions['C'].width = 20
+    for name, value, unit in results_data:
+        ws5.append(_styled_row(ws5, (name, round(value, 2), unit), STYLE_CELL))
 
     # Формула
-    ws5['A12'] = 'Формула расчёта базовой трудоёмкости:'
-    ws5['A12'].font = Font(bold=True)
-    ws5['A13'] = 'T_baz = A × V^C × K_n × K_nad × K_proizv × K_dokum × K_teh × K_or'
-    ws5['A14'] = f'T_baz = {result.A} × {result.total_volume:.2f}^{result.C} × {result.k_n} × {result.k_nad} × {result.k_proizv} × {result.k_dokum} × {result.k_teh:.4f} × {result.k_or}'
-    ws5['A15'] = f'T_baz = {result.base_labor:.2f} чел.-дн.'
-    ws5['A15'].font = Font(bold=True)
+    ws5.append([])
+    ws5.append([])
+    ws5.append([_cell(ws5, 'Формула расчёта базовой трудоёмкости:', STYLE_BOLD)])
+    ws5.append(['T_baz = A × V^C × K_n × K_nad × K_proizv × K_dokum × K_teh × K_or'])
+    ws5.append([f'T_baz = {result.A} × {result.total_volume:.2f}^{result.C} × {result.k_n} × {result.k_nad} × {result.k_proizv} × {result.k_dokum} × {result.k_teh:.4f} × {result.k_or}'])
+    ws5.append([_cell(ws5, f'T_baz = {result.base_labor:.2f} чел.-дн.', STYLE_BOLD)])
 
     # Сохранение
-    wb.save(file_path)
+    progress.step('Сохранение файла')
+    with atomic_output(file_path) as temp_path:
+        wb.save(temp_path)
+        progress.check()
+    progress.finish()
@@ -0,0 +1,558 @@
+# -*- coding: utf-8 -*-
+"""
+Очередь заданий на SQLite для длительных пакетных расчётов и экспорта
+
+Задание ссылается на файл проекта и, при необходимости, на файлы отчётов.
+Рабочие процессы забирают задания из общей базы, поэтому закрытие
+терминала, из которого задания были поставлены, их не прерывает.
+
+- Задание выдаётся рабочему с арендой (lease), которую тот продлевает по
+  таймеру и при каждом сообщении о ходе. Если процесс упал, аренда
+  истекает и задание снова выдаётся другому рабочему. Записи рабочего
+  проходят, только пока аренда за ним; потерявший аренду рабочий бросает
+  задание, не трогая состояние нового владельца.
+- Уже сформированные отчёты задания запоминаются; при повторном запуске
+  (после сбоя или ошибки) они пропускаются, если файл проекта не менялся.
+- Ошибки повторяются с нарастающей паузой до max_attempts попыток.
+- Профиль движка записывается в задание при постановке целиком, поэтому
+  рабочим не нужен каталог профилей, а повтор считается с тем же профилем.
+
+Командная строка:
+    python -m app.jobs очередь.sqlite3 submit проект.json --docx отчёт.docx --xlsx отчёт.xlsx \\
+        --engine-profile отдел:2
+    python -m app.jobs очередь.sqlite3 work --workers 4 --drain
+    python -m app.jobs очередь.sqlite3 list [--status failed]
+    python -m app.jobs очередь.sqlite3 show 12
+    python -m app.jobs очередь.sqlite3 retry 12 | cancel 12
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from .models.project import Project
+from .models.calculation import CalculationEngine
+from .models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+from .export import EXPORTERS, get_exporter
+from .export.common import ExportCancelled
+
+# Состояния задания
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+
+LEASE_SECONDS = 60.0  # Аренда задания рабочим без продления
+LEASE_RENEW_SECONDS = LEASE_SECONDS / 3  # Продление аренды по таймеру во время выполнения
+HEARTBEAT_SECONDS = 1.0  # Не чаще одной записи о ходе в секунду
+RETRY_DELAY_SECONDS = 5.0  # Пауза перед повтором (удваивается с каждой попыткой)
+MAX_RETRY_DELAY_SECONDS = 300.0
+POLL_SECONDS = 1.0  # Опрос пустой очереди
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_path TEXT NOT NULL,
+    outputs TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    result TEXT,
+    done_outputs TEXT NOT NULL DEFAULT '[]',
+    project_mtime REAL,
+    worker TEXT,
+    lease_until REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    profile TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, not_before, id);
+"""
+
+
+class LeaseLost(Exception):
+    """Аренда задания истекла и задание выдано другому рабочему"""
+
+
+@dataclass
+class Job:
+    """Задание очереди"""
+    id: int
+    project_path: str
+    outputs: dict[str, str] = field(default_factory=dict)  # Формат -> путь к отчёту
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    progress: float = 0.0  # 0..1
+    message: str = ""
+    error: Optional[str] = None
+    result: Optional[dict] = None  # CalculationResult.to_dict()
+    done_outputs: list[str] = field(default_factory=list)
+    project_mtime: Optional[float] = None
+    worker: Optional[str] = None
+    lease_until: Optional[float] = None
+    profile: Optional[EngineProfile] = None  # None — коэффициенты методики
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            project_path=row["project_path"],
+            outputs=json.loads(row["outputs"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            progress=row["progress"],
+            message=row["message"],
+            error=row["error"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            done_outputs=json.loads(row["done_outputs"]),
+            project_mtime=row["project_mtime"],
+            worker=row["worker"],
+            lease_until=row["lease_until"],
+            profile=EngineProfile.from_dict(json.loads(row["profile"])) if row["profile"] else None,
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+
+class JobQueue:
+    """Очередь заданий в файле SQLite (одно соединение на процесс)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # WAL: чтение списка заданий не блокирует рабочих
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if not self._has_column("profile"):
+            # Очередь, созданная до появления профилей движка
+            with self._transaction() as conn:
+                if not self._has_column("profile"):
+                    conn.execute("ALTER TABLE jobs ADD COLUMN profile TEXT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _has_column(self, name: str) -> bool:
+        return any(row["name"] == name for row in self._conn.execute("PRAGMA table_info(jobs)"))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Транзакция с блокировкой записи с самого начала"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _update(self, job_id: int, **values) -> None:
+        values["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in values)
+        self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*values.values(), job_id))
+
+    def _update_owned(self, job_id: int, worker: str, **values) -> bool:
+        """Обновить задание, только если оно выполняется этим рабочим; False — аренда потеряна"""
+        values["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in values)
+        cursor = self._conn.execute(
+            f"UPDATE jobs SET {columns} WHERE id = ? AND worker = ? AND status = ?",
+            (*values.values(), job_id, worker, RUNNING),
+        )
+        return cursor.rowcount > 0
+
+    # --- Постановка и просмотр ---
+
+    def submit(self, project_path: str, outputs: Optional[dict[str, str]] = None,
+               max_attempts: int = 3, profile: Optional[EngineProfile] = None) -> int:
+        """Поставить задание (с профилем движка profile); возвращает его номер"""
+        outputs = {fmt: os.path.abspath(path) for fmt, path in (outputs or {}).items()}
+        unknown = set(outputs) - set(EXPORTERS)
+        if unknown:
+            raise ValueError(f"Неизвестные форматы отчёта: {', '.join(sorted(unknown))}")
+        now = time.time()
+        cursor = self._conn.execute(
+            "INSERT INTO jobs (project_path, outputs, max_attempts, profile, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(project_path), json.dumps(outputs, ensure_ascii=False), max_attempts,
+             json.dumps(profile.to_dict(), ensure_ascii=False) if profile else None, now, now),
+        )
+        return cursor.lastrowid
+
+    def get(self, job_id: int) -> Optional[Job]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def jobs(self, status: Optional[str] = None) -> list[Job]:
+        if status:
+            rows = self._conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,))
+        else:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id")
+        return [Job.from_row(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Число заданий по состояниям"""
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def retry(self, job_id: int) -> bool:
+        """Вернуть неудавшееся или отменённое задание в очередь"""
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, error = NULL, not_before = 0, "
+            "cancel_requested = 0, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+            (QUEUED, time.time(), job_id, FAILED, CANCELLED),
+        )
+        return cursor.rowcount > 0
+
+    def cancel(self, job_id: int) -> bool:
+        """Отменить задание: ожидающее — сразу, выполняемое — при следующем ходе"""
+        with self._transaction() as conn:
+            job = self.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return False
+            if job.status == QUEUED:
+                self._update(job_id, status=CANCELLED, message="Отменено")
+            else:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return True
+
+    # --- Работа рабочих процессов ---
+
+    def claim(self, worker: str, lease: float = LEASE_SECONDS) -> Optional[Job]:
+        """Забрать следующее задание (в том числе брошенное упавшим рабочим)"""
+        now = time.time()
+        with self._transaction() as conn:
+            # Брошенные задания без оставшихся попыток больше не выдаются
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, ?), updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= max_attempts",
+                (FAILED, "Рабочий процесс прервался", now, RUNNING, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = ? AND not_before <= ?) "
+                "OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._update(row["id"], status=RUNNING, attempts=row["attempts"] + 1,
+                         worker=worker, lease_until=now + lease, error=None)
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id: int, worker: str, progress: Optional[float] = None,
+                  message: Optional[str] = None, lease: float = LEASE_SECONDS) -> bool:
+        """Продлить аренду и записать ход (если задан); True — запрошена отмена.
+
+        LeaseLost — задание больше не выполняется этим рабочим.
+        """
+        values = {"lease_until": time.time() + lease}
+        if progress is not None:
+            values.update(progress=progress, message=message or "")
+        if not self._update_owned(job_id, worker, **values):
+            raise LeaseLost(f"Аренда задания {job_id} потеряна")
+        row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row["cancel_requested"])
+
+    def record(self, job_id: int, worker: str, **values) -> None:
+        """Сохранить промежуточное состояние (результат расчёта, готовые отчёты)"""
+        for name in ("result", "done_outputs"):
+            if name in values:
+                values[name] = json.dumps(values[name], ensure_ascii=False)
+        if not self._update_owned(job_id, worker, **values):
+            raise LeaseLost(f"Аренда задания {job_id} потеряна")
+
+    def complete(self, job_id: int, worker: str) -> bool:
+        return self._update_owned(job_id, worker, status=DONE, progress=1.0, message="Готово", lease_until=None)
+
+    def release(self, job_id: int, worker: str, cancelled: bool = False) -> bool:
+        """Вернуть задание в очередь без траты попытки (остановка рабочего) или отменить"""
+        if cancelled:
+            return self._update_owned(job_id, worker, status=CANCELLED, message="Отменено", lease_until=None)
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_until = NULL, "
+            "updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (QUEUED, time.time(), job_id, worker, RUNNING),
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        """Ошибка попытки: повтор с паузой или окончательный отказ"""
+        job = self.get(job_id)
+        if job.attempts < job.max_attempts:
+            delay = min(RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1), MAX_RETRY_DELAY_SECONDS)
+            return self._update_owned(job_id, worker, status=QUEUED, error=error, lease_until=None,
+                                      not_before=time.time() + delay, message=f"Повтор через {delay:.0f} с")
+        return self._update_owned(job_id, worker, status=FAILED, error=error, lease_until=None,
+                                  message="Ошибка")
+
+
+class _LeaseKeeper(threading.Thread):
+    """Продление аренды по таймеру, пока идут длительные шаги (расчёт, экспорт)
+
+    Работает со своим соединением: соединение SQLite не делится между потоками.
+    """
+
+    def __init__(self, db_path: str, job: Job, interval: float = LEASE_RENEW_SECONDS):
+        super().__init__(name=f"lease-{job.id}", daemon=True)
+        self.db_path = db_path
+        self.job_id = job.id
+        self.worker = job.worker
+        self.interval = interval
+        self.lost = False
+        self.cancel_requested = False
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        with JobQueue(self.db_path) as queue:
+            while not self._stopped.wait(self.interval):
+                try:
+                    self.cancel_requested = queue.heartbeat(self.job_id, self.worker)
+                except LeaseLost:
+                    self.lost = True
+                    return
+                except sqlite3.Error:
+                    continue  # База занята — продлим на следующем шаге
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class _JobProgress:
+    """Ход задания: расчёт — первый этап, далее по этапу на каждый отчёт"""
+
+    def __init__(self, queue: JobQueue, job: Job, keeper: Optional[_LeaseKeeper] = None):
+        self.queue = queue
+        self.job_id = job.id
+        self.worker = job.worker
+        self.stages = 1 + len(job.outputs)
+        self.keeper = keeper
+        self.cancel_requested = False
+        self._last = 0.0
+
+    def check(self) -> None:
+        """LeaseLost, если таймер обнаружил потерю аренды"""
+        if self.keeper is not None and self.keeper.lost:
+            raise LeaseLost(f"Аренда задания {self.job_id} потеряна")
+
+    def update(self, stage: int, fraction: float, message: str, force: bool = False) -> None:
+        self.check()
+        now = time.monotonic()
+        if not force and now - self._last < HEARTBEAT_SECONDS:
+            return
+        self._last = now
+        progress = (stage + fraction) / self.stages
+        self.cancel_requested = self.queue.heartbeat(self.job_id, self.worker, progress, message)
+
+    def is_cancelled(self) -> bool:
+        self.check()
+        return self.cancel_requested or (self.keeper is not None and self.keeper.cancel_requested)
+
+
+def execute_job(queue: JobQueue, job: Job) -> None:
+    """Выполнить задание: расчёт и отчёты, которые ещё не сформированы.
+
+    LeaseLost — задание выдано другому рабочему, результат этой попытки не записан.
+    """
+    keeper = _LeaseKeeper(queue.db_path, job)
+    keeper.start()
+    try:
+        _execute(queue, job, _JobProgress(queue, job, keeper))
+    finally:
+        keeper.stop()
+    if keeper.lost:
+        raise LeaseLost(f"Аренда задания {job.id} потеряна")
+
+
+def _execute(queue: JobQueue, job: Job, progress: _JobProgress) -> None:
+    progress.update(0, 0.0, "Расчёт", force=True)
+
+    project = Project.load(job.project_path)
+    mtime = os.path.getmtime(job.project_path)
+    # Отчёты прошлой попытки годятся, только если проект с тех пор не менялся
+    done = list(job.done_outputs) if job.project_mtime == mtime else []
+    result = CalculationEngine(job.profile).calculate(project)
+    queue.record(job.id, job.worker, result=result.to_dict(), project_mtime=mtime, done_outputs=done)
+
+    report = None
+    for stage, (fmt, file_path) in enumerate(job.outputs.items(), 1):
+        if fmt in done and os.path.exists(file_path):
+            progress.update(stage, 1.0, f"{fmt}: уже сформирован", force=True)
+            continue
+        if report is None:
+            from .export.report_data import ReportData
+            report = ReportData.build(project, result)
+
+        get_exporter(fmt)(
+            project, result, file_path,
+            on_progress=lambda d, t, m, stage=stage, fmt=fmt: progress.update(stage, d / t, f"{fmt}: {m}"),
+            is_cancelled=progress.is_cancelled,
+            report=report,
+        )
+        done.append(fmt)
+        queue.record(job.id, job.worker, done_outputs=done)
+        progress.update(stage, 1.0, f"{fmt}: готово", force=True)
+
+
+def worker_loop(db_path: str, drain: bool = False, poll: float = POLL_SECONDS,
+                worker: Optional[str] = None) -> int:
+    """Цикл рабочего процесса; drain — завершиться, когда очередь опустеет.
+    Возвращает число обработанных заданий."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    with JobQueue(db_path) as queue:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                if drain and not any(queue.counts()[s] for s in (QUEUED, RUNNING)):
+                    return processed
+                time.sleep(poll)
+                continue
+            try:
+                execute_job(queue, job)
+            except LeaseLost:
+                pass  # Задание выполняет другой рабочий — его состояние не трогаем
+            except ExportCancelled:
+                queue.release(job.id, worker, cancelled=True)
+            except KeyboardInterrupt:
+                queue.release(job.id, worker)
+                raise
+            except Exception as e:
+                queue.fail(job.id, worker, f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+            else:
+                queue.complete(job.id, worker)
+            processed += 1
+
+
+def run_workers(db_path: str, workers: int = 1, drain: bool = False) -> None:
+    """Запустить рабочие процессы и дождаться их завершения"""
+    if workers <= 1:
+        worker_loop(db_path, drain)
+        return
+    # spawn: рабочие не наследуют открытые соединения SQLite
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker_loop, args=(db_path, drain)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+def _format_job(job: Job) -> str:
+    outputs = ", ".join(job.outputs) or "—"
+    return (f"{job.id:>6}  {job.status:<9}  {job.progress * 100:5.1f}%  "
+            f"попыток {job.attempts}/{job.max_attempts}  [{outputs}]  {job.project_path}  {job.message}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Очередь заданий расчёта и экспорта")
+    parser.add_argument("db", help="Файл очереди (SQLite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Поставить задания")
+    submit.add_argument("projects", nargs="+", help="Файлы проектов (.json)")
+    for fmt in EXPORTERS:
+        submit.add_argument(f"--{fmt}", metavar="ПУТЬ",
+                            help=f"Отчёт {fmt.upper()}; для нескольких проектов — каталог")
+    submit.add_argument("--max-attempts", type=int, default=3)
+    add_profile_arguments(submit)
+
+    work = commands.add_parser("work", help="Выполнять задания")
+    work.add_argument("--workers", type=int, default=1, help="Число рабочих процессов")
+    work.add_argument("--drain", action="store_true", help="Завершиться, когда очередь опустеет")
+
+    listing = commands.add_parser("list", help="Список заданий")
+    listing.add_argument("--status", choices=STATUSES)
+
+    for name, help_text in (("show", "Подробности задания"), ("retry", "Повторить задание"),
+                            ("cancel", "Отменить задание")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("job_id", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        run_workers(args.db, args.workers, args.drain)
+        return 0
+
+    with JobQueue(args.db) as queue:
+        if args.command == "submit":
+            profile = profile_from_args(submit, args)
+            for project_path in args.projects:
+                outputs = {}
+                for fmt in EXPORTERS:
+                    target = getattr(args, fmt)
+                    if not target:
+                        continue
+                    if len(args.projects) > 1:
+                        stem = os.path.splitext(os.path.basename(project_path))[0]
+                        target = os.path.join(target, f"{stem}.{fmt}")
+                    outputs[fmt] = target
+                job_id = queue.submit(project_path, outputs, max_attempts=args.max_attempts, profile=profile)
+                print(f"Задание {job_id}: {project_path}")
+        elif args.command == "list":
+            for job in queue.jobs(args.status):
+                print(_format_job(job))
+            counts = queue.counts()
+            print("Итого: " + ", ".join(f"{status} {counts[status]}" for status in STATUSES))
+        elif args.command == "show":
+            job = queue.get(args.job_id)
+            if job is None:
+                print(f"Задание {args.job_id} не найдено", file=sys.stderr)
+                return 1
+            print(_format_job(job))
+            for fmt, path in job.outputs.items():
+                mark = "готов" if fmt in job.done_outputs else "ожидает"
+                print(f"  {fmt:<5} {mark:<8} {path}")
+            if job.profile:
+                print(f"  Профиль движка: {job.profile.label}")
+            if job.result:
+                print(f"  Трудоёмкость: {job.result['final_labor']:.2f} чел.-дн., "
+                      f"срок {job.result['total_duration']:.2f} мес.")
+            if job.error:
+                print(f"  Ошибка: {job.error}")
+        elif args.command in ("retry", "cancel"):
+            done = getattr(queue, args.command)(args.job_id)
+            if not done:
+                print(f"Задание {args.job_id}: действие невозможно в текущем состоянии", file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,17 +10,19 @@ from typing import Optional
 
 from PySide6.QtWidgets import (
     QMainWindow, QTabWidget, QMenuBar, QMenu, QStatusBar,
-    QFileDialog, QMessageBox, QApplication, QWidget, QVBoxLayout
+    QFileDialog, QMessageBox, QApplication, QWidget, QVBoxLayout, QProgressDialog
 )
-from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtCore import Qt, QTimer, Signal, QSettings, QThreadPool
 from PySide6.QtGui import QAction, QKeySequence, QCloseEvent, QFont, QResizeEvent
 
 from .models.project import Project
 from .models.calculation import CalculationEngine, CalculationResult
+from .change_bus import ChangeBus, ChangeKind, VOLUME_CHANGES, CALCULATION_CHANGES
+from .workers import CalculationWorker, ExportWorker
 from .widgets.project_info import ProjectInfoWidget
-from .widgets.components_editor import ComponentsEditorWidget
-from .widgets.coefficients_panel import CoefficientsPanelWidget
-from .widgets.results_view import ResultsViewWidget
+
+
+LIVE_CALCULATION_KEY = "live_calculation"
 
 
 class MainWindow(QMainWindow):
@@ -29,12 +31,37 @@ class MainWindow(QMainWindow):
     project_changed = Signal()
     calculation_updated = Signal(CalculationResult)
 
+    # Индексы вкладок
+    TAB_PROJECT_INFO, TAB_COMPONENTS, TAB_COEFFICIENTS, TAB_RESULTS, TAB_EXPORT = range(5)
+
     def __init__(self):
         super().__init__()
         self.project = Project()
         self.calculation_result: Optional[CalculationResult] = None
         self.autosave_path: Optional[str] = None
 
+        # Шина изменений: события редакторов объединяются за один проход цикла событий
+        self.change_bus = ChangeBus(self)
+        self._project_stats = (0, 0, 0)  # Компонентов, функций, базовый объём
+
+        # Фоновый расчёт: результаты устаревших поколений отбрасываются
+        self._calc_pool = QThreadPool(self)
+        self._calc_pool.setMaxThreadCount(2)
+        self._calc_generation = 0
+        self._calc_worker: Optional[CalculationWorker] = None
+        self._show_results_on_finish = False
+        self._status_calc_generation = 0  # Расчёт, о котором сообщает «Выполняется расчёт...»
+        self._live_timer = QTimer(self)
+        self._live_timer.setSingleShot(True)
+        self._live_timer.setInterval(300)
+        self._live_timer.timeout.connect(self._start_live_calculation)
+
+        # Экспорт в фоне: по одному отчёту за раз
+        self._export_pool = QThreadPool(self)
+        self._export_pool.setMaxThreadCount(1)
+        self._export_worker: Optional[ExportWorker] = None
+        self._export_dialog: Optional[QProgressDialog] = None
+
         # Опорная ширина для масштабирования шрифтов (при этой ширине базовый размер)
         self._font_scale_reference_width = 1200
         self._font_base_point_size = 12
@@ -56,36 +83,93 @@ class MainWindow(QMainWindow):
         self._apply_font_scale()
 
     def _setup_ui(self):
-        """Настройка интерфейса"""
+        """Настройка интерфейса
+
+        Вкладки создаются при первом открытии: до этого на их месте пустые
+        заглушки. Созданная вкладка остаётся в памяти со всем состоянием.
+        """
         # Главный виджет с вкладками
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
-        # Вкладка 1: Общие сведения
+        self.project_info: Optional[ProjectInfoWidget] = None
+        self.components_editor = None
+        self.coefficients_panel = None
+        self.results_view = None
+        self.export_tab: Optional[QWidget] = None
+
+        self._tab_builders = [
+            ("Общие сведения", self._build_project_info),
+            ("Каталог функций", self._build_components_editor),
+            ("Коэффициенты", self._build_coefficients_panel),
+            ("Результаты расчёта", self._build_results_view),
+            ("Экспорт", self._create_export_tab),
+        ]
+        self._built_tabs: set[int] = set()
+        for title, _ in self._tab_builders:
+            self.tabs.addTab(QWidget(), title)
+
+        self.tabs.currentChanged.connect(self._ensure_tab)
+        self._ensure_tab(self.tabs.currentIndex())
+
+    def _ensure_tab(self, index: int) -> QWidget:
+        """Создать вкладку при первом обращении и вернуть её виджет"""
+        if index < 0 or index in self._built_tabs:
+            return self.tabs.widget(index)
+
+        title, builder = self._tab_builders[index]
+        widget = builder()
+        self._built_tabs.add(index)
+
+        # Заменяем заглушку, не порождая лишних currentChanged
+        current = self.tabs.currentIndex()
+        placeholder = self.tabs.widget(index)
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, widget, title)
+        self.tabs.setCurrentIndex(current)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        return widget
+
+    def _build_project_info(self) -> QWidget:
+        """Вкладка 1: Общие сведения"""
         self.project_info = ProjectInfoWidget(self.project)
-        self.tabs.addTab(self.project_info, "Общие сведения")
+        self.project_info.data_changed.connect(self.change_bus.publish)
+        return self.project_info
+
+    def _build_components_editor(self) -> QWidget:
+        """Вкладка 2: Каталог функций"""
+        from .widgets.components_editor import ComponentsEditorWidget
 
-        # Вкладка 2: Каталог функций
         self.components_editor = ComponentsEditorWidget(self.project)
-        self.tabs.addTab(self.components_editor, "Каталог функций")
+        self.components_editor.data_changed.connect(self.change_bus.publish)
+        return self.components_editor
+
+    def _build_coefficients_panel(self) -> QWidget:
+        """Вкладка 3: Коэффициенты"""
+        from .widgets.coefficients_panel import CoefficientsPanelWidget
 
-        # Вкладка 3: Коэффициенты
         self.coefficients_panel = CoefficientsPanelWidget(self.project)
-        self.tabs.addTab(self.coefficients_panel, "Коэффициенты")
+        self.coefficients_panel.data_changed.connect(self.change_bus.publish)
+        return self.coefficients_panel
 
-        # Вкладка 4: Результаты расчёта
-        self.results_view = ResultsViewWidget()
-        self.tabs.addTab(self.results_view, "Результаты расчёта")
+    def _build_results_view(self) -> QWidget:
+        """Вкладка 4: Результаты расчёта (с уже полученным результатом)"""
+        from .widgets.results_view import ResultsViewWidget
 
-        # Вкладка 5: Экспорт (будет реализована позже)
-        self.export_tab = self._create_export_tab()
-        self.tabs.addTab(self.export_tab, "Экспорт")
+        self.results_view = ResultsViewWidget()
+        self.results_view.calculate_requested.connect(self._calculate)
+        if self.calculation_result is not None:
+            self.results_view.update_results(self.calculation_result, self.project)
+        return self.results_view
 
     def _create_export_tab(self) -> QWidget:
         """Создание вкладки экспорта"""
         from PySide6.QtWidgets import QPushButton, QGroupBox, QHBoxLayout, QLabel
 
         widget = QWidget()
+        self.export_tab = widget
         layout = QVBoxLayout(widget)
 
         # Группа экспорта в файлы
@@ -191,6 +275,13 @@ class MainWindow(QMainWindow):
         calc_action.triggered.connect(self._calculate)
         calc_menu.addAction(calc_action)
 
+        self.action_live_calc = QAction("Живой пересчёт", self)
+        self.action_live_calc.setCheckable(True)
+        self.action_live_calc.setToolTip("Пересчитывать результаты в фоне после каждого изменения проекта")
+        self.action_live_calc.setChecked(QSettings().value(LIVE_CALCULATION_KEY, False, type=bool))
+        self.action_live_calc.toggled.connect(self._toggle_live_calculation)
+        calc_menu.addAction(self.action_live_calc)
+
         # Меню Вид — смена темы
         view_menu = menubar.addMenu("Вид")
         from .theme import get_theme, set_theme, apply_theme, THEME_LIGHT, THEME_DARK
@@ -220,6 +311,7 @@ class MainWindow(QMainWindow):
         """Настройка строки состояния"""
         self.statusbar = QStatusBar()
         self.setStatusBar(self.statusbar)
+        self._refresh_project_stats()
         self._update_statusbar()
 
     def _setup_autosave(self):
@@ -230,17 +322,33 @@ class MainWindow(QMainWindow):
 
     def _connect_signals(self):
         """Подключение сигналов"""
-        self.project_info.data_changed.connect(self._on_project_changed)
-        self.components_editor.data_changed.connect(self._on_project_changed)
-        self.coefficients_panel.data_changed.connect(self._on_project_changed)
-        self.results_view.calculate_requested.connect(self._calculate)
+        self.change_bus.subscribe(self._on_project_changed)
+        self.change_bus.subscribe(self._on_volume_changed, VOLUME_CHANGES)
+        self.change_bus.subscribe(self._on_calculation_input_changed, CALCULATION_CHANGES)
 
-    def _on_project_changed(self):
+    def _on_project_changed(self, changes: frozenset):
         """Обработка изменения проекта"""
-        self.project.modified = True
+        # Замена проекта целиком (новый/открытый) не делает его изменённым
+        if changes - {ChangeKind.PROJECT}:
+            self.project.modified = True
         self._update_title()
+
+    def _on_volume_changed(self, changes: frozenset):
+        """Обработка изменения состава функций или их объёма"""
+        self._refresh_project_stats()
         self._update_statusbar()
 
+    def _on_calculation_input_changed(self, changes: frozenset):
+        """Исходные данные расчёта изменились — текущий фоновый расчёт устарел"""
+        self._calc_generation += 1
+        if self.action_live_calc.isChecked():
+            self._live_timer.start()
+
+    def _project_replaced(self):
+        """Оповестить подписчиков о замене проекта и сразу обновить окно"""
+        self.change_bus.publish(ChangeKind.PROJECT)
+        self.change_bus.flush()
+
     def _update_title(self):
         """Обновление заголовка окна"""
         title = f"Расчёт трудоёмкости разработки ПС — {self.project.name}"
@@ -248,11 +356,17 @@ class MainWindow(QMainWindow):
             title += " *"
         self.setWindowTitle(title)
 
+    def _refresh_project_stats(self):
+        """Пересчитать сводные показатели проекта для строки состояния"""
+        self._project_stats = (
+            len(self.project.components),
+            self.project.get_function_count(),
+            self.project.get_total_volume(),
+        )
+
     def _update_statusbar(self):
         """Обновление строки состояния"""
-        volume = self.project.get_total_volume()
-        func_count = self.project.get_function_count()
-        comp_count = len(self.project.components)
+        comp_count, func_count, volume = self._project_stats
 
         status = f"Компонентов: {comp_count} | Функций: {func_count} | Базовый объём: {volume} строк"
 
@@ -278,8 +392,7 @@ class MainWindow(QMainWindow):
         self.project = Project()
         self.calculation_result = None
         self._refresh_all_widgets()
-        self._update_title()
-        self._update_statusbar()
+        self._project_replaced()
 
     def _open_project(self):
         """Открытие проекта"""
@@ -304,8 +417,7 @@ class MainWindow(QMainWindow):
                 self.project = Project.load(file_path)
                 self.calculation_result = None
                 self._refresh_all_widgets()
-                self._update_title()
-                self._update_statusbar()
+                self._project_replaced()
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить проект:\n{e}")
 
@@ -357,8 +469,7 @@ class MainWindow(QMainWindow):
         self.project = Project.create_example()
         self.calculation_result = None
         self._refresh_all_widgets()
-        self._update_title()
-        self._update_statusbar()
+        self._project_replaced()
         self.statusbar.showMessage("Загружен эталонный пример из методики", 3000)
 
     def _calculate(self):
@@ -371,57 +482,157 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Предупреждение", "Добавьте хотя бы одну функцию")
             return
 
-        engine = CalculationEngine()
-        self.calculation_result = engine.calculate(self.project)
+        self._submit_calculation(show_results=True)
+        self._status_calc_generation = self._calc_generation
+        self.statusbar.showMessage("Выполняется расчёт...")
+
+    def _toggle_live_calculation(self, enabled: bool):
+        """Включение/выключение живого пересчёта"""
+        QSettings().setValue(LIVE_CALCULATION_KEY, enabled)
+        if enabled:
+            self._live_timer.start()
+        else:
+            self._live_timer.stop()
+
+    def _start_live_calculation(self):
+        """Фоновый пересчёт после паузы в редактировании"""
+        if not self.action_live_calc.isChecked():
+            return
+        if self.project.get_function_count() == 0:
+            self.calculation_result = None
+            if self.results_view is not None:
+                self.results_view.clear()
+            self._update_statusbar()
+            return
+        self._submit_calculation(show_results=False)
+
+    def _submit_calculation(self, show_results: bool):
+        """Запустить расчёт по снимку проекта в пуле потоков"""
+        self._calc_generation += 1
+        # Запрошенный показ результата сохраняется до его выдачи: фоновый пересчёт его не отменяет
+        if show_results:
+            self._show_results_on_finish = True
+
+        worker = CalculationWorker(self._calc_generation, self.project.snapshot())
+        worker.signals.finished.connect(self._on_calculation_finished)
+        worker.signals.failed.connect(self._on_calculation_failed)
+        self._calc_worker = worker
+        self._calc_pool.start(worker)
+
+    def _on_calculation_finished(self, generation: int, result: CalculationResult):
+        """Результат фонового расчёта (устаревшие поколения отбрасываются)"""
+        if generation != self._calc_generation:
+            self._drop_stale_calculation(generation)
+            return
+
+        self.calculation_result = result
+        if self.results_view is not None:
+            self.results_view.update_results(result, self.project)
+        self._update_statusbar()
 
-        self.results_view.update_results(self.calculation_result, self.project)
-        self.tabs.setCurrentWidget(self.results_view)
+        if self._take_show_results():
+            # Вкладка результатов при первом открытии сама покажет результат
+            self.tabs.setCurrentIndex(self.TAB_RESULTS)
+            self.statusbar.showMessage("Расчёт выполнен", 3000)
+
+    def _on_calculation_failed(self, generation: int, message: str):
+        """Ошибка фонового расчёта"""
+        if generation != self._calc_generation:
+            self._drop_stale_calculation(generation)
+            return
         self._update_statusbar()
-        self.statusbar.showMessage("Расчёт выполнен", 3000)
+        if self._take_show_results():
+            QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить расчёт:\n{message}")
+
+    def _take_show_results(self) -> bool:
+        """Выдан актуальный результат: нужно ли показать его пользователю"""
+        show = self._show_results_on_finish
+        self._show_results_on_finish = False
+        self._status_calc_generation = 0
+        return show
+
+    def _drop_stale_calculation(self, generation: int):
+        """Устаревший результат отброшен: расчёт, запрошенный пользователем, повторяется"""
+        if generation != self._status_calc_generation:
+            return
+        if self.project.get_function_count() == 0:
+            self._take_show_results()
+            self._update_statusbar()
+            return
+        # Живой пересчёт мог уже запустить расчёт текущего поколения
+        if self._calc_worker is None or self._calc_worker.generation != self._calc_generation:
+            self._submit_calculation(show_results=True)
+        self._status_calc_generation = self._calc_generation
 
     def _export_to_word(self):
         """Экспорт в Word"""
-        if not self.calculation_result:
-            QMessageBox.warning(self, "Предупреждение", "Сначала выполните расчёт")
-            return
-
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Экспорт в Word",
-            f"{self.project.name}.docx",
-            "Документ Word (*.docx)"
-        )
-        if file_path:
-            try:
-                from .export.docx_export import export_to_docx
-                export_to_docx(self.project, self.calculation_result, file_path)
-                self.statusbar.showMessage(f"Экспортировано в {file_path}", 3000)
-                QMessageBox.information(self, "Экспорт завершён", f"Отчёт сохранён в:\n{file_path}")
-            except ImportError:
-                QMessageBox.warning(self, "Ошибка", "Модуль python-docx не установлен")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать:\n{e}")
+        self._start_export("docx", "Экспорт в Word", "Документ Word (*.docx)", "Отчёт сохранён в")
 
     def _export_to_excel(self):
         """Экспорт в Excel"""
+        self._start_export("xlsx", "Экспорт в Excel", "Книга Excel (*.xlsx)", "Книга сохранена в")
+
+    def _start_export(self, fmt: str, title: str, file_filter: str, done_text: str):
+        """Выбрать файл и запустить экспорт в фоне с окном хода выполнения"""
         if not self.calculation_result:
             QMessageBox.warning(self, "Предупреждение", "Сначала выполните расчёт")
             return
+        if self._export_worker is not None:
+            QMessageBox.information(self, title, "Дождитесь завершения текущего экспорта")
+            return
 
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Экспорт в Excel",
-            f"{self.project.name}.xlsx",
-            "Книга Excel (*.xlsx)"
+            self, title,
+            f"{self.project.name}.{fmt}",
+            file_filter
         )
-        if file_path:
-            try:
-                from .export.xlsx_export import export_to_xlsx
-                export_to_xlsx(self.project, self.calculation_result, file_path)
-                self.statusbar.showMessage(f"Экспортировано в {file_path}", 3000)
-                QMessageBox.information(self, "Экспорт завершён", f"Книга сохранена в:\n{file_path}")
-            except ImportError:
-                QMessageBox.warning(self, "Ошибка", "Модуль openpyxl не установлен")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать:\n{e}")
+        if not file_path:
+            return
+
+        worker = ExportWorker(fmt, self.project, self.calculation_result, file_path)
+
+        dialog = QProgressDialog("Подготовка...", "Отмена", 0, 0, self)
+        dialog.setWindowTitle(title)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(worker.cancel)
+
+        def on_progress(done: int, total: int, message: str):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            dialog.setLabelText(message)
+
+        def on_finished(path: str):
+            self._end_export()
+            self.statusbar.showMessage(f"Экспортировано в {path}", 3000)
+            QMessageBox.information(self, "Экспорт завершён", f"{done_text}:\n{path}")
+
+        def on_failed(message: str):
+            self._end_export()
+            QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать:\n{message}")
+
+        def on_cancelled():
+            self._end_export()
+            self.statusbar.showMessage("Экспорт отменён", 3000)
+
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(on_failed)
+        worker.signals.cancelled.connect(on_cancelled)
+
+        self._export_worker = worker
+        self._export_dialog = dialog
+        self._export_pool.start(worker)
+
+    def _end_export(self):
+        """Закрыть окно хода экспорта"""
+        if self._export_dialog is not None:
+            self._export_dialog.close()
+            self._export_dialog.deleteLater()
+        self._export_dialog = None
+        self._export_worker = None
 
     def _autosave(self):
         """Автосохранение во временный файл"""
@@ -457,11 +668,18 @@ class MainWindow(QMainWindow):
         )
 
     def _refresh_all_widgets(self):
-        """Обновление всех виджетов после загрузки проекта"""
-        self.project_info.set_project(self.project)
-        self.components_editor.set_project(self.project)
-        self.coefficients_panel.set_project(self.project)
-        self.results_view.clear()
+        """Обновление созданных вкладок после загрузки проекта
+
+        Ещё не открытые вкладки получат новый проект при создании.
+        """
+        if self.project_info is not None:
+            self.project_info.set_project(self.project)
+        if self.components_editor is not None:
+            self.components_editor.set_project(self.project)
+        if self.coefficients_panel is not None:
+            self.coefficients_panel.set_project(self.project)
+        if self.results_view is not None:
+            self.results_view.clear()
 
     def resizeEvent(self, event: QResizeEvent):
         """При изменении размера окна — отложенная подстройка шрифта."""
@@ -507,6 +725,16 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
 
+        # Незавершённые фоновые расчёты больше не нужны
+        self._live_timer.stop()
+        self._take_show_results()
+        self._calc_generation += 1
+        self._calc_pool.clear()
+        self._calc_pool.waitForDone()
+        if self._export_worker is not None:
+            self._export_worker.cancel()
+        self._export_pool.waitForDone()
+
         # Удаляем временный файл автосохранения
         if self.autosave_path and os.path.exists(self.autosave_path):
             try:
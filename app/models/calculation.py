@@ -4,9 +4,11 @@
 по методике СПбГУТ
 """
 
-from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Optional
+from array import array
+from dataclasses import dataclass, field, asdict, replace
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
 from functools import reduce
+import math
 import operator
 
 from .coefficients import (
@@ -35,8 +37,10 @@ from .coefficients import (
     DEPLOYMENT_QUALIFICATION,
 )
 
+from .profiles import EngineProfile
+
 if TYPE_CHECKING:
-    from .project import Project, FunctionInstance
+    from .project import Project, FunctionInstance, ProjectCoefficients
 
 
 @dataclass
@@ -67,12 +71,143 @@ class FunctionResult:
     volume_adjusted: float  # Vk_i = Vm_i * K_slozhn * K_sr_razr * K_opyt
 
 
+class ExactSum:
+    """Точная сумма чисел с плавающей точкой (частичные суммы Шевчука)
+
+    Частичные суммы не перекрываются и в точности представляют сумму
+    добавленных чисел; значение — сумма, округлённая один раз, поэтому
+    не зависит от порядка слагаемых. Так расчёт по частям (в нескольких
+    процессах) совпадает с расчётом одним проходом до бита.
+    """
+
+    __slots__ = ("partials",)
+
+    def __init__(self):
+        self.partials: list[float] = []
+
+    def add(self, x: float) -> None:
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def __float__(self) -> float:
+        return math.fsum(self.partials)
+
+
+class FunctionResultTable:
+    """Результаты по функциям в столбцах
+
+    Каждое поле FunctionResult — отдельный столбец: числа в array
+    (8 байт на значение), строки — в списках со ссылками на общие объекты.
+    Объекты FunctionResult создаются только при обращении по индексу или
+    при переборе; экспорт и представления читают столбцы через column().
+    """
+
+    # Поле FunctionResult -> код типа array (None — строковый столбец)
+    COLUMNS = (
+        ("function_id", None),
+        ("function_name", None),
+        ("component_name", None),
+        ("volume_base", "q"),
+        ("kp", "d"),
+        ("reuse_count", "q"),
+        ("reuse_coefficient", "d"),
+        ("volume_corrected", "d"),
+        ("k_slozhn", "d"),
+        ("k_sr_razr", "d"),
+        ("k_opyt", "d"),
+        ("volume_adjusted", "d"),
+    )
+
+    def __init__(self, rows: Iterable[FunctionResult] = ()):
+        self._columns = {name: [] if code is None else array(code) for name, code in self.COLUMNS}
+        # Методы добавления в столбцы в порядке полей FunctionResult
+        self._appenders = [self._columns[name].append for name, _ in self.COLUMNS]
+        for row in rows:
+            self.append(row)
+
+    def add(self, *values) -> None:
+        """Добавить строку значениями полей в порядке FunctionResult"""
+        if len(values) != len(self._appenders):
+            raise TypeError(f"Ожидается {len(self._appenders)} значений строки, получено {len(values)}")
+        for index, value in enumerate(values):
+            try:
+                self._appenders[index](value)
+            except (TypeError, OverflowError):
+                # Нецелое значение в целочисленном столбце (объём из JSON) или число вне
+                # диапазона array — столбец становится списком, строка не теряет выравнивания
+                name = self.COLUMNS[index][0]
+                self._columns[name] = list(self._columns[name])
+                self._appenders[index] = self._columns[name].append
+                self._appenders[index](value)
+
+    def append(self, row: FunctionResult) -> None:
+        self.add(*(getattr(row, name) for name, _ in self.COLUMNS))
+
+    def column(self, name: str) -> Union[array, list]:
+        """Столбец поля FunctionResult (только для чтения)"""
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return len(self._columns["function_id"])
+
+    def _row(self, index: int) -> FunctionResult:
+        return FunctionResult(*(self._columns[name][index] for name, _ in self.COLUMNS))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Индекс функции вне диапазона")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[FunctionResult]:
+        for values in zip(*(self._columns[name] for name, _ in self.COLUMNS)):
+            yield FunctionResult(*values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FunctionResultTable):
+            return len(self) == len(other) and all(
+                all(map(operator.eq, self._columns[name], other._columns[name])) for name, _ in self.COLUMNS
+            )
+        if isinstance(other, list):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FunctionResultTable({len(self)} функций)"
+
+    def __getstate__(self) -> dict:
+        return self._columns
+
+    def __setstate__(self, columns: dict) -> None:
+        self._columns = columns
+        self._appenders = [columns[name].append for name, _ in self.COLUMNS]
+
+    def to_dicts(self) -> list[dict]:
+        """Строки в виде словарей (для машиночитаемого отчёта)"""
+        names = [name for name, _ in self.COLUMNS]
+        return [dict(zip(names, values)) for values in zip(*(self._columns[name] for name in names))]
+
+
 @dataclass
 class CalculationResult:
     """Полный результат расчёта"""
     # Объём ПС
     total_volume: float  # V — общий объём
-    functions_results: list[FunctionResult] = field(default_factory=list)
+    functions_results: FunctionResultTable = field(default_factory=FunctionResultTable)
+    component_volumes: dict[str, float] = field(default_factory=dict)  # ΣVk по компонентам
 
     # Базовая трудоёмкость
     A: float = 0.19  # Статистический коэффициент A
@@ -102,6 +237,16 @@ class CalculationResult:
     total_duration: float = 0.0  # Общий срок в месяцах
     average_staff: float = 0.0  # Средняя численность
 
+    def __post_init__(self):
+        if not isinstance(self.functions_results, FunctionResultTable):
+            self.functions_results = FunctionResultTable(self.functions_results)
+
+    def to_dict(self) -> dict:
+        """Преобразовать результат в словарь (для машиночитаемого отчёта)"""
+        data = asdict(replace(self, functions_results=FunctionResultTable()))
+        data["functions_results"] = self.functions_results.to_dicts()
+        return data
+
 
 class CalculationEngine:
     """Движок расчёта трудоёмкости"""
@@ -119,19 +264,63 @@ class CalculationEngine:
         "Ввод в действие": 0.01,
     }
 
-    def __init__(self):
+    def __init__(self, profile: Optional[EngineProfile] = None):
         self.result: Optional[CalculationResult] = None
+        self.profile = profile
+        if profile is not None:
+            # Атрибуты экземпляра перекрывают значения методики в классе
+            self.A = profile.A
+            self.C = profile.C
+            self.SUBPROCESS_COEFFICIENTS = dict(profile.subprocess_coefficients)
 
     def calculate(self, project: "Project") -> CalculationResult:
         """Выполнить полный расчёт для проекта"""
-        self.result = CalculationResult(total_volume=0.0)
+        self.result = CalculationResult(total_volume=0.0, A=self.A, C=self.C)
         self.result.work_fund = project.work_fund
         self.result.constraint_type = project.constraint_type
         self.result.constraint_value = project.constraint_value
 
         # 1. Расчёт объёма ПС
-        self._calculate_volume(project)
+        self._calculate_volume(
+            ((component.name, func) for component in project.components for func in component.functions),
+            table=self.result.functions_results,
+        )
 
+        # 2-4. Трудоёмкость, подпроцессы и итоги
+        return self._calculate_labor(project)
+
+    def calculate_stream(
+        self,
+        records: Iterable[tuple[str, "FunctionInstance"]],
+        coefficients: "ProjectCoefficients",
+        work_fund: int = 21,
+        constraint_type: str = "duration",
+        constraint_value: float = 12.0,
+        on_function: Optional[Callable[[FunctionResult], None]] = None,
+    ) -> CalculationResult:
+        """Расчёт по потоку функций без построения проекта.
+
+        records — пары (название компонента, функция) из любого итератора
+        (строки CSV, курсор БД); функции не накапливаются: память не зависит
+        от их числа. Результаты по функциям передаются в on_function (если
+        задан), в functions_results они не попадают. Итоги совпадают с
+        calculate для проекта из тех же функций в том же порядке.
+        """
+        from .project import Project
+
+        # Проект без компонентов — носитель коэффициентов и ограничений
+        project = Project(work_fund=work_fund, constraint_type=constraint_type,
+                          constraint_value=constraint_value, coefficients=coefficients)
+        self.result = CalculationResult(total_volume=0.0, A=self.A, C=self.C)
+        self.result.work_fund = work_fund
+        self.result.constraint_type = constraint_type
+        self.result.constraint_value = constraint_value
+
+        self._calculate_volume(records, on_function=on_function)
+        return self._calculate_labor(project)
+
+    def _calculate_labor(self, project: "Project") -> CalculationResult:
+        """Этапы расчёта после объёма ПС"""
         # 2. Расчёт базовой трудоёмкости
         self._calculate_base_labor(project)
 
@@ -143,45 +332,73 @@ class CalculationEngine:
 
         return self.result
 
-    def _calculate_volume(self, project: "Project") -> None:
-        """Расчёт объёма ПС (формулы 3.3-3.5)"""
-        total_volume = 0.0
-
-        for component in project.components:
-            for func in component.functions:
-                # Получаем коэффициенты
-                kp = TRANSLATION_COEFFICIENTS.get(func.language, 1.00)
-                k_slozhn = COMPLEXITY_COEFFICIENTS.get(func.complexity_level, 1.00)
-                k_sr_razr = DEV_ENVIRONMENT_COEFFICIENTS.get(func.language, 1.00)
-                k_opyt = DEVELOPER_EXPERIENCE.get(func.developer_experience, 1.00)
-
-                # Формула 3.3: Vm_i = Vi * ri * ki
-                volume_corrected = func.volume * func.reuse_count * func.reuse_coefficient
-
-                # Формула 3.4: Vk_i = Vm_i * K_slozhn * K_sr_razr * K_opyt
-                volume_adjusted = volume_corrected * k_slozhn * k_sr_razr * k_opyt
-
-                # Сохраняем результат для функции
-                func_result = FunctionResult(
-                    function_id=func.function_id,
-                    function_name=func.function_name,
-                    component_name=component.name,
-                    volume_base=func.volume,
-                    kp=kp,
-                    reuse_count=func.reuse_count,
-                    reuse_coefficient=func.reuse_coefficient,
-                    volume_corrected=round(volume_corrected, 2),
-                    k_slozhn=k_slozhn,
-                    k_sr_razr=k_sr_razr,
-                    k_opyt=k_opyt,
-                    volume_adjusted=round(volume_adjusted, 2),
-                )
-                self.result.functions_results.append(func_result)
+    @staticmethod
+    def calculate_function_volume(func: "FunctionInstance") -> tuple[float, float]:
+        """Объём одной функции без округления: (Vm_i, Vk_i) по формулам 3.3-3.4"""
+        k_slozhn = COMPLEXITY_COEFFICIENTS.get(func.complexity_level, 1.00)
+        k_sr_razr = DEV_ENVIRONMENT_COEFFICIENTS.get(func.language, 1.00)
+        k_opyt = DEVELOPER_EXPERIENCE.get(func.developer_experience, 1.00)
 
-                # Формула 3.5: V = Σ Vk_j
-                total_volume += volume_adjusted
+        volume_corrected = func.volume * func.reuse_count * func.reuse_coefficient
+        volume_adjusted = volume_corrected * k_slozhn * k_sr_razr * k_opyt
+        return volume_corrected, volume_adjusted
 
+    def _calculate_volume(
+        self,
+        records: Iterable[tuple[str, "FunctionInstance"]],
+        table: Optional[FunctionResultTable] = None,
+        on_function: Optional[Callable[[FunctionResult], None]] = None,
+    ) -> None:
+        """Расчёт объёма ПС (формулы 3.3-3.5) за один проход по функциям.
+
+        Результаты по функциям дописываются в столбцы table и/или
+        передаются объектами в on_function. Суммы Vk точные (ExactSum).
+        """
+        component_sums: dict[str, ExactSum] = {}
+
+        for component_name, func in records:
+            # Получаем коэффициенты
+            k_slozhn = COMPLEXITY_COEFFICIENTS.get(func.complexity_level, 1.00)
+            k_sr_razr = DEV_ENVIRONMENT_COEFFICIENTS.get(func.language, 1.00)
+            k_opyt = DEVELOPER_EXPERIENCE.get(func.developer_experience, 1.00)
+
+            # Формула 3.3: Vm_i = Vi * ri * ki
+            volume_corrected = func.volume * func.reuse_count * func.reuse_coefficient
+
+            # Формула 3.4: Vk_i = Vm_i * K_slozhn * K_sr_razr * K_opyt
+            volume_adjusted = volume_corrected * k_slozhn * k_sr_razr * k_opyt
+
+            # Сохраняем результат для функции
+            if table is not None or on_function is not None:
+                values = (
+                    func.function_id,
+                    func.function_name,
+                    component_name,
+                    func.volume,
+                    TRANSLATION_COEFFICIENTS.get(func.language, 1.00),
+                    func.reuse_count,
+                    func.reuse_coefficient,
+                    round(volume_corrected, 2),
+                    k_slozhn,
+                    k_sr_razr,
+                    k_opyt,
+                    round(volume_adjusted, 2),
+                )
+                if table is not None:
+                    table.add(*values)
+                if on_function is not None:
+                    on_function(FunctionResult(*values))
+
+            # Формула 3.5: V = Σ Vk_j (по компонентам)
+            component_sum = component_sums.get(component_name)
+            if component_sum is None:
+                component_sum = component_sums[component_name] = ExactSum()
+            component_sum.add(volume_adjusted)
+
+        # Частичные суммы компонентов в точности представляют и общий объём
+        total_volume = math.fsum(x for s in component_sums.values() for x in s.partials)
         self.result.total_volume = round(total_volume, 2)
+        self.result.component_volumes = {name: round(float(s), 2) for name, s in component_sums.items()}
 
     def _calculate_base_labor(self, project: "Project") -> None:
         """Расчёт базовой трудоёмкости (формулы 3.6-3.7)"""
@@ -242,14 +459,15 @@ class CalculationEngine:
         else:
             total_duration = None  # Будем рассчитывать
 
+        shares = self.SUBPROCESS_COEFFICIENTS
         subprocess_results = []
 
         # 1. Анализ (формула 3.8)
         k_kval_an = ANALYST_QUALIFICATION.get(coeffs.analyst_qualification, 1.00)
         k_opyt_an = ANALYST_EXPERIENCE.get(coeffs.analyst_experience, 1.00)
-        T1 = T_baz * 0.01 * k_kval_an * k_opyt_an
+        T1 = T_baz * shares["Анализ"] * k_kval_an * k_opyt_an
         subprocess_results.append(self._create_subprocess_result(
-            "Анализ", 0.01, T1, work_fund, total_duration, project.constraint_value,
+            "Анализ", shares["Анализ"], T1, work_fund, total_duration, project.constraint_value,
             {"K_kval_an": k_kval_an, "K_opyt_an": k_opyt_an}
         ))
 
@@ -257,18 +475,18 @@ class CalculationEngine:
         k_kval_pr = DESIGNER_QUALIFICATION.get(coeffs.designer_qualification, 1.00)
         k_opyt_pr = DESIGNER_EXPERIENCE.get(coeffs.designer_experience, 1.00)
         k_sr_pr = DESIGN_TOOLS.get(coeffs.design_tools, 1.00)
-        T2 = T_baz * 0.12 * k_kval_pr * k_opyt_pr * k_sr_pr
+        T2 = T_baz * shares["Проектирование"] * k_kval_pr * k_opyt_pr * k_sr_pr
         subprocess_results.append(self._create_subprocess_result(
-            "Проектирование", 0.12, T2, work_fund, total_duration, project.constraint_value,
+            "Проектирование", shares["Проектирование"], T2, work_fund, total_duration, project.constraint_value,
             {"K_kval_pr": k_kval_pr, "K_opyt_pr": k_opyt_pr, "K_sr_pr": k_sr_pr}
         ))
 
         # 3. Программирование (формула 3.10)
         k_kval_prog = PROGRAMMER_QUALIFICATION.get(coeffs.programmer_qualification, 1.00)
         k_sr = IDE_COEFFICIENTS.get(coeffs.ide, 1.00)
-        T3 = T_baz * 0.79 * k_kval_prog * k_sr
+        T3 = T_baz * shares["Программирование"] * k_kval_prog * k_sr
         subprocess_results.append(self._create_subprocess_result(
-            "Программирование", 0.79, T3, work_fund, total_duration, project.constraint_value,
+            "Программирование", shares["Программирование"], T3, work_fund, total_duration, project.constraint_value,
             {"K_kval_prog": k_kval_prog, "K_sr": k_sr}
         ))
 
@@ -276,17 +494,17 @@ class CalculationEngine:
         k_kval_test = TESTER_QUALIFICATION.get(coeffs.tester_qualification, 1.00)
         k_sr_ts = TESTING_TOOLS.get(coeffs.testing_tools, 1.00)
         k_bd = DB_SIZE.get(coeffs.db_size, 1.00)
-        T4 = T_baz * 0.07 * k_kval_test * k_sr_ts * k_bd
+        T4 = T_baz * shares["Тестирование"] * k_kval_test * k_sr_ts * k_bd
         subprocess_results.append(self._create_subprocess_result(
-            "Тестирование", 0.07, T4, work_fund, total_duration, project.constraint_value,
+            "Тестирование", shares["Тестирование"], T4, work_fund, total_duration, project.constraint_value,
             {"K_kval_test": k_kval_test, "K_sr_ts": k_sr_ts, "K_BD": k_bd}
         ))
 
         # 5. Ввод в действие (формула 3.12)
         k_kval_vn = DEPLOYMENT_QUALIFICATION.get(coeffs.deployment_qualification, 1.00)
-        T5 = T_baz * 0.01 * k_kval_vn
+        T5 = T_baz * shares["Ввод в действие"] * k_kval_vn
         subprocess_results.append(self._create_subprocess_result(
-            "Ввод в действие", 0.01, T5, work_fund, total_duration, project.constraint_value,
+            "Ввод в действие", shares["Ввод в действие"], T5, work_fund, total_duration, project.constraint_value,
             {"K_kval_vn": k_kval_vn}
         ))
 
@@ -308,7 +526,7 @@ class CalculationEngine:
         if total_duration:
             # Ограничение по продолжительности - рассчитываем численность
             # Распределяем срок пропорционально базовому коэффициенту
-            duration = total_duration * base_coef / (0.01 + 0.12 + 0.79 + 0.07 + 0.01)
+            duration = total_duration * base_coef / sum(self.SUBPROCESS_COEFFICIENTS.values())
             # Формула 4.3: N = T / (t * Ф)
             if duration > 0:
                 staff = labor / (duration * work_fund)
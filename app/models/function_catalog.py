@@ -406,10 +406,7 @@ FUNCTION_CATALOG: list[FunctionInfo] = [
 
 def get_function_by_id(function_id: str) -> Optional[FunctionInfo]:
     """Получить функцию по её идентификатору"""
-    for func in FUNCTION_CATALOG:
-        if func.id == function_id:
-            return func
-    return None
+    return get_catalog_index().get(function_id)
 
 
 def get_functions_by_operation_type(op_type: OperationType) -> list[FunctionInfo]:
@@ -435,3 +432,88 @@ def search_functions(query: str) -> list[FunctionInfo]:
     """Поиск функций по названию"""
     query = query.lower()
     return [f for f in FUNCTION_CATALOG if query in f.name.lower() or query in f.id]
+
+
+class CatalogIndex:
+    """Индекс каталога для быстрого поиска, фильтрации и группировки
+
+    Функции хранятся упорядоченными по (тип операции, категория), поэтому
+    любой отфильтрованный список уже сгруппирован: группы — это непрерывные
+    отрезки, и для построения дерева достаточно одного прохода.
+    """
+
+    def __init__(self, functions: list[FunctionInfo]):
+        self.functions = sorted(
+            functions,
+            key=lambda f: (f.operation_type.value, f.category or "Прочее"),
+        )
+        self._by_id = {f.id: f for f in functions}
+        self._names = {f.id: f.name.lower() for f in functions}
+
+        # Последний результат фильтрации — для сужения при наборе запроса
+        self._last_key: Optional[tuple[str, Optional[OperationType]]] = None
+        self._last_result: list[FunctionInfo] = self.functions
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+    def get(self, function_id: str) -> Optional[FunctionInfo]:
+        """Функция по идентификатору"""
+        return self._by_id.get(function_id)
+
+    def filter(self, query: str = "", op_type: Optional[OperationType] = None) -> list[FunctionInfo]:
+        """Функции, подходящие под запрос (по названию или номеру) и тип операции"""
+        query = query.strip().lower()
+        key = (query, op_type)
+        if key == self._last_key:
+            return self._last_result
+
+        # Запрос дополнен справа при том же типе — ищем среди прошлых результатов
+        if (
+            self._last_key is not None
+            and self._last_key[1] == op_type
+            and query.startswith(self._last_key[0])
+        ):
+            candidates = self._last_result
+        else:
+            candidates = self.functions
+
+        if not query and op_type is None:
+            result = self.functions
+        else:
+            names = self._names
+            result = [
+                f for f in candidates
+                if (op_type is None or f.operation_type == op_type)
+                and (not query or query in names[f.id] or query in f.id)
+            ]
+
+        self._last_key = key
+        self._last_result = result
+        return result
+
+    @staticmethod
+    def group(functions: list[FunctionInfo]) -> list[tuple[str, list[tuple[str, list[FunctionInfo]]]]]:
+        """Разбить отфильтрованный список на группы: тип операции -> категория -> функции"""
+        groups: list[tuple[str, list[tuple[str, list[FunctionInfo]]]]] = []
+        for func in functions:
+            op_name = func.operation_type.value
+            category = func.category or "Прочее"
+            if not groups or groups[-1][0] != op_name:
+                groups.append((op_name, []))
+            categories = groups[-1][1]
+            if not categories or categories[-1][0] != category:
+                categories.append((category, []))
+            categories[-1][1].append(func)
+        return groups
+
+
+_catalog_index: Optional[CatalogIndex] = None
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Общий индекс встроенного каталога функций (строится при первом обращении)"""
+    global _catalog_index
+    if _catalog_index is None:
+        _catalog_index = CatalogIndex(FUNCTION_CATALOG)
+    return _catalog_index
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Профили движка расчёта: статистические коэффициенты A, C и доли подпроцессов
+
+Профиль именован и версионирован; хранится в каталоге профилей как
+JSON-файл «<имя>-v<версия>.json». Профиль по умолчанию — значения методики.
+Командные утилиты выбирают профиль параметром --engine-profile имя[:версия]
+(каталог — --profiles).
+"""
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+DEFAULT_PROFILE_NAME = "methodology"
+DEFAULT_PROFILES_DIR = "profiles"
+_PROFILE_FILE = re.compile(r"^(?P<name>.+)-v(?P<version>\d+)\.json$")
+
+
+@dataclass
+class EngineProfile:
+    """Коэффициенты движка расчёта"""
+    name: str = DEFAULT_PROFILE_NAME
+    version: int = 1
+    A: float = 0.19
+    C: float = 0.74
+    subprocess_coefficients: dict[str, float] = field(default_factory=lambda: {
+        "Анализ": 0.01,
+        "Проектирование": 0.12,
+        "Программирование": 0.79,
+        "Тестирование": 0.07,
+        "Ввод в действие": 0.01,
+    })
+    description: str = ""
+    created_at: str = ""
+    fit: dict = field(default_factory=dict)  # Сведения о подборе (интервалы, качество)
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} v{self.version}"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EngineProfile":
+        default = cls()
+        name = data.get("name", default.name)
+        shares = data.get("subprocess_coefficients", default.subprocess_coefficients)
+        missing = [sp for sp in default.subprocess_coefficients if sp not in shares]
+        unknown = [sp for sp in shares if sp not in default.subprocess_coefficients]
+        if missing or unknown:
+            raise ValueError(f"Профиль {name}: доли подпроцессов — нет {missing}, неизвестные {unknown}")
+        return cls(
+            name=name,
+            version=int(data.get("version", default.version)),
+            A=float(data.get("A", default.A)),
+            C=float(data.get("C", default.C)),
+            subprocess_coefficients={sp: float(shares[sp]) for sp in default.subprocess_coefficients},
+            description=data.get("description", ""),
+            created_at=data.get("created_at", ""),
+            fit=data.get("fit", {}),
+        )
+
+
+def profile_versions(directory: str, name: str) -> list[int]:
+    """Версии профиля в каталоге по возрастанию"""
+    versions = []
+    if os.path.isdir(directory):
+        for file_name in os.listdir(directory):
+            match = _PROFILE_FILE.match(file_name)
+            if match and match["name"] == name:
+                versions.append(int(match["version"]))
+    return sorted(versions)
+
+
+def save_profile(profile: EngineProfile, directory: str) -> str:
+    """Сохранить профиль следующей версией; возвращает путь к файлу"""
+    os.makedirs(directory, exist_ok=True)
+    versions = profile_versions(directory, profile.name)
+    profile.version = (versions[-1] + 1) if versions else 1
+    if not profile.created_at:
+        profile.created_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    path = os.path.join(directory, f"{profile.name}-v{profile.version}.json")
+    # Версии не перезаписываются: файл создаётся эксклюзивно
+    with open(path, "x", encoding="utf-8") as f:
+        json.dump(profile.to_dict(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_profile(directory: str, name: str, version: Optional[int] = None) -> EngineProfile:
+    """Загрузить профиль (по умолчанию — последнюю версию)"""
+    if version is None:
+        versions = profile_versions(directory, name)
+        if not versions:
+            raise FileNotFoundError(f"Профиль {name} не найден в {directory}")
+        version = versions[-1]
+    path = os.path.join(directory, f"{name}-v{version}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return EngineProfile.from_dict(json.load(f))
+
+
+def parse_profile_spec(spec: str) -> tuple[str, Optional[int]]:
+    """Имя и версия профиля из строки «имя» или «имя:версия»"""
+    name, separator, version = spec.rpartition(":")
+    if not separator:
+        name, version = spec, ""
+    if not name:
+        raise ValueError(f"Не указано имя профиля: {spec}")
+    if version and not version.isdigit():
+        raise ValueError(f"Версия профиля должна быть целым числом: {spec}")
+    return name, int(version) if version else None
+
+
+def resolve_profile(spec: Optional[str], directory: str = DEFAULT_PROFILES_DIR) -> Optional[EngineProfile]:
+    """Профиль по строке «имя[:версия]»; None — коэффициенты методики"""
+    if not spec:
+        return None
+    name, version = parse_profile_spec(spec)
+    return load_profile(directory, name, version)
+
+
+def add_profile_arguments(parser) -> None:
+    """Параметры выбора профиля движка для argparse"""
+    parser.add_argument("--engine-profile", metavar="ИМЯ[:ВЕРСИЯ]",
+                        help="Профиль движка (по умолчанию — коэффициенты методики; без версии — последняя)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_DIR, help="Каталог профилей движка")
+
+
+def profile_from_args(parser, args) -> Optional[EngineProfile]:
+    """Профиль, выбранный параметрами add_profile_arguments (ошибка — через parser.error)"""
+    try:
+        return resolve_profile(args.engine_profile, args.profiles)
+    except (OSError, ValueError) as e:
+        parser.error(f"профиль движка: {e}")
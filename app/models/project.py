@@ -5,9 +5,10 @@
 """
 
 import json
+import os
 import uuid
 from dataclasses import dataclass, field, asdict
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from pathlib import Path
 
 from .function_catalog import get_function_by_id
@@ -244,6 +245,13 @@ class Project:
             project.coefficients = ProjectCoefficients.from_dict(data["coefficients"])
         return project
 
+    def snapshot(self) -> "Project":
+        """Независимая копия проекта (для расчёта и экспорта в фоновом потоке)"""
+        project = Project.from_dict(self.to_dict())
+        project.file_path = self.file_path
+        project.modified = self.modified
+        return project
+
     def save(self, file_path: Optional[str] = None) -> str:
         """Сохранить проект в JSON файл"""
         if file_path:
@@ -415,3 +423,15 @@ class Project:
 
         project.modified = False
         return project
+
+
+def project_files(paths: Iterable[str]) -> Iterator[str]:
+    """Файлы проектов: пути как есть, каталоги — рекурсивно, *.json по имени"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(".json"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
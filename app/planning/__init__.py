@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Планирование по результатам расчёта: численность, сроки, стоимость
+
+Модули используют numpy и загружаются только при обращении к ним,
+поэтому не влияют на время запуска приложения.
+"""
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Выравнивание ресурсов: несколько проектов на одном штате
+
+Проекты портфеля выполняются общим штатом: у каждого подпроцесса своя
+роль (аналитики, проектировщики, программисты, тестировщики, внедренцы)
+с ограниченной численностью. Подпроцессы проекта — задачи, идущие
+последовательно; задаче нужна численность из расчёта (округлённая вверх,
+не больше штата роли), её длительность — трудоёмкость с учётом K_sr_srok,
+делённая на численность.
+
+Расписание строится списочным планированием (параллельная схема): время
+идёт по событиям (завершение задачи, начало окна проекта); в каждый
+момент готовые задачи роли берутся из очереди с приоритетом (heapq) по
+убыванию приоритета проекта, затем по сроку сдачи и началу окна, и
+запускаются, пока хватает свободных людей. Задача, которой сейчас не
+хватает людей, ждёт, но не задерживает менее приоритетные задачи, которые
+помещаются. Очереди роли разбиты по требуемой численности, поэтому выбор
+задачи — просмотр голов нескольких куч, а не перебор всех ожидающих.
+Время — рабочие дни от начала планирования.
+
+Запуск:
+    python -m app.planning.leveling проекты/ --capacity аналитик=2 проектировщик=3 \\
+        программист=10 тестировщик=3 внедренец=1 --plan окна.json
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from ..models.project import Project, project_files
+from ..models.calculation import CalculationEngine, CalculationResult
+from ..models.profiles import add_profile_arguments, profile_from_args
+
+# Роль штата для каждого подпроцесса
+ROLES = {
+    "Анализ": "аналитик",
+    "Проектирование": "проектировщик",
+    "Программирование": "программист",
+    "Тестирование": "тестировщик",
+    "Ввод в действие": "внедренец",
+}
+EPS = 1e-9
+
+
+@dataclass
+class ProjectRequest:
+    """Проект для планирования"""
+    name: str
+    result: CalculationResult
+    priority: float = 0.0  # Больше — раньше
+    release: float = 0.0  # Самое раннее начало, мес.
+    due: Optional[float] = None  # Срок сдачи, мес.
+
+
+@dataclass
+class Assignment:
+    """Задача (подпроцесс проекта) в расписании"""
+    project: str
+    phase: str
+    role: str
+    staff: int  # Занятых людей роли
+    labor: float  # Чел.-дн.
+    start: float  # Рабочие дни
+    finish: float
+
+
+@dataclass
+class ProjectSchedule:
+    """Сроки проекта в расписании"""
+    name: str
+    priority: float
+    release: float  # Дни
+    start: float
+    finish: float
+    due: Optional[float] = None
+    lateness: float = 0.0  # Опоздание к сроку сдачи, дни
+
+
+@dataclass
+class LevelingResult:
+    """Выровненное расписание портфеля"""
+    capacity: dict[str, int]
+    work_fund: float
+    assignments: list[Assignment] = field(default_factory=list)
+    projects: list[ProjectSchedule] = field(default_factory=list)
+    makespan: float = 0.0  # Дни
+    seconds: float = 0.0
+
+    def utilization(self) -> dict[str, float]:
+        """Загрузка штата каждой роли за всё расписание"""
+        busy = dict.fromkeys(self.capacity, 0.0)
+        for a in self.assignments:
+            busy[a.role] += a.staff * (a.finish - a.start)
+        return {role: busy[role] / (self.capacity[role] * self.makespan) if self.makespan else 0.0
+                for role in self.capacity}
+
+    def format(self) -> str:
+        """Текстовый отчёт"""
+        months = self.work_fund
+        late = [p for p in self.projects if p.lateness > EPS]
+        lines = [
+            f"Проектов: {len(self.projects)}, задач: {len(self.assignments)}, "
+            f"расписание: {self.makespan / months:.2f} мес. ({self.seconds * 1000:.0f} мс)",
+            f"Опаздывают к сроку сдачи: {len(late)}",
+            "Загрузка штата:",
+        ]
+        for role, value in self.utilization().items():
+            lines.append(f"  {role:<14} {self.capacity[role]:>4} чел.  {value:.0%}")
+        lines.append(f"{'Проект':<40} {'Приор.':>6} {'Начало':>7} {'Конец':>7} {'Срок':>7} {'Опозд.':>7}")
+        for p in sorted(self.projects, key=lambda p: p.start):
+            due = f"{p.due / months:7.2f}" if p.due is not None else f"{'—':>7}"
+            lines.append(f"{p.name[:40]:<40} {p.priority:6g} {p.start / months:7.2f} "
+                         f"{p.finish / months:7.2f} {due} {p.lateness / months:7.2f}")
+        return "\n".join(lines)
+
+
+def level_resources(requests: Sequence[ProjectRequest], capacity: dict[str, int],
+                    work_fund: float = 21.0) -> LevelingResult:
+    """Выровненное расписание проектов на общем штате.
+
+    capacity — численность по ролям ROLES; work_fund — рабочих дней в
+    месяце (окна и сроки сдачи заданы в месяцах).
+    """
+    started = time.perf_counter()
+    result = LevelingResult(capacity=dict(capacity), work_fund=work_fund)
+
+    # Цепочки задач проектов: (фаза, роль, численность, длительность, трудоёмкость)
+    tasks: list[list[tuple[str, str, int, float, float]]] = []
+    for request in requests:
+        chain = []
+        for sp in request.result.subprocess_results:
+            role = ROLES[sp.name]
+            labor = sp.labor * request.result.k_sr_srok
+            if labor <= 0:
+                continue
+            limit = capacity.get(role, 0)
+            if limit < 1:
+                raise ValueError(f"Нет штата роли «{role}» для проекта {request.name}")
+            staff = min(max(1, math.ceil(sp.staff - EPS)), limit)
+            chain.append((sp.name, role, staff, labor / staff, labor))
+        tasks.append(chain)
+        release = request.release * work_fund
+        result.projects.append(ProjectSchedule(
+            name=request.name, priority=request.priority, release=release, start=release, finish=release,
+            due=request.due * work_fund if request.due is not None else None,
+        ))
+
+    def order(index: int) -> tuple:
+        request = requests[index]
+        due = request.due if request.due is not None else math.inf
+        return (-request.priority, due, request.release, index)
+
+    keys = [order(i) for i in range(len(requests))]
+    free = dict(capacity)
+    # Очереди готовых задач роли, отдельно по требуемой численности:
+    # задачи, которым сейчас не хватает людей, не перебираются заново
+    ready: dict[str, dict[int, list]] = {role: {} for role in capacity}
+    # События: (время, проект, номер следующей задачи, освобождаемая роль, людей)
+    events = [(result.projects[i].release, i, 0, None, 0) for i in range(len(requests))]
+    heapq.heapify(events)
+
+    while events:
+        now = events[0][0]
+        touched = set()
+        while events and events[0][0] <= now + EPS:
+            _, i, step, role, staff = heapq.heappop(events)
+            if role is not None:
+                free[role] += staff
+                touched.add(role)
+            if step < len(tasks[i]):
+                _, next_role, staff, _, _ = tasks[i][step]
+                heapq.heappush(ready[next_role].setdefault(staff, []), (keys[i], i, step))
+                touched.add(next_role)
+            else:
+                result.projects[i].finish = now
+
+        for role in touched:
+            buckets = ready[role]
+            while free[role] > 0:
+                # Лучшая по приоритету задача среди помещающихся по численности
+                best = None
+                for staff, queue in buckets.items():
+                    if queue and staff <= free[role] and (best is None or queue[0] < buckets[best][0]):
+                        best = staff
+                if best is None:
+                    break
+                _, i, step = heapq.heappop(buckets[best])
+                phase, _, staff, duration, labor = tasks[i][step]
+                free[role] -= staff
+                finish = now + duration
+                if step == 0:
+                    result.projects[i].start = now
+                result.assignments.append(Assignment(
+                    project=requests[i].name, phase=phase, role=role, staff=staff,
+                    labor=labor, start=now, finish=finish,
+                ))
+                heapq.heappush(events, (finish, i, step + 1, role, staff))
+
+    for project in result.projects:
+        if project.due is not None:
+            project.lateness = max(0.0, project.finish - project.due)
+    result.makespan = max((p.finish for p in result.projects), default=0.0)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Выравнивание ресурсов портфеля на общем штате")
+    parser.add_argument("inputs", nargs="+", help="Файлы или каталоги проектов (.json)")
+    parser.add_argument("--capacity", nargs="+", required=True, metavar="РОЛЬ=ЧИСЛО",
+                        help=f"Штат по ролям: {', '.join(ROLES.values())}")
+    parser.add_argument("--plan", help="JSON: {имя файла проекта: {priority, release, due}}, сроки в мес.")
+    parser.add_argument("--work-fund", type=float, default=21.0, help="Рабочих дней в месяце")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    capacity = {}
+    for item in args.capacity:
+        role, _, value = item.partition("=")
+        if role not in ROLES.values() or not value:
+            parser.error(f"неверный штат: {item}")
+        capacity[role] = int(value)
+    plan = {}
+    if args.plan:
+        with open(args.plan, encoding="utf-8") as f:
+            plan = json.load(f)
+
+    engine = CalculationEngine(profile_from_args(parser, args))
+    requests = []
+    for path in project_files(args.inputs):
+        project = Project.load(path)
+        window = plan.get(os.path.basename(path), plan.get(project.name, {}))
+        requests.append(ProjectRequest(
+            name=project.name or os.path.basename(path),
+            result=engine.calculate(project),
+            priority=float(window.get("priority", 0.0)),
+            release=float(window.get("release", 0.0)),
+            due=window.get("due"),
+        ))
+    print(level_resources(requests, capacity, args.work_fund).format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
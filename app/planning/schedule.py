@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Календарный график: численность по месяцам и диаграмма Ганта
+
+Движок даёт по подпроцессу только итоговые трудоёмкость, численность и
+срок. Здесь подпроцессы раскладываются по календарю как фазы проекта:
+
+- длительности фаз пропорциональны срокам подпроцессов из расчёта и
+  вписываются в общий срок проекта;
+- фазы идут последовательно, либо с перекрытием: фаза начинается, когда
+  предыдущая выполнена на долю (1 - overlap);
+- трудоёмкость фазы (с учётом K_sr_srok) распределяется внутри фазы
+  равномерно или по кривой Рэлея (модель Нордена–Патнэма) с пиком на
+  доле peak длительности фазы; хвост кривой за концом фазы отсекается,
+  и распределение нормируется.
+
+Все проекты портфеля считаются одновременно: массивы «проект × фаза ×
+месяц», доля трудоёмкости фазы в месяце — разность функции распределения
+на границах месяцев. Численность в месяце — трудоёмкость месяца, делённая
+на фонд рабочего времени (средняя численность за календарный месяц).
+
+Запуск:
+    python -m app.planning.schedule проект.json --overlap 0.2
+    python -m app.planning.schedule проекты/ --profile uniform --csv график.csv
+"""
+
+import argparse
+import csv
+import math
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from ..models.project import Project, project_files
+from ..models.calculation import CalculationEngine, CalculationResult
+from ..models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+
+PROFILES = ("rayleigh", "uniform")
+RAYLEIGH_PEAK = 0.4  # Положение пика кривой Рэлея в доле длительности фазы
+
+
+@dataclass
+class GanttBar:
+    """Фаза на диаграмме Ганта"""
+    phase: str
+    start: float  # Начало, мес. от начала проекта
+    end: float  # Окончание, мес.
+    labor: float  # Трудоёмкость фазы, чел.-дн.
+    peak_staff: float  # Наибольшая численность фазы в месяце, чел.
+
+
+def _cumulative(u: np.ndarray, profile: str, peak: float) -> np.ndarray:
+    """Функция распределения трудоёмкости по доле длительности фазы u ∈ [0, 1]"""
+    if profile == "uniform":
+        return u
+    if profile == "rayleigh":
+        scale = 2.0 * peak * peak
+        return -np.expm1(-u * u / scale) / -math.expm1(-1.0 / scale)
+    raise ValueError(f"Неизвестный профиль: {profile}")
+
+
+def phase_windows(weights: np.ndarray, duration: np.ndarray,
+                  overlap: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    """Начала и окончания фаз (проекты × фазы), мес.
+
+    weights — относительные длительности фаз, duration — срок проекта.
+    Фазы с перекрытием сжимаются так, чтобы проект уложился в свой срок.
+    """
+    if not 0.0 <= overlap < 1.0:
+        raise ValueError("Перекрытие фаз должно быть в пределах [0, 1)")
+    weights = np.asarray(weights, dtype=float)
+    total = weights.sum(axis=1, keepdims=True)
+    # Проекты без сроков подпроцессов — фазы равной длительности
+    widths = np.divide(weights, total, out=np.full_like(weights, 1.0 / weights.shape[1]), where=total > 0)
+    starts = np.zeros_like(widths)
+    np.cumsum((1.0 - overlap) * widths[:, :-1], axis=1, out=starts[:, 1:])
+    ends = starts + widths
+    scale = np.asarray(duration, dtype=float) / ends.max(axis=1)
+    return starts * scale[:, None], ends * scale[:, None]
+
+
+class Schedule:
+    """График портфеля: трудоёмкость по проектам, фазам и месяцам"""
+
+    def __init__(self, names: list[str], phases: list[str], start: np.ndarray, end: np.ndarray,
+                 labor: np.ndarray, work_fund: np.ndarray):
+        self.names = names  # Проекты
+        self.phases = phases
+        self.start = start  # Проекты × фазы, мес.
+        self.end = end
+        self.labor = labor  # Проекты × фазы × месяцы, чел.-дн.
+        self.work_fund = work_fund  # Дней в месяце по проектам
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def months(self) -> int:
+        return self.labor.shape[2]
+
+    @property
+    def staff(self) -> np.ndarray:
+        """Численность по проектам, фазам и месяцам, чел."""
+        return self.labor / self.work_fund[:, None, None]
+
+    @property
+    def project_staff(self) -> np.ndarray:
+        """Численность проектов по месяцам (проекты × месяцы)"""
+        return self.staff.sum(axis=1)
+
+    @property
+    def portfolio_staff(self) -> np.ndarray:
+        """Суммарная численность портфеля по месяцам (все проекты стартуют одновременно)"""
+        return self.project_staff.sum(axis=0)
+
+    @property
+    def peak_staff(self) -> np.ndarray:
+        """Пиковая численность каждого проекта"""
+        return self.project_staff.max(axis=1, initial=0.0)
+
+    def gantt(self, index: int) -> list[GanttBar]:
+        """Фазы проекта для диаграммы Ганта"""
+        staff = self.staff[index]
+        return [
+            GanttBar(
+                phase=phase,
+                start=float(self.start[index, k]),
+                end=float(self.end[index, k]),
+                labor=float(self.labor[index, k].sum()),
+                peak_staff=float(staff[k].max(initial=0.0)),
+            )
+            for k, phase in enumerate(self.phases)
+        ]
+
+    def format(self, index: int) -> str:
+        """Текстовый график проекта"""
+        project_staff = self.project_staff[index]
+        last = int(np.flatnonzero(project_staff > 0)[-1]) + 1 if project_staff.any() else 0
+        lines = [
+            f"Проект: {self.names[index]}",
+            f"Срок: {self.end[index].max(initial=0.0):.2f} мес., "
+            f"трудоёмкость: {self.labor[index].sum():.2f} чел.-дн., "
+            f"пиковая численность: {self.peak_staff[index]:.2f} чел.",
+            "",
+            f"{'Фаза':<18} {'Начало':>7} {'Конец':>7} {'Чел.-дн.':>10} {'Пик, чел.':>10}  Месяцы",
+        ]
+        for k, bar in enumerate(self.gantt(index)):
+            months = "".join("█" if x > 0 else "·" for x in self.labor[index, k, :last])
+            lines.append(f"{bar.phase:<18} {bar.start:7.2f} {bar.end:7.2f} "
+                         f"{bar.labor:10.2f} {bar.peak_staff:10.2f}  {months}")
+        lines += ["", "Численность по месяцам:"]
+        scale = 40.0 / max(self.peak_staff[index], 1e-9)
+        for month in range(last):
+            value = project_staff[month]
+            lines.append(f"  {month + 1:>3}  {value:7.2f}  {'█' * int(round(value * scale))}")
+        return "\n".join(lines)
+
+    def write_csv(self, file_path: str) -> None:
+        """Выгрузить график: проект;фаза;месяц;трудоёмкость;численность (ненулевые месяцы)"""
+        staff = self.staff
+        project, phase, month = np.nonzero(self.labor)
+        with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["project", "phase", "month", "labor", "staff"])
+            for i, k, m in zip(project.tolist(), phase.tolist(), month.tolist()):
+                writer.writerow([self.names[i], self.phases[k], m + 1,
+                                 round(float(self.labor[i, k, m]), 2), round(float(staff[i, k, m]), 2)])
+
+
+def build_schedule(results: Sequence[CalculationResult], names: Optional[Sequence[str]] = None,
+                   overlap: float = 0.0, profile: str = "rayleigh",
+                   peak: float = RAYLEIGH_PEAK) -> Schedule:
+    """График по результатам расчёта.
+
+    overlap — перекрытие соседних фаз (0 — последовательно), profile —
+    распределение внутри фазы («rayleigh» или «uniform»), peak — положение
+    пика кривой Рэлея в доле длительности фазы.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль: {profile}")
+    if not 0.0 < peak <= 1.0:
+        raise ValueError("Положение пика должно быть в пределах (0, 1]")
+    phases = ([sp.name for sp in results[0].subprocess_results] if results
+              else list(CalculationEngine.SUBPROCESS_COEFFICIENTS))
+    names = list(names) if names is not None else [str(i + 1) for i in range(len(results))]
+
+    # Трудоёмкость фаз с учётом сокращения сроков: в сумме T_srok
+    labor = np.array([[sp.labor * r.k_sr_srok for sp in r.subprocess_results] for r in results],
+                     dtype=float).reshape(len(results), len(phases))
+    weights = np.array([[sp.duration for sp in r.subprocess_results] for r in results],
+                       dtype=float).reshape(labor.shape)
+    duration = np.array([r.total_duration for r in results], dtype=float)
+    work_fund = np.array([r.work_fund for r in results], dtype=float)
+
+    start, end = phase_windows(weights, duration, overlap) if len(results) else (weights, weights)
+    months = max(int(math.ceil(duration.max(initial=0.0))), 1)
+    bounds = np.arange(months + 1, dtype=float)
+
+    # Доля длительности фазы на границах месяцев. Фаза нулевой длительности —
+    # скачок в месяце, содержащем её начало (начало на конце срока — в последнем месяце)
+    width = (end - start)[..., None]
+    offset = bounds - start[..., None]
+    jump = (bounds > np.minimum(start, months - 1)[..., None]).astype(float)
+    u = np.divide(offset, width, out=jump, where=width > 0)
+    np.clip(u, 0.0, 1.0, out=u)
+    share = np.diff(_cumulative(u, profile, peak), axis=2)
+    return Schedule(names, phases, start, end, labor[..., None] * share, work_fund)
+
+
+def schedule_projects(projects: Iterable[Project], overlap: float = 0.0, profile: str = "rayleigh",
+                      peak: float = RAYLEIGH_PEAK, engine_profile: Optional[EngineProfile] = None) -> Schedule:
+    """Рассчитать проекты (с профилем движка engine_profile) и построить их график"""
+    engine = CalculationEngine(engine_profile)
+    names, results = [], []
+    for project in projects:
+        names.append(project.name)
+        results.append(engine.calculate(project))
+    return build_schedule(results, names, overlap, profile, peak)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Календарный график и численность по месяцам")
+    parser.add_argument("inputs", nargs="+", help="Файлы или каталоги проектов (.json)")
+    parser.add_argument("--overlap", type=float, default=0.0, help="Перекрытие соседних фаз, доля [0, 1)")
+    parser.add_argument("--profile", choices=PROFILES, default="rayleigh", help="Распределение внутри фазы")
+    parser.add_argument("--peak", type=float, default=RAYLEIGH_PEAK, help="Пик кривой Рэлея, доля фазы")
+    parser.add_argument("--csv", help="Выгрузить график в CSV")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    schedule = schedule_projects((Project.load(path) for path in project_files(args.inputs)),
+                                 args.overlap, args.profile, args.peak, profile_from_args(parser, args))
+    if len(schedule) == 1:
+        print(schedule.format(0))
+    else:
+        total = schedule.portfolio_staff
+        print(f"Проектов: {len(schedule):,}, горизонт: {schedule.months} мес.")
+        print(f"Пиковая численность портфеля: {total.max(initial=0.0):.2f} чел. "
+              f"(месяц {int(total.argmax()) + 1})")
+    if args.csv:
+        schedule.write_csv(args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Подбор состава функций под бюджет трудоёмкости
+
+Итоговая трудоёмкость зависит от объёма как T_srok = M * V^C, где
+V = Σ Vk_i по включённым функциям, а M — произведение A, коэффициентов
+уровня расчёта, долей подпроцессов с их коэффициентами и K_sr_srok.
+Так как V^C монотонна, бюджет T_srok ≤ T превращается в предел объёма
+V ≤ (T / M)^(1/C), и задача сводится к рюкзаку 0/1: набрать функции
+наибольшей суммарной ценности (приоритета) с суммарным Vk в пределе.
+
+Рюкзак решается методом ветвей и границ (Horowitz–Sahni): функции
+упорядочены по ценности на единицу объёма, верхняя граница — дробный
+рюкзак по префиксным суммам (бинарный поиск). Поиск ограничен по числу
+узлов и времени; если предел достигнут, возвращается лучшее найденное
+решение и разрыв до верхней границы.
+
+Запуск:
+    python -m app.planning.scope проект.json --budget 300 --priorities приоритеты.json
+    python -m app.planning.scope проект.json --deadline 6 --staff 3 --output урезанный.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Iterable, Optional
+
+from ..models.project import Project, FunctionInstance
+from ..models.calculation import CalculationEngine, CalculationResult
+from ..models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+
+NODE_LIMIT = 2_000_000  # Предел узлов поиска
+TIME_LIMIT = 1.0  # Предел времени поиска, с
+EPS = 1e-9
+
+
+def labor_multiplier(result: CalculationResult) -> float:
+    """Множитель M в T_srok = M * V^C для проекта с этими коэффициентами"""
+    level = (result.A * result.k_n * result.k_nad * result.k_proizv
+             * result.k_dokum * result.k_teh * result.k_or)
+    shares = sum(sp.base_coefficient * math.prod(sp.coefficients.values())
+                 for sp in result.subprocess_results)
+    return level * shares * result.k_sr_srok
+
+
+def volume_limit(result: CalculationResult, target_labor: float) -> float:
+    """Наибольший объём V, при котором T_srok не превышает target_labor"""
+    multiplier = labor_multiplier(result)
+    if target_labor <= 0 or multiplier <= 0:
+        return 0.0
+    return (target_labor / multiplier) ** (1.0 / result.C)
+
+
+@dataclass
+class KnapsackResult:
+    """Решение рюкзака 0/1"""
+    chosen: list[int]  # Номера выбранных предметов
+    value: float
+    upper_bound: float  # Верхняя граница ценности (дробный рюкзак)
+    optimal: bool  # Поиск завершён полностью
+    nodes: int
+
+
+def solve_knapsack(weights: list[float], values: list[float], capacity: float,
+                   node_limit: int = NODE_LIMIT, time_limit: float = TIME_LIMIT) -> KnapsackResult:
+    """Рюкзак 0/1 методом ветвей и границ (веса и ценности неотрицательны)"""
+    n = len(weights)
+    # Предметы без веса с положительной ценностью берутся всегда
+    free = [i for i in range(n) if weights[i] <= 0 and values[i] > 0]
+    items = sorted((i for i in range(n) if weights[i] > 0 and values[i] > 0),
+                   key=lambda i: values[i] / weights[i], reverse=True)
+    w = [weights[i] for i in items]
+    v = [values[i] for i in items]
+    prefix_w = [0.0, *accumulate(w)]
+    prefix_v = [0.0, *accumulate(v)]
+    m = len(items)
+    # Целые ценности (приоритеты): граница округляется вниз, что резко сокращает перебор
+    integral = all(float(x).is_integer() for x in v)
+
+    def upper_bound(k: int, cap: float, value: float) -> float:
+        # Жадно берём предметы k.. целиком, следующий — дробно
+        limit = prefix_w[k] + cap
+        j = bisect_right(prefix_w, limit + EPS, lo=k) - 1
+        bound = value + prefix_v[j] - prefix_v[k]
+        if j < m:
+            bound += (limit - prefix_w[j]) * v[j] / w[j]
+        return math.floor(bound + EPS) if integral else bound
+
+    root_bound = upper_bound(0, capacity, 0.0)
+    best_value = -1.0
+    best: list[int] = []
+    included: list[int] = []  # Стек включённых предметов текущей ветви
+    cap, value, k = capacity, 0.0, 0
+    nodes = 0
+    deadline = time.perf_counter() + time_limit
+    complete = True
+
+    while True:
+        nodes += 1
+        if nodes >= node_limit or (nodes & 0x3FF == 0 and time.perf_counter() > deadline):
+            complete = False
+            break
+        if upper_bound(k, cap, value) > best_value + EPS:
+            # Вперёд: берём подряд все помещающиеся предметы
+            while k < m and w[k] <= cap + EPS:
+                cap -= w[k]
+                value += v[k]
+                included.append(k)
+                k += 1
+            if k < m:
+                k += 1  # Предмет k не помещается — ветвь без него
+                continue
+            if value > best_value:
+                best_value = value
+                best = included.copy()
+        # Назад: исключаем последний включённый предмет
+        if not included:
+            break
+        i = included.pop()
+        cap += w[i]
+        value -= v[i]
+        k = i + 1
+
+    chosen = sorted(free + [items[i] for i in best])
+    total = sum(values[i] for i in free)
+    return KnapsackResult(
+        chosen=chosen,
+        value=total + max(best_value, 0.0),
+        upper_bound=total + (max(best_value, 0.0) if complete else root_bound),
+        optimal=complete,
+        nodes=nodes,
+    )
+
+
+@dataclass
+class ScopeSolution:
+    """Состав функций под бюджет"""
+    target_labor: float  # Бюджет T_srok, чел.-дн.
+    volume_limit: float  # Предел объёма V
+    kept: list[FunctionInstance] = field(default_factory=list)
+    dropped: list[FunctionInstance] = field(default_factory=list)
+    value: float = 0.0  # Ценность оставленных функций
+    total_value: float = 0.0  # Ценность всех функций
+    upper_bound: float = 0.0
+    optimal: bool = True
+    feasible: bool = True  # Обязательные функции укладываются в бюджет
+    final_labor: float = 0.0  # T_srok урезанного проекта (по движку)
+    seconds: float = 0.0
+
+    def apply(self, project: Project) -> Project:
+        """Копия проекта без исключённых функций"""
+        dropped = {f.id for f in self.dropped}
+        trimmed = project.snapshot()
+        for component in trimmed.components:
+            component.functions = [f for f in component.functions if f.id not in dropped]
+        trimmed.modified = True
+        return trimmed
+
+    def format(self) -> str:
+        """Текстовый отчёт"""
+        lines = [f"Бюджет T_srok: {self.target_labor:.2f} чел.-дн., предел объёма V: {self.volume_limit:.2f}"]
+        if not self.feasible:
+            lines.append("Обязательные функции не укладываются в бюджет")
+            return "\n".join(lines)
+        status = "оптимум" if self.optimal else f"лучшее найденное, граница {self.upper_bound:.2f}"
+        lines += [
+            f"Оставлено функций: {len(self.kept)}, исключено: {len(self.dropped)}",
+            f"Ценность: {self.value:.2f} из {self.total_value:.2f} ({status}, {self.seconds * 1000:.0f} мс)",
+            f"T_srok после исключения: {self.final_labor:.2f} чел.-дн.",
+        ]
+        if self.dropped:
+            lines.append("Исключить или отложить:")
+            lines += [f"  {f.function_id:<8} {f.function_name}  ({f.volume} строк)" for f in self.dropped]
+        return "\n".join(lines)
+
+
+def _priority(func: FunctionInstance, priorities: dict) -> float:
+    # Ключ — id экземпляра или номер функции каталога
+    return float(priorities.get(func.id, priorities.get(func.function_id, 1.0)))
+
+
+def solve_scope(project: Project, target_labor: Optional[float] = None,
+                deadline: Optional[float] = None, staff: Optional[float] = None,
+                priorities: Optional[dict] = None, required: Iterable[str] = (),
+                node_limit: int = NODE_LIMIT, time_limit: float = TIME_LIMIT,
+                profile: Optional[EngineProfile] = None) -> ScopeSolution:
+    """Функции наибольшей суммарной ценности, укладывающиеся в бюджет.
+
+    Бюджет задаётся трудоёмкостью target_labor (T_srok, чел.-дн.) или сроком
+    deadline (мес.) при численности staff (по умолчанию — из ограничения
+    проекта по численности). priorities — ценность функции по id экземпляра
+    или номеру в каталоге (по умолчанию 1: сохранить как можно больше
+    функций); required — id экземпляров, которые исключать нельзя;
+    profile — профиль движка (по умолчанию — коэффициенты методики).
+    """
+    started = time.perf_counter()
+    if target_labor is None:
+        if deadline is None:
+            raise ValueError("Укажите бюджет трудоёмкости или срок")
+        if staff is None:
+            if project.constraint_type != "staff":
+                raise ValueError("Для бюджета по сроку укажите численность")
+            staff = project.constraint_value
+        target_labor = staff * deadline * project.work_fund
+
+    priorities = priorities or {}
+    required = set(required)
+    engine = CalculationEngine(profile)
+    result = engine.calculate(project)
+    functions = project.get_all_functions()
+    weights = [engine.calculate_function_volume(f)[1] for f in functions]
+    values = [_priority(f, priorities) for f in functions]
+
+    limit = volume_limit(result, target_labor)
+    solution = ScopeSolution(target_labor=target_labor, volume_limit=limit,
+                             total_value=sum(values))
+
+    fixed = [i for i, f in enumerate(functions) if f.id in required]
+    optional = [i for i, f in enumerate(functions) if f.id not in required]
+    fixed_volume = sum(weights[i] for i in fixed)
+
+    # Округления в движке могут дать T_srok чуть выше бюджета —
+    # тогда предел объёма слегка уменьшается и поиск повторяется
+    for attempt in range(5):
+        capacity = limit * (1.0 - 1e-6 * 10 ** attempt) - fixed_volume
+        if capacity < -EPS:
+            solution.feasible = False
+            solution.dropped = [functions[i] for i in optional]
+            solution.kept = [functions[i] for i in fixed]
+            break
+        knapsack = solve_knapsack([weights[i] for i in optional], [values[i] for i in optional],
+                                  capacity, node_limit, time_limit)
+        keep = set(fixed) | {optional[j] for j in knapsack.chosen}
+        solution.kept = [f for i, f in enumerate(functions) if i in keep]
+        solution.dropped = [f for i, f in enumerate(functions) if i not in keep]
+        solution.value = sum(values[i] for i in keep)
+        solution.upper_bound = knapsack.upper_bound + sum(values[i] for i in fixed)
+        solution.optimal = knapsack.optimal
+        solution.final_labor = engine.calculate(solution.apply(project)).final_labor
+        if solution.final_labor <= target_labor:
+            break
+
+    solution.seconds = time.perf_counter() - started
+    return solution
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Подбор состава функций под бюджет трудоёмкости")
+    parser.add_argument("project", help="Файл проекта (.json)")
+    parser.add_argument("--budget", type=float, help="Бюджет T_srok, чел.-дн.")
+    parser.add_argument("--deadline", type=float, help="Срок, мес. (вместо бюджета)")
+    parser.add_argument("--staff", type=float, help="Численность для бюджета по сроку, чел.")
+    parser.add_argument("--priorities", help="JSON: {id экземпляра или номер функции: ценность}")
+    parser.add_argument("--required", nargs="*", default=[], help="id обязательных экземпляров")
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT, help="Предел поиска, с")
+    parser.add_argument("--output", help="Сохранить урезанный проект")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.budget is None and args.deadline is None:
+        parser.error("укажите --budget или --deadline")
+    profile = profile_from_args(parser, args)
+
+    project = Project.load(args.project)
+    priorities = {}
+    if args.priorities:
+        with open(args.priorities, encoding="utf-8") as f:
+            priorities = json.load(f)
+    solution = solve_scope(project, args.budget, args.deadline, args.staff, priorities,
+                           args.required, time_limit=args.time_limit, profile=profile)
+    print(solution.format())
+    if args.output and solution.feasible:
+        solution.apply(project).save(args.output)
+    return 0 if solution.feasible else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
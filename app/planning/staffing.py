@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Подбор численности и срока разработки
+
+Движок считает один вариант: заданный срок или заданную численность.
+Здесь перебирается вся сетка «срок × численность» сразу (массивы numpy):
+для каждого срока определяется сокращение относительно номинального,
+коэффициент K_sr_srok (Таблица DEADLINE_COEFFICIENTS) и итоговая
+трудоёмкость T_srok = T_razr * K_sr_srok. Вариант допустим, если команда
+успевает выполнить T_srok за срок, укладывается в предельную численность
+и директивный срок. Стоимость — оплата всей команды за весь срок.
+
+Запуск:
+    python -m app.planning.staffing проект.json --max-staff 8 --deadline 10 --rate 4000
+"""
+
+import argparse
+import math
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from ..models.project import Project
+from ..models.calculation import CalculationEngine
+from ..models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+from ..models.coefficients import DEADLINE_COEFFICIENTS
+
+# Уровни сокращения сроков: верхняя граница доли номинального срока -> уровень.
+# Ровно номинальный срок не считается сокращённым.
+DEADLINE_LEVELS = (
+    (0.75, "≤75% от номинальной"),
+    (0.85, "76–85% от номинальной"),
+    (1.00, "86–100% от номинальной"),
+    (math.inf, "≥100% от номинальной"),
+)
+DEADLINE_BOUNDS = np.array([bound for bound, _ in DEADLINE_LEVELS[:-1]])
+DEADLINE_FACTORS = np.array([DEADLINE_COEFFICIENTS[level] for _, level in DEADLINE_LEVELS])
+
+DURATION_STEP = 0.25  # Шаг сетки сроков, мес.
+
+
+def deadline_level_index(ratio: np.ndarray) -> np.ndarray:
+    """Номер уровня DEADLINE_LEVELS для доли номинального срока"""
+    ratio = np.asarray(ratio, dtype=float)
+    # Границы 75% и 85% входят в свой уровень, 100% — уже не сокращение
+    index = np.searchsorted(DEADLINE_BOUNDS[:-1], ratio, side="left")
+    return np.where(ratio >= DEADLINE_BOUNDS[-1], len(DEADLINE_LEVELS) - 1, index)
+
+
+def nominal_duration(project: Project, total_labor: float) -> float:
+    """Номинальный срок проекта, мес.: срок из ограничения проекта
+    (при ограничении по численности — срок без сокращения)"""
+    if project.constraint_type == "duration":
+        return project.constraint_value
+    if project.constraint_value > 0 and project.work_fund > 0:
+        return total_labor / (project.constraint_value * project.work_fund)
+    return 0.0
+
+
+@dataclass
+class StaffingPlan:
+    """Вариант плана: срок, численность и их последствия"""
+    duration: float  # Срок, мес.
+    staff: int  # Численность, чел.
+    deadline_ratio: float  # Доля номинального срока
+    deadline_level: str  # Уровень DEADLINE_COEFFICIENTS
+    k_sr_srok: float
+    final_labor: float  # T_srok, чел.-дн.
+    capacity: float  # Фонд команды за срок, чел.-дн.
+    cost: float  # Стоимость фонда команды
+
+    @property
+    def utilization(self) -> float:
+        """Загрузка команды"""
+        return self.final_labor / self.capacity if self.capacity else 0.0
+
+    def apply(self, project: Project) -> None:
+        """Перенести план в проект (ограничение по сроку и уровень сокращения)"""
+        project.constraint_type = "duration"
+        project.constraint_value = self.duration
+        project.coefficients.deadline = self.deadline_level
+        project.modified = True
+
+
+@dataclass
+class DeadlinePenalty:
+    """Влияние уровня сокращения сроков на трудоёмкость"""
+    deadline_level: str
+    k_sr_srok: float
+    min_duration: float  # Диапазон сроков уровня на сетке, мес.
+    max_duration: float
+    final_labor: float  # T_srok, чел.-дн.
+    extra_labor: float  # Прирост к T_razr, чел.-дн.
+
+
+@dataclass
+class StaffingSolution:
+    """Результат подбора"""
+    total_labor: float  # T_razr без учёта сроков, чел.-дн.
+    nominal_duration: float
+    optimal: Optional[StaffingPlan]  # Минимальная стоимость (при равенстве — короче срок)
+    fastest: Optional[StaffingPlan]  # Минимальный допустимый срок
+    frontier: list[StaffingPlan] = field(default_factory=list)  # Кратчайший срок для каждой численности
+    penalties: list[DeadlinePenalty] = field(default_factory=list)
+    feasible_count: int = 0  # Допустимых вариантов сетки
+    grid_size: int = 0
+
+    def format(self) -> str:
+        """Текстовый отчёт"""
+        lines = [
+            f"T_razr: {self.total_labor:.2f} чел.-дн., номинальный срок {self.nominal_duration:.2f} мес.",
+            f"Допустимых вариантов: {self.feasible_count} из {self.grid_size}",
+        ]
+        if self.optimal is None:
+            lines.append("Допустимых планов нет: увеличьте численность или срок")
+        else:
+            for title, plan in (("Оптимальный по стоимости", self.optimal), ("Самый быстрый", self.fastest)):
+                lines.append(
+                    f"{title}: {plan.staff} чел. × {plan.duration:.2f} мес., "
+                    f"K_sr_srok {plan.k_sr_srok:.2f}, T_srok {plan.final_labor:.2f} чел.-дн., "
+                    f"загрузка {plan.utilization:.0%}, стоимость {plan.cost:,.0f}"
+                )
+            lines.append("Кратчайший срок по численности:")
+            for plan in self.frontier:
+                lines.append(f"  {plan.staff:>3} чел.  {plan.duration:6.2f} мес.  стоимость {plan.cost:,.0f}")
+        lines.append("Влияние сокращения сроков:")
+        for p in self.penalties:
+            lines.append(
+                f"  {p.deadline_level:<24} K={p.k_sr_srok:.2f}  {p.min_duration:.2f}–{p.max_duration:.2f} мес.  "
+                f"T_srok {p.final_labor:.2f} (+{p.extra_labor:.2f}) чел.-дн."
+            )
+        return "\n".join(lines)
+
+
+def solve_staffing(project: Project, max_staff: int, deadline: float, cost_per_day: float = 1.0,
+                   nominal: Optional[float] = None, min_duration: Optional[float] = None,
+                   step: float = DURATION_STEP, profile: Optional[EngineProfile] = None) -> StaffingSolution:
+    """Допустимые и оптимальный по стоимости планы.
+
+    max_staff — предельная численность, deadline — директивный срок (мес.),
+    cost_per_day — стоимость чел.-дня, nominal — номинальный срок (по
+    умолчанию из ограничения проекта), min_duration — начало сетки сроков,
+    profile — профиль движка (по умолчанию — коэффициенты методики).
+    """
+    result = CalculationEngine(profile).calculate(project)
+    total_labor = result.total_labor
+    work_fund = project.work_fund
+    nominal = nominal if nominal is not None else nominal_duration(project, total_labor)
+    if nominal <= 0:
+        raise ValueError("Номинальный срок должен быть положительным")
+
+    first = min_duration if min_duration is not None else step
+    durations = np.round(np.arange(first, deadline + step / 2, step), 6)
+    staff = np.arange(1, max_staff + 1)
+
+    ratio = durations / nominal
+    level = deadline_level_index(ratio)
+    k_sr_srok = DEADLINE_FACTORS[level]
+    # Как в движке: T_srok округляется до сотых
+    final_labor = np.round(total_labor * k_sr_srok, 2)
+
+    capacity = np.outer(durations, staff) * work_fund
+    feasible = capacity >= final_labor[:, None] - 1e-9
+    cost = np.where(feasible, capacity * cost_per_day, np.inf)
+
+    def plan(i: int, j: int) -> StaffingPlan:
+        return StaffingPlan(
+            duration=float(durations[i]),
+            staff=int(staff[j]),
+            deadline_ratio=float(ratio[i]),
+            deadline_level=DEADLINE_LEVELS[level[i]][1],
+            k_sr_srok=float(k_sr_srok[i]),
+            final_labor=float(final_labor[i]),
+            capacity=float(capacity[i, j]),
+            cost=float(capacity[i, j] * cost_per_day),
+        )
+
+    solution = StaffingSolution(
+        total_labor=total_labor, nominal_duration=nominal, optimal=None, fastest=None,
+        feasible_count=int(feasible.sum()), grid_size=int(feasible.size),
+    )
+    if solution.feasible_count:
+        # argmin по строкам: при равной стоимости выигрывает более короткий срок
+        solution.optimal = plan(*np.unravel_index(np.argmin(cost), cost.shape))
+        i = int(np.argmax(feasible.any(axis=1)))
+        solution.fastest = plan(i, int(np.argmax(feasible[i])))
+        reachable = feasible.any(axis=0)
+        shortest = np.argmax(feasible, axis=0)
+        solution.frontier = [plan(int(shortest[j]), j) for j in np.flatnonzero(reachable)]
+
+    for index, (_, name) in enumerate(DEADLINE_LEVELS):
+        mask = level == index
+        if not mask.any():
+            continue
+        k = float(DEADLINE_FACTORS[index])
+        solution.penalties.append(DeadlinePenalty(
+            deadline_level=name,
+            k_sr_srok=k,
+            min_duration=float(durations[mask].min()),
+            max_duration=float(durations[mask].max()),
+            final_labor=round(total_labor * k, 2),
+            extra_labor=round(total_labor * k - total_labor, 2),
+        ))
+    return solution
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Подбор численности и срока разработки")
+    parser.add_argument("project", help="Файл проекта (.json)")
+    parser.add_argument("--max-staff", type=int, required=True, help="Предельная численность, чел.")
+    parser.add_argument("--deadline", type=float, required=True, help="Директивный срок, мес.")
+    parser.add_argument("--rate", type=float, default=1.0, help="Стоимость чел.-дня")
+    parser.add_argument("--nominal", type=float, default=None, help="Номинальный срок, мес.")
+    parser.add_argument("--step", type=float, default=DURATION_STEP, help="Шаг сетки сроков, мес.")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    profile = profile_from_args(parser, args)
+
+    project = Project.load(args.project)
+    solution = solve_staffing(project, args.max_staff, args.deadline, args.rate,
+                              nominal=args.nominal, step=args.step, profile=profile)
+    print(solution.format())
+    return 0 if solution.optimal else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
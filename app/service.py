@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+"""
+Локальный HTTP-сервис расчёта трудоёмкости (asyncio, только stdlib)
+
+Принимает проект в JSON (формат файла проекта), выполняет расчёт в пуле
+процессов и возвращает CalculationResult в JSON. Запуск:
+
+    python -m app.service --host 127.0.0.1 --port 8765
+
+Точки доступа:
+    POST /estimate          проект -> результат расчёта
+    POST /estimate/batch    массив проектов -> массив результатов
+    POST /estimate/stream   NDJSON (проект в строке) -> NDJSON по мере готовности
+    GET  /metrics           метрики в текстовом формате Prometheus
+    GET  /health            проверка работоспособности
+
+Результаты кэшируются по хэшу содержимого проекта; одинаковые
+одновременные запросы считаются один раз.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from .models.project import Project
+from .models.calculation import CalculationEngine
+from .models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+
+# Ограничения запросов
+MAX_BODY_BYTES = 10 * 1024 * 1024  # Тело /estimate и /estimate/batch
+MAX_STREAM_BYTES = 256 * 1024 * 1024  # Тело /estimate/stream
+MAX_LINE_BYTES = 10 * 1024 * 1024  # Одна строка NDJSON
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BATCH_SIZE = 10_000
+
+# Границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """Ошибка запроса с HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def estimate_project(data: dict, profile: Optional[EngineProfile] = None) -> dict:
+    """Расчёт по словарю проекта (выполняется в процессе пула)"""
+    project = Project.from_dict(data)
+    return CalculationEngine(profile).calculate(project).to_dict()
+
+
+def project_hash(data: dict) -> str:
+    """Хэш содержимого проекта (не зависит от порядка ключей)"""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus (накопительные корзины)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        prefix = f"{labels}," if labels else ""
+        lines = [
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """Счётчики и гистограммы сервиса"""
+
+    def __init__(self):
+        self.requests: dict[tuple[str, int], int] = {}
+        self.request_latency: dict[str, Histogram] = {}
+        self.calculation_latency = Histogram()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe_request(self, endpoint: str, status: int, seconds: float) -> None:
+        key = (endpoint, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.request_latency.setdefault(endpoint, Histogram()).observe(seconds)
+
+    def render(self, cache_size: int) -> str:
+        lines = [
+            "# HELP estimation_requests_total Число HTTP-запросов",
+            "# TYPE estimation_requests_total counter",
+        ]
+        for (endpoint, status), count in sorted(self.requests.items()):
+            lines.append(f'estimation_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP estimation_request_seconds Время обработки HTTP-запроса",
+            "# TYPE estimation_request_seconds histogram",
+        ]
+        for endpoint, histogram in sorted(self.request_latency.items()):
+            lines += histogram.render("estimation_request_seconds", f'endpoint="{endpoint}"')
+
+        lines += [
+            "# HELP estimation_calculation_seconds Время расчёта одного проекта в пуле",
+            "# TYPE estimation_calculation_seconds histogram",
+        ]
+        lines += self.calculation_latency.render("estimation_calculation_seconds", "")
+
+        lines += [
+            "# TYPE estimation_cache_hits_total counter",
+            f"estimation_cache_hits_total {self.cache_hits}",
+            "# TYPE estimation_cache_misses_total counter",
+            f"estimation_cache_misses_total {self.cache_misses}",
+            "# TYPE estimation_cache_entries gauge",
+            f"estimation_cache_entries {cache_size}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class EstimationService:
+    """HTTP-сервис расчёта на asyncio
+
+    executor — пул для расчётов (по умолчанию пул процессов spawn),
+    profile — профиль движка (по умолчанию — коэффициенты методики).
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, workers: Optional[int] = None,
+                 cache_size: int = 1024, max_body_bytes: int = MAX_BODY_BYTES,
+                 max_stream_bytes: int = MAX_STREAM_BYTES, profile: Optional[EngineProfile] = None):
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.cache_size = cache_size
+        self.max_body_bytes = max_body_bytes
+        self.max_stream_bytes = max_stream_bytes
+        self.profile = profile  # Профиль движка для всех расчётов сервиса
+        self.metrics = Metrics()
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- Жизненный цикл ---
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        """Начать приём соединений; возвращает фактический адрес"""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._own_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    # --- Расчёт и кэш ---
+
+    async def estimate(self, data: dict) -> tuple[dict, bool]:
+        """Результат расчёта и признак попадания в кэш"""
+        if not isinstance(data, dict):
+            raise HTTPError(422, "Проект должен быть JSON-объектом")
+
+        key = project_hash(data)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.metrics.cache_hits += 1
+            return cached, True
+
+        # Тот же проект уже считается — ждём его результат
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics.cache_hits += 1
+            return await asyncio.shield(inflight), True
+
+        self.metrics.cache_misses += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        started = time.perf_counter()
+        # Результат передаётся ожидающим из обработчика завершения расчёта,
+        # поэтому отмена запросившего клиента не оставляет их без ответа
+        calculation = loop.run_in_executor(self.executor, estimate_project, data, self.profile)
+        calculation.add_done_callback(
+            lambda done: self._finish_estimate(key, future, done, started))
+        return await asyncio.shield(future), False
+
+    def _finish_estimate(self, key: str, future: asyncio.Future, calculation: asyncio.Future,
+                         started: float) -> None:
+        """Передать результат расчёта всем ожидающим и положить его в кэш"""
+        del self._inflight[key]
+        if calculation.cancelled():
+            future.cancel()
+            return
+        error = calculation.exception()
+        if error is not None:
+            future.set_exception(HTTPError(422, f"Не удалось выполнить расчёт: {error}"))
+            future.exception()  # Ожидающих может не остаться
+            return
+        self.metrics.calculation_latency.observe(time.perf_counter() - started)
+
+        result = calculation.result()
+        future.set_result(result)
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = await self._handle_request(reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Обработать один запрос; False — закрыть соединение"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return False
+        except asyncio.LimitOverrunError:
+            await self._send_json(writer, 431, {"error": "Слишком большие заголовки"}, close=True)
+            return False
+        if len(head) > MAX_HEADER_BYTES:
+            await self._send_json(writer, 431, {"error": "Слишком большие заголовки"}, close=True)
+            return False
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "Некорректная строка запроса"}, close=True)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        path = target.split("?", 1)[0]
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        started = time.perf_counter()
+        status = 500
+        try:
+            status = await self._dispatch(method, path, headers, reader, writer, keep_alive)
+        except HTTPError as e:
+            status = e.status
+            # Непрочитанное тело запроса — соединение дальше не используется
+            keep_alive = keep_alive and e.status not in (411, 413)
+            await self._send_json(writer, e.status, {"error": str(e)}, close=not keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            keep_alive = False
+            await self._send_json(writer, 500, {"error": str(e)}, close=True)
+        finally:
+            self.metrics.observe_request(path, status, time.perf_counter() - started)
+        return keep_alive
+
+    async def _dispatch(self, method, path, headers, reader, writer, keep_alive) -> int:
+        routes = {
+            "/estimate": ("POST", self._estimate_one),
+            "/estimate/batch": ("POST", self._estimate_batch),
+            "/estimate/stream": ("POST", self._estimate_stream),
+            "/metrics": ("GET", self._metrics),
+            "/health": ("GET", self._health),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"Неизвестный путь: {path}")
+        expected, handler = routes[path]
+        if method != expected:
+            raise HTTPError(405, f"Метод {method} не поддерживается для {path}")
+        return await handler(headers, reader, writer, keep_alive)
+
+    def _content_length(self, headers: dict, limit: int) -> int:
+        if "content-length" not in headers:
+            raise HTTPError(411, "Требуется заголовок Content-Length")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Некорректный Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Некорректный Content-Length")
+        if length > limit:
+            raise HTTPError(413, f"Тело запроса больше {limit} байт")
+        return length
+
+    async def _read_json(self, headers: dict, reader: asyncio.StreamReader):
+        length = self._content_length(headers, self.max_body_bytes)
+        body = await reader.readexactly(length)
+        try:
+            return json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"Некорректный JSON: {e}")
+
+    async def _estimate_one(self, headers, reader, writer, keep_alive) -> int:
+        data = await self._read_json(headers, reader)
+        result, cached = await self.estimate(data)
+        await self._send_json(writer, 200, result, close=not keep_alive,
+                              extra_headers={"X-Cache": "hit" if cached else "miss"})
+        return 200
+
+    async def _estimate_batch(self, headers, reader, writer, keep_alive) -> int:
+        data = await self._read_json(headers, reader)
+        projects = data.get("projects") if isinstance(data, dict) else data
+        if not isinstance(projects, list):
+            raise HTTPError(422, "Ожидается массив проектов или объект {\"projects\": [...]}")
+        if len(projects) > MAX_BATCH_SIZE:
+            raise HTTPError(413, f"Не более {MAX_BATCH_SIZE} проектов в пакете")
+
+        outcomes = await asyncio.gather(*(self.estimate(p) for p in projects), return_exceptions=True)
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, HTTPError):
+                results.append({"error": str(outcome)})
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results.append(outcome[0])
+        await self._send_json(writer, 200, results, close=not keep_alive)
+        return 200
+
+    async def _estimate_stream(self, headers, reader, writer, keep_alive) -> int:
+        """NDJSON: расчёт каждой строки запускается сразу по её прочтении,
+        результаты отправляются порциями (chunked) в порядке готовности"""
+        remaining = self._content_length(headers, self.max_stream_bytes)
+
+        await self._send_head(writer, 200, "application/x-ndjson",
+                              {"Transfer-Encoding": "chunked"}, close=not keep_alive)
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = []
+
+        async def run(index: int, line: bytes):
+            try:
+                result, cached = await self.estimate(json.loads(line))
+                item = {"index": index, "cached": cached, "result": result}
+            except HTTPError as e:
+                item = {"index": index, "error": str(e)}
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                item = {"index": index, "error": f"Некорректный JSON: {e}"}
+            except Exception as e:
+                # Любая ошибка строки (например, RecursionError разбора) даёт элемент ответа,
+                # иначе поток ждал бы его бесконечно
+                item = {"index": index, "error": f"Ошибка обработки строки: {e}"}
+            await queue.put(item)
+
+        async def read_lines():
+            nonlocal remaining
+            index = 0
+            buffer = b""
+            discarding = False  # Пропуск хвоста слишком длинной строки до перевода строки
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, 64 * 1024))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(buffer, remaining)
+                remaining -= len(chunk)
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                if discarding:
+                    if not lines:
+                        buffer = b""
+                        continue
+                    lines.pop(0)
+                    discarding = False
+                for line in lines:
+                    if len(line) > MAX_LINE_BYTES:
+                        await queue.put({"index": index, "error": f"Строка длиннее {MAX_LINE_BYTES} байт"})
+                        index += 1
+                    elif line.strip():
+                        tasks.append(asyncio.create_task(run(index, line)))
+                        index += 1
+                if len(buffer) > MAX_LINE_BYTES:
+                    await queue.put({"index": index, "error": f"Строка длиннее {MAX_LINE_BYTES} байт"})
+                    index += 1
+                    buffer = b""
+                    discarding = True
+            if buffer.strip():
+                tasks.append(asyncio.create_task(run(index, buffer)))
+                index += 1
+            return index
+
+        reading = asyncio.create_task(read_lines())
+        sent = 0
+        total = None
+        try:
+            while total is None or sent < total:
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({getter, reading} if total is None else {getter},
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if reading in done and total is None:
+                    total = reading.result()
+                if getter in done:
+                    await self._send_chunk(writer, json.dumps(getter.result(), ensure_ascii=False).encode("utf-8") + b"\n")
+                    sent += 1
+                else:
+                    getter.cancel()
+            await self._send_chunk(writer, b"")
+        finally:
+            reading.cancel()
+            for task in tasks:
+                task.cancel()
+        return 200
+
+    async def _metrics(self, headers, reader, writer, keep_alive) -> int:
+        body = self.metrics.render(len(self._cache)).encode("utf-8")
+        await self._send(writer, 200, body, "text/plain; version=0.0.4; charset=utf-8", close=not keep_alive)
+        return 200
+
+    async def _health(self, headers, reader, writer, keep_alive) -> int:
+        await self._send_json(writer, 200, {"status": "ok"}, close=not keep_alive)
+        return 200
+
+    # --- Ответы ---
+
+    async def _send_head(self, writer, status: int, content_type: str, extra_headers: dict, close: bool):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}"]
+        lines += [f"{name}: {value}" for name, value in extra_headers.items()]
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send(self, writer, status: int, body: bytes, content_type: str,
+                    close: bool = False, extra_headers: Optional[dict] = None):
+        headers = dict(extra_headers or {})
+        headers["Content-Length"] = str(len(body))
+        await self._send_head(writer, status, content_type, headers, close)
+        writer.write(body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, data, close: bool = False,
+                         extra_headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8", close, extra_headers)
+
+    async def _send_chunk(self, writer, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        await writer.drain()
+
+
+async def _serve(args, profile: Optional[EngineProfile]) -> None:
+    service = EstimationService(workers=args.workers, cache_size=args.cache_size,
+                                max_body_bytes=args.max_body, profile=profile)
+    host, port = await service.start(args.host, args.port)
+    print(f"Сервис расчёта: http://{host}:{port}", flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Локальный HTTP-сервис расчёта трудоёмкости")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов расчёта")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Результатов в кэше")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_BYTES, help="Предел тела запроса, байт")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    profile = profile_from_args(parser, args)
+    try:
+        asyncio.run(_serve(args, profile))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
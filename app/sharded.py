@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Расчёт объёма очень больших перечней функций в нескольких процессах
+
+Входные столбцы функций (Vi, ri, ki и коды сложности, средства
+разработки, опыта и компонента) кладутся в один блок
+multiprocessing.shared_memory; процессы получают только имя блока,
+раскладку столбцов и границы своей части строк и читают столбцы без
+копирования.
+
+Каждая часть считает Vk_i векторно (в том же порядке умножений, что и
+движок, поэтому значения совпадают до бита) и сводит их к точным целым
+суммам: Vk = M * 2^e (M — 53-битная мантисса). Мантиссы раскладываются
+по корзинам «компонент × порядок e» (np.bincount) двумя половинами по
+26–27 бит, так что суммы в корзинах точны в float64; при очень большом
+числе компонентов число M, сдвинутое к общему младшему разряду части,
+режется на 21-битные «конечности» и суммируется по компонентам. Обратно
+передаются только эти суммы, а основной процесс складывает их целыми
+числами Python и округляет один раз. Результат равен точной сумме, как
+у движка (ExactSum), и не зависит от числа процессов и разбиения.
+
+Запуск:
+    python -m app.sharded перечень.csv --project параметры.json --workers 4
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .models.project import Project, FunctionInstance, ProjectCoefficients
+from .models.calculation import CalculationEngine, CalculationResult
+from .models.profiles import add_profile_arguments, profile_from_args
+from .models.coefficients import (
+    COMPLEXITY_COEFFICIENTS,
+    DEV_ENVIRONMENT_COEFFICIENTS,
+    DEVELOPER_EXPERIENCE,
+)
+
+MANTISSA_BITS = 53
+HALF_BITS = 26  # Старшая половина мантиссы < 2^27
+MAX_SHARD_ROWS = 1 << 26  # Сумма стольких половин (< 2^53) точна в float64
+LIMB_BITS = 21
+MAX_BUCKETS = 1 << 22  # Предел корзин «компонент × порядок» на часть
+MIN_SHARD_ROWS = 250_000  # Меньшие перечни считаются в одном процессе
+
+# Столбцы: имя -> тип numpy
+# Vi и ri хранятся в float64: их произведение (< 2^53) точно, как целое в движке
+COLUMNS = (
+    ("volume", "<f8"),
+    ("reuse_count", "<f8"),
+    ("reuse_coefficient", "<f8"),
+    ("complexity", "<u2"),
+    ("language", "<u2"),
+    ("experience", "<u2"),
+    ("component", "<i4"),
+)
+_ARRAY_CODES = {"<f8": "d", "<u2": "H", "<i4": "i"}
+
+
+class _Dictionary:
+    """Словарное кодирование строк столбца"""
+
+    def __init__(self):
+        self.codes: dict = {}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def values(self) -> list:
+        return list(self.codes)
+
+
+class FunctionColumns:
+    """Входные данные расчёта объёма по столбцам
+
+    Коды сложности, средства разработки и опыта индексируют таблицы
+    коэффициентов (k_slozhn, k_sr_razr, k_opyt), код компонента — список
+    components.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], components: list[str],
+                 k_slozhn: np.ndarray, k_sr_razr: np.ndarray, k_opyt: np.ndarray):
+        self.arrays = arrays
+        self.components = components
+        self.k_slozhn = k_slozhn
+        self.k_sr_razr = k_sr_razr
+        self.k_opyt = k_opyt
+
+    def __len__(self) -> int:
+        return len(self.arrays["volume"])
+
+    @classmethod
+    def from_records(cls, records: Iterable[tuple[str, FunctionInstance]]) -> "FunctionColumns":
+        """Столбцы из пар (название компонента, функция), как в calculate_stream"""
+        data = {name: array(_ARRAY_CODES[dtype]) for name, dtype in COLUMNS}
+        dictionaries = {name: _Dictionary() for name in ("complexity", "language", "experience", "component")}
+        append = {name: data[name].append for name in data}
+        code = {name: d.code for name, d in dictionaries.items()}
+        for component_name, func in records:
+            append["volume"](func.volume)
+            append["reuse_count"](func.reuse_count)
+            append["reuse_coefficient"](func.reuse_coefficient)
+            append["complexity"](code["complexity"](func.complexity_level))
+            append["language"](code["language"](func.language))
+            append["experience"](code["experience"](func.developer_experience))
+            append["component"](code["component"](component_name))
+
+        arrays = {name: np.frombuffer(data[name], dtype=dtype) if len(data[name]) else np.zeros(0, dtype)
+                  for name, dtype in COLUMNS}
+
+        def table(name: str, coefficients: dict) -> np.ndarray:
+            return np.array([coefficients.get(v, 1.00) for v in dictionaries[name].values()], dtype=float)
+
+        return cls(
+            arrays,
+            [str(c) for c in dictionaries["component"].values()],
+            table("complexity", COMPLEXITY_COEFFICIENTS),
+            table("language", DEV_ENVIRONMENT_COEFFICIENTS),
+            table("experience", DEVELOPER_EXPERIENCE),
+        )
+
+    @classmethod
+    def from_project(cls, project: Project) -> "FunctionColumns":
+        return cls.from_records((c.name, f) for c in project.components for f in c.functions)
+
+    def volumes(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Vk_i строк [start, stop) — в порядке умножений движка"""
+        return _volumes({name: a[start:stop] for name, a in self.arrays.items()},
+                        self.k_slozhn, self.k_sr_razr, self.k_opyt)
+
+
+def _volumes(arrays: dict[str, np.ndarray], k_slozhn, k_sr_razr, k_opyt) -> np.ndarray:
+    # Как в движке: (Vi * ri) * ki * K_slozhn * K_sr_razr * K_opyt слева направо
+    volume = (arrays["volume"] * arrays["reuse_count"]) * arrays["reuse_coefficient"]
+    volume *= k_slozhn[arrays["complexity"]]
+    volume *= k_sr_razr[arrays["language"]]
+    volume *= k_opyt[arrays["experience"]]
+    return volume
+
+
+@dataclass
+class ShardSums:
+    """Точные суммы части: Σ_r sums[r, c] * 2^(scales[r] + exponent) по компонентам c"""
+    exponent: int
+    sums: np.ndarray  # Строки сумм × компоненты, целые значения в float64
+    scales: list[int]
+    rows: int
+
+
+def _exact_sums(volume: np.ndarray, component: np.ndarray, n_components: int) -> ShardSums:
+    """Свести Vk части (не более MAX_SHARD_ROWS строк) к точным целым суммам по компонентам"""
+    if not np.isfinite(volume).all():
+        raise ValueError("Объём функции должен быть конечным числом")
+    mantissa, exponent = np.frexp(np.abs(volume))
+    nonzero = mantissa != 0
+    if not nonzero.any():
+        return ShardSums(0, np.zeros((1, n_components)), [0], len(volume))
+    e_min = int(exponent[nonzero].min())
+    shift = np.where(nonzero, exponent - e_min, 0).astype(np.int64)
+    span = int(shift.max()) + 1
+    # Целая мантисса: Vk = M * 2^(e - 53), M < 2^53
+    integer = np.ldexp(mantissa, MANTISSA_BITS).astype(np.int64)
+    sign = np.where(volume < 0, -1.0, 1.0) if (volume < 0).any() else 1.0
+
+    if n_components * span <= MAX_BUCKETS:
+        # Корзины «компонент × порядок»: половины мантиссы (< 2^27) суммируются точно
+        key = component.astype(np.int64) * span + shift
+        size = n_components * span
+        high = np.bincount(key, weights=np.right_shift(integer, HALF_BITS) * sign, minlength=size)
+        low = np.bincount(key, weights=(integer & ((1 << HALF_BITS) - 1)) * sign, minlength=size)
+        sums = np.concatenate([high.reshape(n_components, span).T, low.reshape(n_components, span).T])
+        scales = [k + HALF_BITS for k in range(span)] + list(range(span))
+        return ShardSums(e_min - MANTISSA_BITS, sums, scales, len(volume))
+
+    # Много компонентов: число M << shift режется на 21-битные конечности
+    mask = (1 << LIMB_BITS) - 1
+    limbs = -(-(MANTISSA_BITS + span - 1) // LIMB_BITS)
+    sums = np.empty((limbs, n_components))
+    for j in range(limbs):
+        # Биты [21j, 21j + 21) числа M << shift
+        offset = LIMB_BITS * j - shift
+        right = np.right_shift(integer, np.clip(offset, 0, 63))
+        left_shift = np.clip(-offset, 0, LIMB_BITS)
+        left = np.left_shift(integer & np.right_shift(mask, left_shift), left_shift)
+        limb = np.where(offset >= 0, right, left) & mask
+        sums[j] = np.bincount(component, weights=limb * sign, minlength=n_components)
+    return ShardSums(e_min - MANTISSA_BITS, sums, [LIMB_BITS * j for j in range(limbs)], len(volume))
+
+
+def _shard_worker(block: str, rows: int, layout: list[tuple[str, str, int]], start: int, stop: int,
+                  tables: tuple, n_components: int) -> ShardSums:
+    """Часть строк из общей памяти (в процессе-исполнителе)"""
+    shm = shared_memory.SharedMemory(name=block)
+    try:
+        arrays = {name: np.ndarray(rows, dtype=dtype, buffer=shm.buf, offset=offset)[start:stop]
+                  for name, dtype, offset in layout}
+        sums = _exact_sums(_volumes(arrays, *tables), arrays["component"], n_components)
+        del arrays
+        return sums
+    finally:
+        shm.close()
+
+
+class SharedColumns:
+    """Столбцы в одном блоке общей памяти (создаётся и удаляется владельцем)"""
+
+    def __init__(self, columns: FunctionColumns):
+        self.rows = len(columns)
+        self.layout: list[tuple[str, str, int]] = []
+        size = 0
+        for name, dtype in COLUMNS:
+            self.layout.append((name, dtype, size))
+            size += -(-self.rows * np.dtype(dtype).itemsize // 8) * 8  # Выравнивание по 8 байт
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, dtype, offset in self.layout:
+            target = np.ndarray(self.rows, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            target[:] = columns.arrays[name]
+            del target
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedColumns":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _reduce(parts: list[ShardSums], n_components: int) -> tuple[float, list[float]]:
+    """Сложить точные суммы частей целыми числами; округление — один раз"""
+    parts = [p for p in parts if p.rows]
+    if not parts:
+        return 0.0, [0.0] * n_components
+    base = min(p.exponent for p in parts)
+    totals = [0] * n_components
+    for part in parts:
+        for row, scale in zip(part.sums, part.scales):
+            scale += part.exponent - base
+            for c in np.flatnonzero(row):
+                totals[c] += int(row[c]) << scale
+
+    def to_float(value: int) -> float:
+        # Деление целых в Python округляется корректно
+        return float(value << base) if base >= 0 else value / (1 << -base)
+
+    return to_float(sum(totals)), [to_float(v) for v in totals]
+
+
+def shard_bounds(rows: int, shards: int) -> list[tuple[int, int]]:
+    """Границы частей примерно равного размера"""
+    edges = np.linspace(0, rows, shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def calculate_sharded(
+    columns: FunctionColumns,
+    coefficients: ProjectCoefficients,
+    work_fund: int = 21,
+    constraint_type: str = "duration",
+    constraint_value: float = 12.0,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    engine: Optional[CalculationEngine] = None,
+) -> CalculationResult:
+    """Расчёт по столбцам функций, объём — в нескольких процессах.
+
+    workers — число процессов (по умолчанию по числу ядер), shards — число
+    частей (по умолчанию по числу процессов); executor — свой пул
+    процессов. Результаты по функциям не формируются (functions_results
+    пуст), объёмы компонентов — в component_volumes. Итоги совпадают с
+    CalculationEngine.calculate для тех же функций.
+    """
+    engine = engine or CalculationEngine()
+    rows = len(columns)
+    n_components = len(columns.components)
+    tables = (columns.k_slozhn, columns.k_sr_razr, columns.k_opyt)
+    workers = workers or os.cpu_count() or 1
+    # Части не больше MAX_SHARD_ROWS строк — иначе суммы в корзинах теряют точность
+    shards = max(shards or workers, -(-rows // MAX_SHARD_ROWS))
+
+    if executor is None and (workers == 1 or rows < MIN_SHARD_ROWS):
+        parts = [_exact_sums(columns.volumes(start, stop), columns.arrays["component"][start:stop], n_components)
+                 for start, stop in shard_bounds(rows, -(-rows // MAX_SHARD_ROWS))]
+    else:
+        own_executor = executor is None
+        executor = executor or ProcessPoolExecutor(max_workers=workers,
+                                                   mp_context=multiprocessing.get_context("spawn"))
+        try:
+            with SharedColumns(columns) as shared:
+                futures = [
+                    executor.submit(_shard_worker, shared.name, rows, shared.layout, start, stop,
+                                    tables, n_components)
+                    for start, stop in shard_bounds(rows, shards)
+                ]
+                parts = [future.result() for future in futures]
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+    total, component_volumes = _reduce(parts, n_components)
+    # Этапы после объёма — как в движке (проект без компонентов несёт параметры)
+    project = Project(work_fund=work_fund, constraint_type=constraint_type,
+                      constraint_value=constraint_value, coefficients=coefficients)
+    engine.result = CalculationResult(total_volume=round(total, 2), A=engine.A, C=engine.C)
+    engine.result.work_fund = work_fund
+    engine.result.constraint_type = constraint_type
+    engine.result.constraint_value = constraint_value
+    engine.result.component_volumes = {
+        name: round(volume, 2) for name, volume in zip(columns.components, component_volumes)
+    }
+    return engine._calculate_labor(project)
+
+
+def read_inventory(csv_path: str) -> Iterable[tuple[str, FunctionInstance]]:
+    """Пары (компонент, функция) из CSV-перечня: component;function_id;volume[;language;
+    reuse_count;reuse_coefficient;complexity_level;developer_experience]"""
+    default = FunctionInstance(id="")
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.readline()
+        f.seek(0)
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        for row in csv.DictReader(f, delimiter=delimiter):
+            yield row.get("component") or "Компонент", FunctionInstance(
+                id="",
+                function_id=row.get("function_id", ""),
+                volume=int(row["volume"]),
+                language=row.get("language") or default.language,
+                reuse_count=int(row.get("reuse_count") or 1),
+                reuse_coefficient=float((row.get("reuse_coefficient") or "1").replace(",", ".")),
+                complexity_level=int(row.get("complexity_level") or default.complexity_level),
+                developer_experience=row.get("developer_experience") or default.developer_experience,
+            )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Расчёт очень большого перечня функций в нескольких процессах")
+    parser.add_argument("inventory", help="CSV: component;function_id;volume;language;...")
+    parser.add_argument("--project", help="Проект (.json), из которого берутся коэффициенты и ограничения")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    engine = CalculationEngine(profile_from_args(parser, args))
+
+    settings = Project.load(args.project) if args.project else Project()
+    started = time.perf_counter()
+    columns = FunctionColumns.from_records(read_inventory(args.inventory))
+    loaded = time.perf_counter()
+    result = calculate_sharded(columns, settings.coefficients, settings.work_fund,
+                               settings.constraint_type, settings.constraint_value, workers=args.workers,
+                               engine=engine)
+    finished = time.perf_counter()
+
+    print(f"Функций: {len(columns):,}, компонентов: {len(columns.components):,} "
+          f"(чтение {loaded - started:.2f} с, расчёт {finished - loaded:.2f} с)")
+    print(f"V = {result.total_volume:,.2f}, T_razr = {result.total_labor:,.2f} чел.-дн., "
+          f"T_srok = {result.final_labor:,.2f} чел.-дн.")
+    for name, volume in sorted(result.component_volumes.items(), key=lambda item: -item[1])[:20]:
+        print(f"  {name:<40} {volume:16,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Профилирование запуска приложения
+
+Режим `python main.py --profile-startup` перезапускает интерпретатор
+с `-X importtime`, замеряет собственные этапы запуска (spans) до показа
+первого окна и печатает сводку: этапы, самые долгие импорты и список
+тяжёлых модулей, успевших загрузиться.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+PROFILE_FLAG = "--profile-startup"
+
+# Модули, которые не должны загружаться до первого окна
+HEAVY_MODULES = ("matplotlib", "openpyxl", "docx")
+
+# Отсчёт от импорта этого модуля (первое, что делает main.py)
+_start = time.perf_counter()
+_enabled = False
+_spans: list[tuple[str, float]] = []
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def enable() -> None:
+    """Включить запись этапов запуска"""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Замерить этап запуска (без накладных расходов, если режим выключен)"""
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _spans.append((name, time.perf_counter() - started))
+
+
+def elapsed() -> float:
+    """Секунд с начала запуска"""
+    return time.perf_counter() - _start
+
+
+def loaded_heavy_modules() -> list[str]:
+    """Тяжёлые модули, уже загруженные в процесс"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def format_report(first_window: float) -> str:
+    """Сводка по этапам запуска"""
+    lines = ["Этапы запуска:"]
+    for name, duration in _spans:
+        lines.append(f"  {name:<32} {duration * 1000:8.1f} мс")
+    lines.append(f"Время до первого окна: {first_window * 1000:.0f} мс")
+    heavy = loaded_heavy_modules()
+    lines.append(f"Тяжёлые модули загружены: {', '.join(heavy) if heavy else 'нет'}")
+    return "\n".join(lines)
+
+
+def parse_importtime(text: str, top: int = 15) -> list[tuple[str, int, int]]:
+    """Разобрать вывод `-X importtime`
+
+    Возвращает (модуль, собственное время, накопленное время) в микросекундах
+    для модулей верхнего уровня, отсортированные по накопленному времени.
+    """
+    rows = []
+    for line in text.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # Вложенные импорты уже учтены в накопленном времени родителя
+        if len(indent) <= 1:
+            rows.append((name, int(self_us), int(cumulative_us)))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+def format_importtime(rows: list[tuple[str, int, int]]) -> str:
+    """Таблица самых долгих импортов"""
+    lines = ["Самые долгие импорты (-X importtime):"]
+    for name, self_us, cumulative_us in rows:
+        lines.append(f"  {name:<40} {cumulative_us / 1000:8.1f} мс (собственное {self_us / 1000:.1f} мс)")
+    return "\n".join(lines)
+
+
+def run_with_importtime(script: str, args: Optional[list[str]] = None) -> int:
+    """Перезапустить скрипт с `-X importtime` и напечатать общую сводку"""
+    command = [sys.executable, "-X", "importtime", script] + (args if args is not None else sys.argv[1:])
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=os.environ.copy())
+
+    sys.stdout.write(process.stdout)
+    other = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+    if other:
+        sys.stderr.write("\n".join(other) + "\n")
+    print(format_importtime(parse_importtime(process.stderr)))
+    return process.returncode
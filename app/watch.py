@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""
+Наблюдение за каталогом проектов: пересчёт изменённых файлов
+
+Каталог (с подкаталогами) сканируется только по метаданным: os.scandir
+даёт время изменения и размер без чтения содержимого. Файл читается лишь
+когда они изменились; если совпал и хэш содержимого (файл пересохранили
+без изменений), расчёт не повторяется. Изменённые проекты считаются в
+пуле процессов, сводка хранится в индексе SQLite и, по желанию,
+выгружается в CSV.
+
+В Linux изменения приходят через inotify, и между событиями процесс
+спит в select(). Без inotify каталог опрашивается с интервалом. В обоих
+режимах раз в --rescan секунд выполняется полная сверка (inotify не видит
+изменений, сделанных на других машинах в сетевом каталоге).
+
+Запуск:
+    python -m app.watch проекты --index сводка.sqlite3 --csv сводка.csv
+"""
+
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import multiprocessing
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Iterable, Optional
+
+from .models.project import Project
+from .models.calculation import CalculationEngine
+from .models.profiles import EngineProfile, add_profile_arguments, profile_from_args
+from .export.common import create_temp_file
+
+PROJECT_SUFFIX = ".json"
+POLL_SECONDS = 2.0  # Интервал опроса без inotify
+RESCAN_SECONDS = 300.0  # Полная сверка каталога
+SETTLE_SECONDS = 0.2  # Пауза после события: дождаться остальных изменений пачки
+
+# Столбцы сводки: (имя, тип SQLite)
+SUMMARY_COLUMNS = (
+    ("path", "TEXT PRIMARY KEY"),
+    ("mtime_ns", "INTEGER NOT NULL"),
+    ("size", "INTEGER NOT NULL"),
+    ("sha256", "TEXT"),
+    ("project_name", "TEXT"),
+    ("function_count", "INTEGER"),
+    ("total_volume", "REAL"),
+    ("final_labor", "REAL"),
+    ("total_duration", "REAL"),
+    ("average_staff", "REAL"),
+    ("estimated_at", "REAL"),
+    ("error", "TEXT"),
+)
+COLUMN_NAMES = [name for name, _ in SUMMARY_COLUMNS]
+
+
+def estimate_file(path: str, mtime_ns: int, size: int, known_hash: Optional[str],
+                  profile: Optional[EngineProfile] = None) -> dict:
+    """Строка сводки по файлу проекта (выполняется в процессе пула).
+
+    Если хэш содержимого совпал с known_hash, расчёт пропускается и
+    возвращаются только новые метаданные. С профилем движка в хэш входит
+    и профиль: после смены профиля проекты пересчитываются.
+    """
+    row = dict.fromkeys(COLUMN_NAMES)
+    row.update(path=path, mtime_ns=mtime_ns, size=size, estimated_at=time.time())
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    digest = hashlib.sha256(content)
+    if profile is not None:
+        digest.update(json.dumps(profile.to_dict(), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    row["sha256"] = digest.hexdigest()
+    if row["sha256"] == known_hash:
+        return {"path": path, "mtime_ns": mtime_ns, "size": size, "unchanged": True}
+    try:
+        project = Project.from_dict(json.loads(content))
+        result = CalculationEngine(profile).calculate(project)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    row.update(
+        project_name=project.name,
+        function_count=project.get_function_count(),
+        total_volume=result.total_volume,
+        final_labor=result.final_labor,
+        total_duration=result.total_duration,
+        average_staff=result.average_staff,
+    )
+    return row
+
+
+def scan_directory(directory: str) -> dict[str, tuple[int, int]]:
+    """Файлы проектов каталога: путь -> (mtime_ns, размер)"""
+    found = {}
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            pending.append(entry.path)
+                    elif entry.name.endswith(PROJECT_SUFFIX) and not entry.name.startswith("."):
+                        st = entry.stat()
+                        found[entry.path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue  # Файл удалили во время обхода
+    return found
+
+
+class SummaryIndex:
+    """Сводный индекс проектов в SQLite"""
+
+    def __init__(self, db_path: str):
+        # Наблюдение может идти в отдельном потоке, а сводку читают из основного
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{name} {kind}" for name, kind in SUMMARY_COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS projects ({columns})")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def states(self) -> dict[str, tuple[int, int, Optional[str]]]:
+        """Известные файлы: путь -> (mtime_ns, размер, хэш)"""
+        rows = self._conn.execute("SELECT path, mtime_ns, size, sha256 FROM projects")
+        return {path: (mtime_ns, size, sha256) for path, mtime_ns, size, sha256 in rows}
+
+    def apply(self, rows: Iterable[dict], removed: Iterable[str] = ()) -> None:
+        """Записать изменения одной транзакцией"""
+        placeholders = ", ".join("?" * len(COLUMN_NAMES))
+        with self._conn:
+            self._conn.executemany("DELETE FROM projects WHERE path = ?", ((p,) for p in removed))
+            for row in rows:
+                if row.get("unchanged"):
+                    self._conn.execute("UPDATE projects SET mtime_ns = ?, size = ? WHERE path = ?",
+                                       (row["mtime_ns"], row["size"], row["path"]))
+                else:
+                    self._conn.execute(f"INSERT OR REPLACE INTO projects VALUES ({placeholders})",
+                                       [row[name] for name in COLUMN_NAMES])
+
+    def rows(self) -> list[tuple]:
+        return self._conn.execute(f"SELECT {', '.join(COLUMN_NAMES)} FROM projects ORDER BY path").fetchall()
+
+    def write_csv(self, file_path: str) -> None:
+        """Выгрузить сводку в CSV (атомарно)"""
+        temp_path = create_temp_file(file_path)
+        try:
+            with open(temp_path, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.writer(f, delimiter=";")
+                writer.writerow(COLUMN_NAMES)
+                writer.writerows(self.rows())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+
+@dataclass
+class SyncStats:
+    """Итог одной сверки каталога"""
+    scanned: int = 0  # Файлов проверено по метаданным
+    candidates: int = 0  # Изменились метаданные
+    estimated: int = 0  # Пересчитано
+    unchanged: int = 0  # Содержимое не изменилось
+    removed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.estimated or self.removed)
+
+    def format(self) -> str:
+        return (f"проверено {self.scanned}, пересчитано {self.estimated}, "
+                f"без изменений содержимого {self.unchanged}, удалено {self.removed} "
+                f"({self.seconds * 1000:.0f} мс)")
+
+
+class _Inotify:
+    """Минимальная обёртка inotify (Linux) через ctypes"""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.watches: dict[int, str] = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        return sys.platform.startswith("linux")
+
+    def watch_tree(self, directory: str) -> None:
+        """Подписаться на каталог и все вложенные (кроме скрытых)"""
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            wd = self._add_watch(self.fd, os.fsencode(root), self.MASK)
+            if wd >= 0:
+                self.watches[wd] = root
+
+    def read(self, timeout: float) -> Optional[set[str]]:
+        """Изменённые пути за время ожидания; None — нужна полная сверка"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        time.sleep(SETTLE_SECONDS)
+        paths: set[str] = set()
+        full_rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    full_rescan = True
+                elif mask & self.IN_ISDIR:
+                    # Новый/удалённый подкаталог: проще сверить всё дерево
+                    full_rescan = True
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and wd in self.watches:
+                        self.watch_tree(os.path.join(self.watches[wd], name))
+                elif wd in self.watches and name.endswith(PROJECT_SUFFIX):
+                    paths.add(os.path.join(self.watches[wd], name))
+        return None if full_rescan else paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ProjectWatcher:
+    """Поддержание сводки по каталогу проектов в актуальном состоянии"""
+
+    def __init__(self, directory: str, index_path: str, csv_path: Optional[str] = None,
+                 workers: Optional[int] = None, executor: Optional[Executor] = None,
+                 profile: Optional[EngineProfile] = None):
+        self.directory = os.path.abspath(directory)
+        self.profile = profile
+        self.index = SummaryIndex(index_path)
+        self.csv_path = csv_path
+        self._workers = workers
+        self._executor = executor
+        self._own_executor = executor is None
+        self._known = self.index.states()
+
+    def close(self) -> None:
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown()
+        self.index.close()
+
+    def __enter__(self) -> "ProjectWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _pool(self) -> Executor:
+        # Пул создаётся при первом изменении: пустой каталог не запускает процессов
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def sync(self, paths: Optional[Iterable[str]] = None) -> SyncStats:
+        """Сверить каталог (или только указанные файлы) с индексом"""
+        started = time.perf_counter()
+        stats = SyncStats()
+        if paths is None:
+            current = scan_directory(self.directory)
+            removed = [p for p in self._known if p not in current]
+        else:
+            current, removed = {}, []
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                    current[path] = (st.st_mtime_ns, st.st_size)
+                except FileNotFoundError:
+                    if path in self._known:
+                        removed.append(path)
+        stats.scanned = len(current)
+
+        candidates = [
+            (path, meta) for path, meta in current.items()
+            if path not in self._known or self._known[path][:2] != meta
+        ]
+        stats.candidates = len(candidates)
+        rows = []
+        if candidates:
+            known_hash = [self._known.get(path, (None, None, None))[2] for path, _ in candidates]
+            chunksize = max(1, len(candidates) // 64)
+            rows = list(self._pool().map(
+                estimate_file,
+                [path for path, _ in candidates],
+                [meta[0] for _, meta in candidates],
+                [meta[1] for _, meta in candidates],
+                known_hash,
+                repeat(self.profile),
+                chunksize=chunksize,
+            ))
+
+        if rows or removed:
+            self.index.apply(rows, removed)
+            for path in removed:
+                del self._known[path]
+            for row in rows:
+                sha256 = self._known[row["path"]][2] if row.get("unchanged") else row["sha256"]
+                self._known[row["path"]] = (row["mtime_ns"], row["size"], sha256)
+                if row.get("unchanged"):
+                    stats.unchanged += 1
+                else:
+                    stats.estimated += 1
+            stats.removed = len(removed)
+            if self.csv_path and stats.changed:
+                self.index.write_csv(self.csv_path)
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def run(self, interval: float = POLL_SECONDS, rescan: float = RESCAN_SECONDS,
+            use_inotify: bool = True, stop: Optional[threading.Event] = None,
+            on_sync=None) -> None:
+        """Следить за каталогом до установки stop (или Ctrl+C)"""
+        stop = stop or threading.Event()
+        notify = None
+        if use_inotify and _Inotify.available():
+            try:
+                notify = _Inotify()
+                notify.watch_tree(self.directory)
+            except OSError:
+                notify = None
+
+        def report(stats: SyncStats) -> None:
+            if on_sync is not None:
+                on_sync(stats)
+
+        report(self.sync())
+        next_full = time.monotonic() + rescan
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if notify is not None:
+                    # Ожидание короткими отрезками, чтобы вовремя заметить stop
+                    paths = notify.read(min(max(next_full - now, 0.0), 1.0))
+                    if paths is None or time.monotonic() >= next_full:
+                        stats = self.sync()
+                        next_full = time.monotonic() + rescan
+                    elif paths:
+                        stats = self.sync(paths)
+                    else:
+                        continue
+                else:
+                    # Опрос: каждый цикл — сверка по метаданным
+                    if stop.wait(interval):
+                        break
+                    stats = self.sync()
+                if stats.candidates or stats.removed:
+                    report(stats)
+        finally:
+            if notify is not None:
+                notify.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пересчёт изменённых проектов в каталоге")
+    parser.add_argument("directory", help="Каталог с файлами проектов (.json)")
+    parser.add_argument("--index", required=True, help="Файл сводного индекса (SQLite)")
+    parser.add_argument("--csv", help="Выгружать сводку в CSV после изменений")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов расчёта")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Интервал опроса, с")
+    parser.add_argument("--rescan", type=float, default=RESCAN_SECONDS, help="Полная сверка, с")
+    parser.add_argument("--no-inotify", action="store_true", help="Только опрос каталога")
+    parser.add_argument("--once", action="store_true", help="Одна сверка и выход")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    profile = profile_from_args(parser, args)
+
+    def on_sync(stats: SyncStats) -> None:
+        print(f"{time.strftime('%H:%M:%S')}  {stats.format()}", flush=True)
+
+    with ProjectWatcher(args.directory, args.index, args.csv, workers=args.workers,
+                        profile=profile) as watcher:
+        if args.once:
+            on_sync(watcher.sync())
+            return 0
+        try:
+            watcher.run(args.interval, args.rescan, use_inotify=not args.no_inotify, on_sync=on_sync)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Модель дерева каталога функций для диалога выбора
+
+Группы (тип операции -> категория) строятся по индексу каталога,
+а дочерние строки создаются лениво через fetchMore — только когда
+представление раскрывает группу или прокручивает её содержимое.
+"""
+
+from typing import Optional
+
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex, Signal
+
+from ..models.function_catalog import FunctionInfo, CatalogIndex
+
+
+class _Node:
+    """Узел дерева: группа (тип операции/категория) или функция"""
+
+    __slots__ = ("label", "parent", "row", "children", "pending", "func")
+
+    def __init__(self, label: str, parent: Optional["_Node"], row: int,
+                 pending: Optional[list] = None, func: Optional[FunctionInfo] = None):
+        self.label = label
+        self.parent = parent
+        self.row = row
+        self.children: list["_Node"] = []
+        self.pending = pending or []  # Ещё не созданные дочерние элементы
+        self.func = func
+
+
+class CatalogTreeModel(QAbstractItemModel):
+    """Дерево каталога функций с отметками и ленивой загрузкой"""
+
+    HEADERS = ["✓", "Функция", "Объём", "Тип"]
+
+    # Сколько дочерних строк создаётся за один вызов fetchMore
+    FETCH_BATCH = 100
+
+    check_state_changed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = _Node("", None, 0)
+        self._functions: list[FunctionInfo] = []
+        self._checked: set[str] = set()
+
+    # --- Наполнение ---
+
+    def set_functions(self, functions: list[FunctionInfo]) -> None:
+        """Показать отфильтрованный список функций (отметки сбрасываются)"""
+        self.beginResetModel()
+        self._functions = functions
+        self._checked.clear()
+        self._root = _Node("", None, 0)
+        for row, (op_name, categories) in enumerate(CatalogIndex.group(functions)):
+            self._root.children.append(_Node(op_name, self._root, row, pending=categories))
+        self.endResetModel()
+
+    def functions(self) -> list[FunctionInfo]:
+        """Все функции текущего фильтра (включая ещё не загруженные)"""
+        return list(self._functions)
+
+    def first_function_index(self) -> QModelIndex:
+        """Индекс первой функции (с загрузкой нужных групп)"""
+        node = self._root
+        parent = QModelIndex()
+        while node.func is None:
+            if not node.children and node.pending:
+                self.fetchMore(parent)
+            if not node.children:
+                return QModelIndex()
+            node = node.children[0]
+            parent = self.createIndex(0, 0, node)
+        return self.createIndex(node.row, 1, node)
+
+    # --- Отметки ---
+
+    def has_checked(self) -> bool:
+        """Есть ли отмеченные функции"""
+        return bool(self._checked)
+
+    def checked_functions(self) -> list[FunctionInfo]:
+        """Отмеченные функции в порядке каталога"""
+        return [f for f in self._functions if f.id in self._checked]
+
+    def set_all_checked(self, checked: bool) -> None:
+        """Отметить или снять отметку со всех функций текущего фильтра"""
+        if checked:
+            self._checked = {f.id for f in self._functions}
+        else:
+            self._checked.clear()
+        self._emit_checks_changed(self._root)
+        self.check_state_changed.emit()
+
+    def _emit_checks_changed(self, node: _Node) -> None:
+        """Перерисовать столбец отметок у уже созданных строк"""
+        if node.children and node.children[0].func is not None:
+            parent = self.createIndex(node.row, 0, node)
+            self.dataChanged.emit(
+                self.index(0, 0, parent),
+                self.index(len(node.children) - 1, 0, parent),
+                [Qt.CheckStateRole],
+            )
+            return
+        for child in node.children:
+            self._emit_checks_changed(child)
+
+    # --- QAbstractItemModel ---
+
+    def _node(self, index: QModelIndex) -> _Node:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        node = self._node(parent)
+        if 0 <= row < len(node.children) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, node.children[row])
+        return QModelIndex()
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        node = self._node(parent)
+        return bool(node.children or node.pending)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self._node(parent)
+        return len(node.children) < len(node.pending)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        node = self._node(parent)
+        start = len(node.children)
+        end = min(start + self.FETCH_BATCH, len(node.pending))
+        if start >= end:
+            return
+
+        self.beginInsertRows(parent, start, end - 1)
+        for row in range(start, end):
+            item = node.pending[row]
+            if isinstance(item, FunctionInfo):
+                node.children.append(_Node("", node, row, func=item))
+            else:
+                label, children = item
+                node.children.append(_Node(label, node, row, pending=children))
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer().func is None:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        func = node.func
+        column = index.column()
+
+        if func is None:
+            if role == Qt.DisplayRole and column == 1:
+                return node.label
+            return None
+
+        if role == Qt.DisplayRole:
+            if column == 1:
+                return f"{func.id} {func.name}{func.type_marker}"
+            if column == 2:
+                return func.volume_range
+            if column == 3:
+                return func.operation_type.value[:10]
+        elif role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if func.id in self._checked else Qt.Unchecked
+        elif role == Qt.UserRole and column == 1:
+            return func
+        return None
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        func = index.internalPointer().func
+        if func is None:
+            return False
+
+        if Qt.CheckState(value) == Qt.Checked:
+            self._checked.add(func.id)
+        else:
+            self._checked.discard(func.id)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.check_state_changed.emit()
+        return True
@@ -1,76 +1,150 @@
 # -*- coding: utf-8 -*-
 """
 Виджет для отображения диаграмм
+
+Диаграммы рисуются matplotlib (Agg) в фоновом потоке и показываются
+готовым изображением. Изображения кэшируются по хэшу данных и размера,
+а при повторной отрисовке renderer обновляет существующие сектора и
+столбцы вместо пересоздания фигуры.
 """
 
-from typing import Dict
+import hashlib
+import importlib.util
+import math
+from collections import OrderedDict
+from typing import Dict, Optional
 
-from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QImage, QPixmap
 
-try:
-    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-    from matplotlib.figure import Figure
-    import matplotlib.pyplot as plt
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+# matplotlib импортируется при первой отрисовке (в потоке отрисовки),
+# чтобы не замедлять запуск приложения
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec("matplotlib") is not None
 
 
-class ChartWidget(QWidget):
-    """Виджет для отображения диаграмм matplotlib"""
+# Цвета секторов с хорошим контрастом
+PIE_COLORS = ['#1565C0', '#2E7D32', '#E65100', '#6A1B9A', '#00838F']
 
-    def __init__(self, chart_type: str = "pie", parent=None):
-        super().__init__(parent)
+# Сколько столбцов показывать до объединения остальных в «Прочие»
+MAX_BARS = 15
+
+DPI = 110
+
+# Кэш готовых изображений: ключ — хэш данных и размера
+IMAGE_CACHE_SIZE = 32
+_image_cache: "OrderedDict[str, QImage]" = OrderedDict()
+
+_render_pool: Optional[QThreadPool] = None
+
+
+def _get_render_pool() -> QThreadPool:
+    """Пул отрисовки диаграмм: один поток, т.к. matplotlib не потокобезопасен"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = QThreadPool()
+        _render_pool.setMaxThreadCount(1)
+    return _render_pool
+
+
+def aggregate_top_n(data: Dict[str, float], max_items: int = MAX_BARS) -> Dict[str, float]:
+    """Оставить max_items - 1 крупнейших значений, остальные объединить в «Прочие»"""
+    if len(data) <= max_items:
+        return dict(data)
+
+    items = sorted(data.items(), key=lambda kv: kv[1], reverse=True)
+    top = dict(items[:max_items - 1])
+    rest = items[max_items - 1:]
+    top[f"Прочие ({len(rest)})"] = sum(value for _, value in rest)
+    return top
+
+
+def chart_key(chart_type: str, data: Dict[str, float], title: str, width: int, height: int) -> str:
+    """Ключ кэша изображения диаграммы"""
+    payload = repr((chart_type, title, width, height, tuple(data.items())))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ChartRenderer:
+    """Отрисовка одной диаграммы на холсте Agg с повторным использованием элементов
+
+    Не зависит от Qt; используется только из потока отрисовки.
+    """
+
+    def __init__(self, chart_type: str):
         self.chart_type = chart_type
-        self._setup_ui()
+        self.figure = None  # Создаётся при первой отрисовке
+        self.canvas = None
+        self._ax = None
+        self._labels: Optional[list[str]] = None
+        self._title: Optional[str] = None
+        self._size: Optional[tuple[int, int]] = None
+        self._wedges = []
+        self._autotexts = []
+        self._bars = []
+        self._bar_texts = []
+        self._background = None  # Фон для блиттинга (всё, кроме данных)
 
-    def _setup_ui(self):
-        """Настройка интерфейса"""
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
+    def render(self, data: Dict[str, float], title: str, width: int, height: int) -> tuple[bytes, int, int]:
+        """Нарисовать диаграмму и вернуть RGBA-буфер с размерами"""
+        if self.figure is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.figure = Figure(figsize=(6, 5), dpi=DPI)
+            self.canvas = FigureCanvasAgg(self.figure)
 
-        if MATPLOTLIB_AVAILABLE:
-            # Шрифты и контраст для читаемости
-            plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif']
-            plt.rcParams['font.size'] = 10
-            plt.rcParams['axes.titlesize'] = 12
-            plt.rcParams['axes.labelsize'] = 11
-
-            self.figure = Figure(figsize=(6, 5), dpi=110)
-            self.canvas = FigureCanvas(self.figure)
-            layout.addWidget(self.canvas)
+        size = (max(width, 50), max(height, 50))
+        if size != self._size:
+            self.figure.set_size_inches(size[0] / DPI, size[1] / DPI)
+            self._size = size
+            self._labels = None  # Компоновка зависит от размера — строим заново
+
+        labels = list(data.keys())
+        values = list(data.values())
+
+        if self.chart_type == "pie":
+            self._render_pie(labels, values, title)
         else:
-            from PySide6.QtWidgets import QLabel
-            label = QLabel("Для отображения диаграмм установите matplotlib")
-            label.setStyleSheet("color: gray; font-style: italic;")
-            layout.addWidget(label)
+            self._render_bar(labels, values, title)
+
+        buffer = self.canvas.buffer_rgba()
+        w, h = self.canvas.get_width_height()
+        return bytes(buffer), w, h
 
     def clear(self):
-        """Очистить диаграмму"""
-        if MATPLOTLIB_AVAILABLE:
+        """Сбросить фигуру"""
+        if self.figure is not None:
             self.figure.clear()
-            self.canvas.draw()
+        self._ax = None
+        self._labels = None
+        self._background = None
+        self._wedges = []
+        self._autotexts = []
+        self._bars = []
+        self._bar_texts = []
 
-    def update_pie_chart(self, data: Dict[str, float], title: str = ""):
-        """Обновить круговую диаграмму (читаемые подписи и проценты)"""
-        if not MATPLOTLIB_AVAILABLE:
+    # --- Круговая диаграмма ---
+
+    def _render_pie(self, labels: list[str], values: list[float], title: str):
+        total = sum(values)
+        if labels == self._labels and title == self._title and total > 0 and self._wedges:
+            # Те же подписи — обновляем сектора и проценты на месте и блиттим
+            self._update_pie(values, total)
+            self.canvas.restore_region(self._background)
+            for artist in self._wedges + self._autotexts:
+                self._ax.draw_artist(artist)
             return
 
-        self.figure.clear()
+        self.clear()
         ax = self.figure.add_subplot(111)
+        self._ax = ax
 
-        if data:
-            labels = list(data.keys())
-            values = list(data.values())
-
-            # Цвета с хорошим контрастом
-            colors = ['#1565C0', '#2E7D32', '#E65100', '#6A1B9A', '#00838F']
-
-            wedges, texts, autotexts = ax.pie(
+        if labels and total > 0:
+            wedges, _, autotexts = ax.pie(
                 values,
                 labels=None,
                 autopct='%1.1f%%',
-                colors=colors[:len(values)],
+                colors=PIE_COLORS[:len(values)],
                 startangle=90,
                 pctdistance=0.75,
                 labeldistance=1.05,
@@ -99,24 +173,59 @@ class ChartWidget(QWidget):
             if title:
                 ax.set_title(title, fontsize=13, fontweight='bold', color='#212121')
 
-            ax.set_facecolor('#FFFFFF')
-            self.figure.patch.set_facecolor('#FFFFFF')
+            self._wedges = list(wedges)
+            self._autotexts = list(autotexts)
 
+        ax.set_facecolor('#FFFFFF')
+        self.figure.patch.set_facecolor('#FFFFFF')
         self.figure.tight_layout()
+
+        # Фон без данных — для последующих обновлений блиттингом
+        for artist in self._wedges + self._autotexts:
+            artist.set_visible(False)
         self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._wedges + self._autotexts:
+            artist.set_visible(True)
+            ax.draw_artist(artist)
 
-    def update_bar_chart(self, data: Dict[str, float], title: str = ""):
-        """Обновить столбчатую диаграмму"""
-        if not MATPLOTLIB_AVAILABLE:
+        self._labels = labels
+        self._title = title
+
+    def _update_pie(self, values: list[float], total: float):
+        """Пересчитать углы существующих секторов (как в Axes.pie)"""
+        theta1 = 90.0
+        for wedge, text, value in zip(self._wedges, self._autotexts, values):
+            theta2 = theta1 + 360.0 * value / total
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+
+            angle = math.radians((theta1 + theta2) / 2)
+            center = wedge.center
+            radius = wedge.r * 0.75  # pctdistance
+            text.set_position((center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle)))
+            text.set_text('%1.1f%%' % (100.0 * value / total))
+            theta1 = theta2
+
+    # --- Столбчатая диаграмма ---
+
+    def _render_bar(self, labels: list[str], values: list[float], title: str):
+        if labels == self._labels and title == self._title and self._bars:
+            # Те же столбцы — меняем высоты и подписи значений
+            for bar, text, value in zip(self._bars, self._bar_texts, values):
+                bar.set_height(value)
+                text.set_y(value)
+                text.set_text(f'{value:.0f}')
+            self._ax.relim()
+            self._ax.autoscale_view()
+            self.canvas.draw()
             return
 
-        self.figure.clear()
+        self.clear()
         ax = self.figure.add_subplot(111)
+        self._ax = ax
 
-        if data:
-            labels = list(data.keys())
-            values = list(data.values())
-
+        if labels:
             short_labels = [l[:15] + "…" if len(l) > 15 else l for l in labels]
 
             bars = ax.bar(range(len(values)), values, color='#1565C0')
@@ -130,7 +239,7 @@ class ChartWidget(QWidget):
                 ax.set_title(title, fontsize=13, fontweight='bold', color='#212121')
 
             for bar, value in zip(bars, values):
-                ax.text(
+                text = ax.text(
                     bar.get_x() + bar.get_width() / 2,
                     bar.get_height(),
                     f'{value:.0f}',
@@ -139,9 +248,178 @@ class ChartWidget(QWidget):
                     fontweight='bold',
                     color='#212121',
                 )
+                self._bar_texts.append(text)
+            self._bars = list(bars)
 
-            ax.set_facecolor('#FFFFFF')
-            self.figure.patch.set_facecolor('#FFFFFF')
-
+        ax.set_facecolor('#FFFFFF')
+        self.figure.patch.set_facecolor('#FFFFFF')
         self.figure.tight_layout()
         self.canvas.draw()
+
+        self._labels = labels
+        self._title = title
+
+
+class _RenderSignals(QObject):
+    """Сигналы задачи отрисовки"""
+    finished = Signal(int, str, QImage)  # Поколение, ключ кэша, изображение
+    failed = Signal(int, str)  # Поколение, текст ошибки
+
+
+class _RenderWorker(QRunnable):
+    """Задача отрисовки диаграммы в пуле потоков"""
+
+    def __init__(self, renderer: ChartRenderer, generation: int, key: str,
+                 data: Dict[str, float], title: str, width: int, height: int):
+        super().__init__()
+        self.renderer = renderer
+        self.generation = generation
+        self.key = key
+        self.data = data
+        self.title = title
+        self.width = width
+        self.height = height
+        self.signals = _RenderSignals()
+
+    def run(self):
+        try:
+            buffer, w, h = self.renderer.render(self.data, self.title, self.width, self.height)
+            image = QImage(buffer, w, h, QImage.Format_RGBA8888).copy()
+        except Exception as e:
+            # Сбрасываем состояние renderer, иначе следующая отрисовка упадёт так же
+            self.renderer.clear()
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.finished.emit(self.generation, self.key, image)
+
+
+class ChartWidget(QWidget):
+    """Виджет для отображения диаграмм matplotlib"""
+
+    def __init__(self, chart_type: str = "pie", parent=None):
+        super().__init__(parent)
+        self.chart_type = chart_type
+        self._renderer: Optional[ChartRenderer] = None
+        self._data: Optional[Dict[str, float]] = None
+        self._title = ""
+        self._generation = 0
+        self._rendering = False  # Отрисовка в процессе — новая ставится в очередь
+        self._render_pending = False
+        self._worker: Optional[_RenderWorker] = None
+
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(100)
+        self._resize_timer.timeout.connect(self._request_render)
+
+        self._setup_ui()
+
+    def _setup_ui(self):
+        """Настройка интерфейса"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        if MATPLOTLIB_AVAILABLE:
+            self.image_label = QLabel()
+            self.image_label.setAlignment(Qt.AlignCenter)
+            self.image_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+            layout.addWidget(self.image_label)
+        else:
+            label = QLabel("Для отображения диаграмм установите matplotlib")
+            label.setStyleSheet("color: gray; font-style: italic;")
+            layout.addWidget(label)
+
+    def clear(self):
+        """Очистить диаграмму"""
+        if MATPLOTLIB_AVAILABLE:
+            self._data = None
+            self._generation += 1
+            self.image_label.clear()
+
+    def update_pie_chart(self, data: Dict[str, float], title: str = ""):
+        """Обновить круговую диаграмму (читаемые подписи и проценты)"""
+        if not MATPLOTLIB_AVAILABLE:
+            return
+        self._set_data(dict(data), title)
+
+    def update_bar_chart(self, data: Dict[str, float], title: str = ""):
+        """Обновить столбчатую диаграмму (мелкие значения объединяются в «Прочие»)"""
+        if not MATPLOTLIB_AVAILABLE:
+            return
+        self._set_data(aggregate_top_n(data), title)
+
+    def _set_data(self, data: Dict[str, float], title: str):
+        self._data = data
+        self._title = title
+        self._generation += 1
+        self._request_render()
+
+    def _render_size(self) -> tuple[int, int]:
+        ratio = self.devicePixelRatioF()
+        return int(self.width() * ratio), int(self.height() * ratio)
+
+    def _request_render(self):
+        """Показать изображение из кэша или поставить отрисовку в пул"""
+        if self._data is None:
+            return
+
+        width, height = self._render_size()
+        key = chart_key(self.chart_type, self._data, self._title, width, height)
+        image = _image_cache.get(key)
+        if image is not None:
+            _image_cache.move_to_end(key)
+            self._show_image(image)
+            return
+
+        if self._rendering:
+            self._render_pending = True
+            return
+
+        if self._renderer is None:
+            self._renderer = ChartRenderer(self.chart_type)
+
+        self._rendering = True
+        worker = _RenderWorker(
+            self._renderer, self._generation, key, self._data, self._title, width, height
+        )
+        worker.signals.finished.connect(self._on_render_finished)
+        worker.signals.failed.connect(self._on_render_failed)
+        self._worker = worker
+        _get_render_pool().start(worker)
+
+    def _on_render_finished(self, generation: int, key: str, image: QImage):
+        self._rendering = False
+
+        _image_cache[key] = image
+        _image_cache.move_to_end(key)
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+
+        if generation == self._generation:
+            self._show_image(image)
+
+        if self._render_pending or generation != self._generation:
+            self._render_pending = False
+            self._request_render()
+
+    def _on_render_failed(self, generation: int, message: str):
+        """Ошибка отрисовки: снять признак отрисовки, чтобы диаграмма продолжала обновляться"""
+        self._rendering = False
+        if self._render_pending or generation != self._generation:
+            self._render_pending = False
+            self._request_render()
+
+    def _show_image(self, image: QImage):
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.image_label.setPixmap(pixmap)
+
+    def wait_for_render(self):
+        """Дождаться завершения отрисовки (для тестов и экспорта изображений)"""
+        _get_render_pool().waitForDone()
+
+    def resizeEvent(self, event):
+        """При изменении размера — отложенная перерисовка под новый размер"""
+        super().resizeEvent(event)
+        if MATPLOTLIB_AVAILABLE and self._data is not None:
+            self._resize_timer.start()
@@ -11,6 +11,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 
 from ..models.project import Project
+from ..change_bus import ChangeKind
 from ..models.coefficients import (
     NOVELTY_COEFFICIENTS,
     RELIABILITY_COEFFICIENTS,
@@ -62,7 +63,7 @@ class CoefficientComboBox(QComboBox):
 class CoefficientsPanelWidget(QWidget):
     """Панель выбора коэффициентов"""
 
-    data_changed = Signal()
+    data_changed = Signal(object)  # ChangeKind
 
     def __init__(self, project: Project, parent=None):
         super().__init__(parent)
@@ -324,32 +325,32 @@ class CoefficientsPanelWidget(QWidget):
     def _on_novelty_changed(self):
         if not self._updating:
             self.project.coefficients.novelty = self.novelty_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_reliability_changed(self):
         if not self._updating:
             self.project.coefficients.reliability = self.reliability_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_performance_changed(self):
         if not self._updating:
             self.project.coefficients.performance = self.performance_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_documentation_changed(self):
         if not self._updating:
             self.project.coefficients.documentation = self.documentation_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_dev_experience_changed(self):
         if not self._updating:
             self.project.coefficients.dev_experience = self.dev_experience_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_structure_changed(self):
         if not self._updating:
             self.project.coefficients.structure = self.structure_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_tech_changed(self, item: QListWidgetItem):
         if not self._updating:
@@ -359,64 +360,64 @@ class CoefficientsPanelWidget(QWidget):
                 if it.checkState() == Qt.Checked:
                     techs.append(it.data(Qt.UserRole))
             self.project.coefficients.interaction_technologies = techs
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_deadline_changed(self):
         if not self._updating:
             self.project.coefficients.deadline = self.deadline_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_analyst_qual_changed(self):
         if not self._updating:
             self.project.coefficients.analyst_qualification = self.analyst_qual_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_analyst_exp_changed(self):
         if not self._updating:
             self.project.coefficients.analyst_experience = self.analyst_exp_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_designer_qual_changed(self):
         if not self._updating:
             self.project.coefficients.designer_qualification = self.designer_qual_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_designer_exp_changed(self):
         if not self._updating:
             self.project.coefficients.designer_experience = self.designer_exp_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_design_tools_changed(self):
         if not self._updating:
             self.project.coefficients.design_tools = self.design_tools_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_programmer_qual_changed(self):
         if not self._updating:
             self.project.coefficients.programmer_qualification = self.programmer_qual_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_ide_changed(self):
         if not self._updating:
             self.project.coefficients.ide = self.ide_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_tester_qual_changed(self):
         if not self._updating:
             self.project.coefficients.tester_qualification = self.tester_qual_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_testing_tools_changed(self):
         if not self._updating:
             self.project.coefficients.testing_tools = self.testing_tools_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_db_size_changed(self):
         if not self._updating:
             self.project.coefficients.db_size = self.db_size_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
 
     def _on_deploy_qual_changed(self):
         if not self._updating:
             self.project.coefficients.deployment_qualification = self.deploy_qual_combo.currentText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.COEFFICIENTS)
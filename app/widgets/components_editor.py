@@ -9,7 +9,7 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
     QTreeWidget, QTreeWidgetItem, QGroupBox, QFormLayout,
     QLineEdit, QTextEdit, QSpinBox, QDoubleSpinBox, QComboBox,
-    QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+    QPushButton, QLabel, QTableView, QAbstractItemView,
     QHeaderView, QMessageBox, QDialog
 )
 from PySide6.QtCore import Qt, Signal
@@ -20,13 +20,15 @@ from ..models.coefficients import (
     TRANSLATION_COEFFICIENTS, DEVELOPER_EXPERIENCE,
     COMPLEXITY_LEVELS, get_complexity_description
 )
+from ..change_bus import ChangeKind
 from .function_selector import FunctionSelectorDialog
+from .summary_model import FunctionSummaryModel, FunctionSummaryProxyModel
 
 
 class ComponentsEditorWidget(QWidget):
     """Редактор компонентов и функций"""
 
-    data_changed = Signal()
+    data_changed = Signal(object)  # ChangeKind
 
     def __init__(self, project: Project, parent=None):
         super().__init__(parent)
@@ -189,13 +191,19 @@ class ComponentsEditorWidget(QWidget):
         summary_group = QGroupBox("Сводка по функциям")
         summary_layout = QVBoxLayout(summary_group)
 
-        self.summary_table = QTableWidget()
-        self.summary_table.setColumnCount(6)
-        self.summary_table.setHorizontalHeaderLabels([
-            "Функция", "Vi", "ri", "ki", "Vm", "Vk"
-        ])
+        # Модель отдаёт данные только для видимых строк, сортировка — через прокси
+        self.summary_model = FunctionSummaryModel(self)
+        self.summary_proxy = FunctionSummaryProxyModel(self)
+        self.summary_proxy.setSourceModel(self.summary_model)
+
+        self.summary_table = QTableView()
+        self.summary_table.setModel(self.summary_proxy)
+        self.summary_table.setSortingEnabled(True)
+        self.summary_table.sortByColumn(-1, Qt.AscendingOrder)
         self.summary_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # Фиксированная высота строк — представлению не нужно измерять каждую строку
+        self.summary_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.summary_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         summary_layout.addWidget(self.summary_table)
 
         right_layout.addWidget(summary_group)
@@ -262,39 +270,21 @@ class ComponentsEditorWidget(QWidget):
             return
 
     def _refresh_summary(self):
-        """Обновление сводной таблицы"""
-        functions = self.project.get_all_functions()
-        self.summary_table.setRowCount(len(functions))
-
-        from ..models.coefficients import (
-            COMPLEXITY_COEFFICIENTS, DEV_ENVIRONMENT_COEFFICIENTS, DEVELOPER_EXPERIENCE
-        )
-
-        for row, func in enumerate(functions):
-            # Название
-            self.summary_table.setItem(row, 0, QTableWidgetItem(
-                f"{func.function_id} {func.function_name[:30]}"
-            ))
-
-            # Vi
-            self.summary_table.setItem(row, 1, QTableWidgetItem(str(func.volume)))
+        """Обновление сводной таблицы (при изменении структуры проекта)"""
+        self.summary_model.set_functions(self.project.get_all_functions())
 
-            # ri
-            self.summary_table.setItem(row, 2, QTableWidgetItem(str(func.reuse_count)))
-
-            # ki
-            self.summary_table.setItem(row, 3, QTableWidgetItem(f"{func.reuse_coefficient:.2f}"))
+    def _refresh_current_function(self):
+        """Обновить строку текущей функции в дереве и сводке без полной перестройки"""
+        func = self._current_function
+        if not func:
+            return
 
-            # Vm = Vi * ri * ki
-            vm = func.volume * func.reuse_count * func.reuse_coefficient
-            self.summary_table.setItem(row, 4, QTableWidgetItem(f"{vm:.0f}"))
+        self.summary_model.invalidate_function(func)
 
-            # Vk = Vm * K_slozhn * K_sr_razr * K_opyt
-            k_slozhn = COMPLEXITY_COEFFICIENTS.get(func.complexity_level, 1.00)
-            k_sr_razr = DEV_ENVIRONMENT_COEFFICIENTS.get(func.language, 1.00)
-            k_opyt = DEVELOPER_EXPERIENCE.get(func.developer_experience, 1.00)
-            vk = vm * k_slozhn * k_sr_razr * k_opyt
-            self.summary_table.setItem(row, 5, QTableWidgetItem(f"{vk:.0f}"))
+        item = self.tree.currentItem()
+        data = item.data(0, Qt.UserRole) if item else None
+        if data and data[0] == "function" and data[2] == func.id:
+            item.setText(1, str(func.volume * func.reuse_count))
 
     def _on_selection_changed(self):
         """Обработка изменения выбора в дереве"""
@@ -408,7 +398,7 @@ class ComponentsEditorWidget(QWidget):
         """Добавление нового компонента"""
         component = self.project.add_component()
         self._refresh_tree()
-        self.data_changed.emit()
+        self.data_changed.emit(ChangeKind.STRUCTURE)
 
         # Выбираем новый компонент
         for i in range(self.tree.topLevelItemCount()):
@@ -425,7 +415,7 @@ class ComponentsEditorWidget(QWidget):
             if not self.project.components:
                 component = self.project.add_component()
                 self._refresh_tree()
-                self.data_changed.emit()
+                self.data_changed.emit(ChangeKind.STRUCTURE)
                 self._current_component = component
                 # Выбираем новый компонент в дереве
                 for i in range(self.tree.topLevelItemCount()):
@@ -470,7 +460,7 @@ class ComponentsEditorWidget(QWidget):
                 added.append(func_instance)
 
             self._refresh_tree()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.STRUCTURE)
 
             # Выбираем последнюю добавленную функцию
             if added:
@@ -507,7 +497,7 @@ class ComponentsEditorWidget(QWidget):
                 self.project.remove_component(data[1])
                 self._current_component = None
                 self._refresh_tree()
-                self.data_changed.emit()
+                self.data_changed.emit(ChangeKind.STRUCTURE)
 
         elif data[0] == "function":
             component = self.project.get_component(data[1])
@@ -515,7 +505,7 @@ class ComponentsEditorWidget(QWidget):
                 component.remove_function(data[2])
                 self._current_function = None
                 self._refresh_tree()
-                self.data_changed.emit()
+                self.data_changed.emit(ChangeKind.STRUCTURE)
 
     def _copy_selected(self):
         """Копирование выбранного элемента"""
@@ -549,7 +539,7 @@ class ComponentsEditorWidget(QWidget):
                     new_comp.add_function(new_func)
                 self.project.add_component(new_comp)
                 self._refresh_tree()
-                self.data_changed.emit()
+                self.data_changed.emit(ChangeKind.STRUCTURE)
 
         elif data[0] == "function":
             component = self.project.get_component(data[1])
@@ -569,7 +559,7 @@ class ComponentsEditorWidget(QWidget):
                         )
                         component.add_function(new_func)
                         self._refresh_tree()
-                        self.data_changed.emit()
+                        self.data_changed.emit(ChangeKind.STRUCTURE)
                         break
 
     # Обработчики изменений компонента
@@ -577,18 +567,18 @@ class ComponentsEditorWidget(QWidget):
         if not self._updating and self._current_component:
             self._current_component.name = text
             self._refresh_tree()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.STRUCTURE)
 
     def _on_component_desc_changed(self):
         if not self._updating and self._current_component:
             self._current_component.description = self.comp_desc_edit.toPlainText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.DESCRIPTION)
 
     # Обработчики изменений функции
     def _on_function_desc_changed(self):
         if not self._updating and self._current_function:
             self._current_function.description = self.func_desc_edit.toPlainText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.DESCRIPTION)
 
     def _on_function_volume_changed(self, value: int):
         if not self._updating and self._current_function:
@@ -602,39 +592,37 @@ class ComponentsEditorWidget(QWidget):
                 else:
                     self.func_volume_spin.setStyleSheet("")
 
-            self._refresh_tree()
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
 
     def _on_function_language_changed(self, text: str):
         if not self._updating and self._current_function:
             self._current_function.language = text
             self._update_language_coefficients()
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
 
     def _on_function_reuse_count_changed(self, value: int):
         if not self._updating and self._current_function:
             self._current_function.reuse_count = value
-            self._refresh_tree()
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
 
     def _on_function_reuse_coef_changed(self, value: float):
         if not self._updating and self._current_function:
             self._current_function.reuse_coefficient = value
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
 
     def _on_function_complexity_changed(self, index: int):
         if not self._updating and self._current_function:
             self._current_function.complexity_level = self.func_complexity_combo.currentData()
             self._update_complexity_hint()
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
 
     def _on_function_experience_changed(self, text: str):
         if not self._updating and self._current_function:
             self._current_function.developer_experience = text
-            self._refresh_summary()
-            self.data_changed.emit()
+            self._refresh_current_function()
+            self.data_changed.emit(ChangeKind.FUNCTION)
@@ -4,30 +4,32 @@
 """
 
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QTreeWidget, QTreeWidgetItem,
+    QDialog, QVBoxLayout, QHBoxLayout, QTreeView,
     QLineEdit, QComboBox, QDialogButtonBox, QLabel, QGroupBox,
     QFormLayout, QPushButton, QAbstractItemView
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, QModelIndex
 
-from typing import Optional, List
+from typing import List
 
 from ..models.function_catalog import (
-    FUNCTION_CATALOG, FunctionInfo, OperationType,
-    get_functions_by_operation_type, search_functions
+    FunctionInfo, OperationType, CatalogIndex, get_catalog_index
 )
+from .catalog_model import CatalogTreeModel
 
 
 class FunctionSelectorDialog(QDialog):
     """Диалог выбора функций из каталога (поддержка мультивыбора и групп)"""
 
-    def __init__(self, parent=None):
+    # Задержка применения поиска после последнего нажатия клавиши, мс
+    SEARCH_DELAY_MS = 200
+
+    def __init__(self, parent=None, catalog: CatalogIndex = None):
         super().__init__(parent)
         self.selected_functions: List[FunctionInfo] = []
-        self._block_item_changed = False
+        self.catalog = catalog if catalog is not None else get_catalog_index()
         self._setup_ui()
-        self._populate_tree()
-        self._select_first_function()
+        self._apply_filter()
 
     def _setup_ui(self):
         """Настройка интерфейса"""
@@ -46,6 +48,12 @@ class FunctionSelectorDialog(QDialog):
         self.search_edit.textChanged.connect(self._on_search)
         filter_layout.addWidget(self.search_edit)
 
+        # Поиск применяется после паузы в наборе, а не на каждое нажатие
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._apply_filter)
+
         # Фильтр по типу операции
         filter_layout.addWidget(QLabel("Тип операции:"))
         self.type_combo = QComboBox()
@@ -58,15 +66,18 @@ class FunctionSelectorDialog(QDialog):
         layout.addLayout(filter_layout)
 
         # Дерево функций: чекбоксы для мультивыбора (работает на всех ОС)
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["✓", "Функция", "Объём", "Тип"])
+        self.model = CatalogTreeModel(self)
+        self.model.check_state_changed.connect(self._on_check_state_changed)
+
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setUniformRowHeights(True)
         self.tree.setColumnWidth(0, 28)
         self.tree.setColumnWidth(1, 470)
         self.tree.setColumnWidth(2, 100)
         self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.tree.itemDoubleClicked.connect(self._on_item_double_clicked)
-        self.tree.itemSelectionChanged.connect(self._on_selection_changed)
-        self.tree.itemChanged.connect(self._on_item_changed)
+        self.tree.doubleClicked.connect(self._on_item_double_clicked)
+        self.tree.selectionModel().selectionChanged.connect(self._on_selection_changed)
         layout.addWidget(self.tree)
 
         # Информация о выбранных функциях
@@ -116,135 +127,61 @@ class FunctionSelectorDialog(QDialog):
         self.ok_button.setText("Добавить выбранные")
         layout.addWidget(button_box)
 
-    def _populate_tree(self, functions: list[FunctionInfo] = None):
-        """Заполнение дерева функций"""
-        self.tree.clear()
-
-        if functions is None:
-            functions = FUNCTION_CATALOG
-
-        # Группируем по типу операции
-        by_operation = {}
-        for func in functions:
-            op_name = func.operation_type.value
-            if op_name not in by_operation:
-                by_operation[op_name] = {}
-            category = func.category or "Прочее"
-            if category not in by_operation[op_name]:
-                by_operation[op_name][category] = []
-            by_operation[op_name][category].append(func)
-
-        # Создаём иерархию (4 колонки: чекбокс, название, объём, тип)
-        self._block_item_changed = True
-        try:
-            for op_name, categories in sorted(by_operation.items()):
-                op_item = QTreeWidgetItem(["", op_name, "", ""])
-                op_item.setFlags(op_item.flags() & ~Qt.ItemIsSelectable)
-                self.tree.addTopLevelItem(op_item)
-
-                for category, funcs in sorted(categories.items()):
-                    cat_item = QTreeWidgetItem(["", category, "", ""])
-                    cat_item.setFlags(cat_item.flags() & ~Qt.ItemIsSelectable)
-                    op_item.addChild(cat_item)
-
-                    for func in funcs:
-                        func_item = QTreeWidgetItem([
-                            "",
-                            f"{func.id} {func.name}{func.type_marker}",
-                            func.volume_range,
-                            func.operation_type.value[:10]
-                        ])
-                        func_item.setData(1, Qt.UserRole, func)
-                        func_item.setFlags(
-                            func_item.flags() | Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
-                        )
-                        func_item.setCheckState(0, Qt.Unchecked)
-                        cat_item.addChild(func_item)
-
-                op_item.setExpanded(True)
-        finally:
-            self._block_item_changed = False
+    def _apply_filter(self):
+        """Применить поиск и фильтр по типу операции к модели дерева"""
+        self._search_timer.stop()
+        functions = self.catalog.filter(self.search_edit.text(), self.type_combo.currentData())
+        self.model.set_functions(functions)
+
+        # Раскрываем типы операций (категории загружаются лениво)
+        for row in range(self.model.rowCount()):
+            self.tree.expand(self.model.index(row, 0))
+
+        self._select_first_function()
 
     def get_selected_functions(self) -> List[FunctionInfo]:
         """Вернуть список выбранных функций: отмеченные чекбоксами или выделение."""
-        checked = self._get_checked_functions()
+        checked = self.model.checked_functions()
         if checked:
             return checked
         return list(self.selected_functions)
 
-    def _get_checked_functions(self) -> List[FunctionInfo]:
-        """Собрать все функции с отмеченным чекбоксом."""
+    def _selected_in_tree(self) -> List[FunctionInfo]:
+        """Функции, выделенные в дереве."""
         result = []
-
-        def collect(item: QTreeWidgetItem):
-            if item.checkState(0) == Qt.CheckState.Checked:
-                data = item.data(1, Qt.UserRole)
-                if data is not None and hasattr(data, 'id'):
-                    result.append(data)
-            for i in range(item.childCount()):
-                collect(item.child(i))
-
-        for i in range(self.tree.topLevelItemCount()):
-            collect(self.tree.topLevelItem(i))
+        for index in self.tree.selectionModel().selectedRows(1):
+            data = index.data(Qt.UserRole)
+            if data is not None:
+                result.append(data)
         return result
 
-    def _on_item_changed(self, item: QTreeWidgetItem, column: int):
-        """Обновить счётчик при изменении чекбокса."""
-        if getattr(self, '_block_item_changed', False) or column != 0:
-            return
-        funcs = self._get_checked_functions()
+    def _on_check_state_changed(self):
+        """Обновить сведения при изменении отметок."""
+        funcs = self.model.checked_functions()
         if funcs:
             self._update_info(funcs)
             self.ok_button.setEnabled(True)
+            return
+
+        self.selected_functions = self._selected_in_tree()
+        if self.selected_functions:
+            self._update_info(self.selected_functions)
+            self.ok_button.setEnabled(True)
         else:
-            items = self.tree.selectedItems()
-            self.selected_functions = []
-            for it in items:
-                data = it.data(1, Qt.UserRole)
-                if data is not None and hasattr(data, 'id'):
-                    self.selected_functions.append(data)
-            if self.selected_functions:
-                self._update_info(self.selected_functions)
-                self.ok_button.setEnabled(True)
-            else:
-                self._clear_info()
-                self.ok_button.setEnabled(False)
+            self._clear_info()
+            self.ok_button.setEnabled(False)
 
     def _check_all_visible(self):
-        """Отметить чекбоксы у всех видимых функций."""
-        self._block_item_changed = True
-        try:
-            for i in range(self.tree.topLevelItemCount()):
-                self._set_children_check_state(self.tree.topLevelItem(i), Qt.CheckState.Checked)
-        finally:
-            self._block_item_changed = False
-        funcs = self._get_checked_functions()
-        if funcs:
-            self._update_info(funcs)
-            self.ok_button.setEnabled(True)
+        """Отметить чекбоксы у всех функций текущего фильтра."""
+        self.model.set_all_checked(True)
 
     def _uncheck_all(self):
         """Снять все отметки с чекбоксов."""
-        self._block_item_changed = True
-        try:
-            for i in range(self.tree.topLevelItemCount()):
-                self._set_children_check_state(self.tree.topLevelItem(i), Qt.CheckState.Unchecked)
-        finally:
-            self._block_item_changed = False
-        self._clear_info()
-        self.ok_button.setEnabled(False)
-
-    def _set_children_check_state(self, item: QTreeWidgetItem, state: Qt.CheckState):
-        """Рекурсивно установить состояние чекбокса для элементов с функциями."""
-        data = item.data(1, Qt.UserRole)
-        if data is not None and hasattr(data, 'id'):
-            item.setCheckState(0, state)
-        for i in range(item.childCount()):
-            self._set_children_check_state(item.child(i), state)
+        self.model.set_all_checked(False)
 
     def _add_all_visible(self):
         """Добавить все отображаемые в дереве функции (группа по текущему фильтру)."""
-        all_visible = self._collect_all_functions_in_tree()
+        all_visible = self.model.functions()
         if all_visible:
             self.selected_functions = all_visible
             self.accept()
@@ -252,83 +189,29 @@ class FunctionSelectorDialog(QDialog):
             from PySide6.QtWidgets import QMessageBox
             QMessageBox.information(self, "Каталог", "В текущем виде каталога нет функций для добавления.")
 
-    def _collect_all_functions_in_tree(self) -> List[FunctionInfo]:
-        """Собрать все функции из текущего дерева (после фильтра/поиска)."""
-        result = []
-
-        def collect(item: QTreeWidgetItem):
-            data = item.data(1, Qt.UserRole)
-            if data is not None and hasattr(data, 'id'):
-                result.append(data)
-            for i in range(item.childCount()):
-                collect(item.child(i))
-
-        for i in range(self.tree.topLevelItemCount()):
-            collect(self.tree.topLevelItem(i))
-        return result
-
     def _select_first_function(self):
         """Выбрать первую функцию в дереве для удобства"""
-        def find_first_func_item(item: QTreeWidgetItem) -> Optional[QTreeWidgetItem]:
-            data = item.data(1, Qt.UserRole)
-            if data is not None and hasattr(data, 'id'):
-                return item
-            for i in range(item.childCount()):
-                found = find_first_func_item(item.child(i))
-                if found:
-                    return found
-            return None
-
-        for i in range(self.tree.topLevelItemCount()):
-            found = find_first_func_item(self.tree.topLevelItem(i))
-            if found:
-                self.tree.setCurrentItem(found)
-                self.tree.scrollToItem(found)
-                break
+        index = self.model.first_function_index()
+        if index.isValid():
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+        else:
+            self.selected_functions = []
+            self._on_check_state_changed()
 
     def _on_search(self, text: str):
-        """Обработка поиска"""
-        if text:
-            functions = search_functions(text)
-        else:
-            op_type = self.type_combo.currentData()
-            if op_type:
-                functions = get_functions_by_operation_type(op_type)
-            else:
-                functions = FUNCTION_CATALOG
-        self._populate_tree(functions)
-        self._select_first_function()
+        """Обработка поиска (с задержкой после последнего нажатия)"""
+        self._search_timer.start()
 
     def _on_filter_changed(self, index: int):
         """Обработка изменения фильтра"""
-        op_type = self.type_combo.currentData()
-        search_text = self.search_edit.text()
-
-        if search_text:
-            functions = search_functions(search_text)
-            if op_type:
-                functions = [f for f in functions if f.operation_type == op_type]
-        elif op_type:
-            functions = get_functions_by_operation_type(op_type)
-        else:
-            functions = FUNCTION_CATALOG
-
-        self._populate_tree(functions)
-        self._select_first_function()
+        self._apply_filter()
 
-    def _on_selection_changed(self):
+    def _on_selection_changed(self, *args):
         """Обработка изменения выделения (если нет отмеченных чекбоксами — показываем выделенные)"""
-        if getattr(self, '_block_item_changed', False):
-            return
-        checked = self._get_checked_functions()
-        if checked:
+        if self.model.has_checked():
             return
-        items = self.tree.selectedItems()
-        self.selected_functions = []
-        for item in items:
-            data = item.data(1, Qt.UserRole)
-            if data is not None and hasattr(data, 'id'):
-                self.selected_functions.append(data)
+        self.selected_functions = self._selected_in_tree()
 
         if self.selected_functions:
             self._update_info(self.selected_functions)
@@ -337,11 +220,11 @@ class FunctionSelectorDialog(QDialog):
             self._clear_info()
             self.ok_button.setEnabled(False)
 
-    def _on_item_double_clicked(self, item: QTreeWidgetItem, column: int):
+    def _on_item_double_clicked(self, index: QModelIndex):
         """Двойной клик — добавить эту функцию или все отмеченные чекбоксами"""
-        func = item.data(1, Qt.UserRole)
+        func = index.siblingAtColumn(1).data(Qt.UserRole)
         if func:
-            checked = self._get_checked_functions()
+            checked = self.model.checked_functions()
             if checked:
                 self.selected_functions = checked
             else:
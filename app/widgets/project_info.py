@@ -11,12 +11,13 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Signal
 
 from ..models.project import Project
+from ..change_bus import ChangeKind
 
 
 class ProjectInfoWidget(QWidget):
     """Виджет для ввода общих сведений о ПС"""
 
-    data_changed = Signal()
+    data_changed = Signal(object)  # ChangeKind
 
     def __init__(self, project: Project, parent=None):
         super().__init__(parent)
@@ -139,19 +140,19 @@ class ProjectInfoWidget(QWidget):
         """Обработка изменения названия"""
         if not self._updating:
             self.project.name = text
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.NAME)
 
     def _on_description_changed(self):
         """Обработка изменения описания"""
         if not self._updating:
             self.project.description = self.description_edit.toPlainText()
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.DESCRIPTION)
 
     def _on_work_fund_changed(self, value: int):
         """Обработка изменения фонда рабочего времени"""
         if not self._updating:
             self.project.work_fund = value
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.PARAMETERS)
 
     def _on_constraint_type_changed(self, index: int):
         """Обработка изменения типа ограничения"""
@@ -162,10 +163,10 @@ class ProjectInfoWidget(QWidget):
             else:
                 self.project.constraint_type = "staff"
                 self.constraint_unit_label.setText("человек")
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.PARAMETERS)
 
     def _on_constraint_value_changed(self, value: float):
         """Обработка изменения значения ограничения"""
         if not self._updating:
             self.project.constraint_value = value
-            self.data_changed.emit()
+            self.data_changed.emit(ChangeKind.PARAMETERS)
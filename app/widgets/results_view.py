@@ -245,10 +245,11 @@ class ResultsViewWidget(QWidget):
         # Столбчатая диаграмма по компонентам
         if project:
             bar_data = {}
-            for fr in result.functions_results:
-                comp_name = fr.component_name
+            functions = result.functions_results
+            for comp_name, volume in zip(functions.column("component_name"),
+                                         functions.column("volume_adjusted")):
                 if comp_name not in bar_data:
                     bar_data[comp_name] = 0
-                bar_data[comp_name] += fr.volume_adjusted
+                bar_data[comp_name] += volume
 
             self.bar_chart.update_bar_chart(bar_data, "Объём по компонентам (Vk)")
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Модель сводной таблицы функций (Vi, ri, ki, Vm, Vk)
+
+Данные отдаются представлению лениво — только для видимых строк,
+а Vm/Vk вычисляются один раз и хранятся в кэше до изменения функции.
+"""
+
+from typing import Optional
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+from ..models.project import FunctionInstance
+from ..models.calculation import CalculationEngine
+
+
+class FunctionSummaryModel(QAbstractTableModel):
+    """Табличная модель сводки по функциям проекта"""
+
+    HEADERS = ["Функция", "Vi", "ri", "ki", "Vm", "Vk"]
+
+    # Роль с «сырым» значением ячейки (для сортировки через прокси)
+    SORT_ROLE = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._functions: list[FunctionInstance] = []
+        self._rows: dict[str, int] = {}  # id функции -> номер строки
+        self._volumes: list[Optional[tuple[float, float]]] = []  # кэш (Vm, Vk)
+
+    def set_functions(self, functions: list[FunctionInstance]) -> None:
+        """Заменить набор функций (при изменении структуры проекта)"""
+        self.beginResetModel()
+        self._functions = list(functions)
+        self._rows = {func.id: row for row, func in enumerate(self._functions)}
+        self._volumes = [None] * len(self._functions)
+        self.endResetModel()
+
+    def invalidate_function(self, func: FunctionInstance) -> None:
+        """Сбросить кэш одной функции и перерисовать только её строку"""
+        row = self._rows.get(func.id)
+        if row is None:
+            return
+        self._volumes[row] = None
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.HEADERS) - 1)
+        )
+
+    def function_volumes(self, row: int) -> tuple[float, float]:
+        """(Vm, Vk) функции в строке — из кэша или с вычислением"""
+        volumes = self._volumes[row]
+        if volumes is None:
+            volumes = CalculationEngine.calculate_function_volume(self._functions[row])
+            self._volumes[row] = volumes
+        return volumes
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._functions)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role: int = Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, self.SORT_ROLE):
+            return None
+
+        func = self._functions[index.row()]
+        column = index.column()
+        display = role == Qt.DisplayRole
+
+        if column == 0:
+            if display:
+                return f"{func.function_id} {func.function_name[:30]}"
+            return f"{func.function_id} {func.function_name}"
+        if column == 1:
+            return str(func.volume) if display else func.volume
+        if column == 2:
+            return str(func.reuse_count) if display else func.reuse_count
+        if column == 3:
+            return f"{func.reuse_coefficient:.2f}" if display else func.reuse_coefficient
+
+        vm, vk = self.function_volumes(index.row())
+        value = vm if column == 4 else vk
+        return f"{value:.0f}" if display else value
+
+
+class FunctionSummaryProxyModel(QSortFilterProxyModel):
+    """Прокси-модель для сортировки сводки по «сырым» значениям"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(FunctionSummaryModel.SORT_ROLE)
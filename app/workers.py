@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Фоновые задачи для пула потоков Qt (QThreadPool)
+
+Задачи работают со снимками данных и сообщают о результате сигналами,
+которые доставляются в поток интерфейса через очередь событий.
+"""
+
+import copy
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from .models.project import Project
+from .models.calculation import CalculationEngine, CalculationResult
+from .export import EXPORTERS, get_exporter
+
+
+class CalculationSignals(QObject):
+    """Сигналы фонового расчёта"""
+    finished = Signal(int, object)  # Поколение, CalculationResult
+    failed = Signal(int, str)  # Поколение, текст ошибки
+
+
+class CalculationWorker(QRunnable):
+    """Расчёт трудоёмкости по снимку проекта в фоновом потоке
+
+    Поколение (generation) позволяет получателю отбросить результат,
+    если после запуска расчёта проект успел измениться.
+    """
+
+    def __init__(self, generation: int, project: Project):
+        super().__init__()
+        self.generation = generation
+        self.project = project
+        self.signals = CalculationSignals()
+
+    def run(self):
+        try:
+            result = CalculationEngine().calculate(self.project)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.finished.emit(self.generation, result)
+
+
+class ExportSignals(QObject):
+    """Сигналы фонового экспорта"""
+    progress = Signal(int, int, str)  # Выполнено этапов, всего, текущий этап
+    finished = Signal(str)  # Путь к файлу
+    failed = Signal(str)  # Текст ошибки
+    cancelled = Signal()
+
+
+class ExportWorker(QRunnable):
+    """Экспорт отчёта в фоновом потоке
+
+    Работает со снимками проекта и результата, поэтому пользователь может
+    продолжать редактирование. Отмена (cancel) проверяется экспортом между
+    разделами; незавершённый файл не остаётся на диске.
+    """
+
+    def __init__(self, fmt: str, project: Project, result: CalculationResult, file_path: str):
+        super().__init__()
+        self.fmt = fmt
+        self.project = project.snapshot()
+        self.result = copy.deepcopy(result)
+        self.file_path = file_path
+        self.signals = ExportSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Запросить отмену экспорта"""
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            export = get_exporter(self.fmt)
+        except ImportError:
+            self.signals.failed.emit(f"Модуль {EXPORTERS[self.fmt][1]} не установлен")
+            return
+
+        from .export.common import ExportCancelled
+
+        try:
+            export(
+                self.project, self.result, self.file_path,
+                on_progress=self.signals.progress.emit,
+                is_cancelled=self.is_cancelled,
+            )
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(self.file_path)
@@ -23,9 +23,14 @@ a = Analysis(
         'PySide6.QtCore',
         'PySide6.QtGui',
         'matplotlib',
-        'matplotlib.backends.backend_qtagg',
+        'matplotlib.backends.backend_agg',
         'openpyxl',
         'docx',
+        'app.export.docx_export',
+        'app.export.xlsx_export',
+        'app.export.json_export',
+        'app.export.columnar',
+        'app.export.report_data',
     ],
     hookspath=[],
     hooksconfig={},
@@ -13,17 +13,26 @@ from pathlib import Path
 # Добавляем путь к модулям
 sys.path.insert(0, str(Path(__file__).parent))
 
+from app import startup_profile
+from app.startup_profile import span, PROFILE_FLAG
+
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 
-from app.main_window import MainWindow
-
 
 def main():
     """Главная функция приложения"""
+    profiling = PROFILE_FLAG in sys.argv
+    if profiling:
+        if "importtime" not in sys._xoptions:
+            # Перезапуск с -X importtime; сводку печатает родительский процесс
+            sys.exit(startup_profile.run_with_importtime(__file__))
+        startup_profile.enable()
+
     # Создаём приложение
-    app = QApplication(sys.argv)
+    with span("QApplication"):
+        app = QApplication(sys.argv)
 
     # Настройка приложения
     app.setApplicationName("Расчёт трудоёмкости разработки ПС")
@@ -37,13 +46,26 @@ def main():
     app.setFont(font)
 
     # Стиль Fusion + тема (светлая/тёмная из настроек)
-    app.setStyle("Fusion")
-    from app.theme import get_theme, apply_theme
-    apply_theme(get_theme())
+    with span("тема оформления"):
+        app.setStyle("Fusion")
+        from app.theme import get_theme, apply_theme
+        apply_theme(get_theme())
 
     # Создаём и показываем главное окно
-    window = MainWindow()
-    window.show()
+    with span("импорт главного окна"):
+        from app.main_window import MainWindow
+    with span("создание главного окна"):
+        window = MainWindow()
+    with span("показ окна"):
+        window.show()
+
+    if profiling:
+        # Первый проход цикла событий — окно отрисовано
+        def report():
+            print(startup_profile.format_report(startup_profile.elapsed()), flush=True)
+            window.project.modified = False
+            app.quit()
+        QTimer.singleShot(0, report)
 
     # Запускаем цикл обработки событий
     sys.exit(app.exec())
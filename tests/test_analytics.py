@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты аналитики по портфелю проектов
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app.models.function_catalog import get_function_by_id
+from app.models.profiles import (
+    EngineProfile, save_profile, load_profile, profile_versions, parse_profile_spec, resolve_profile,
+)
+from app.analytics import portfolio, calibration
+from app.analytics.portfolio import PortfolioTable
+from app.analytics.calibration import calibrate, load_dataset, Observation
+from app.export import pipeline
+from app.planning import leveling, schedule
+
+
+def _portfolio():
+    projects = []
+    for i in range(3):
+        project = Project.create_example()
+        project.name = f"Проект {i}"
+        for func in project.components[i].functions:
+            func.language = "Python"
+            func.complexity_level = 5
+        project.coefficients.deadline = "76–85% от номинальной"
+        projects.append(project)
+    return projects
+
+
+def test_portfolio_group_by():
+    """Суммы по группам совпадают с построчным расчётом движка"""
+    projects = _portfolio()
+    table = PortfolioTable.from_projects(projects)
+    engine = CalculationEngine()
+    results = [engine.calculate(p) for p in projects]
+    assert len(table) == sum(p.get_function_count() for p in projects)
+
+    # Vk и трудоёмкость по проектам
+    by_project = table.group_by("project", ["Vk", "labor"], ["sum", "count"])
+    for row, project, result in zip(by_project.rows(), projects, results):
+        name, vk, labor, count = row
+        assert name == project.name and count == project.get_function_count()
+        assert abs(vk - result.total_volume) < 0.01
+        assert abs(labor - result.final_labor) < 0.05, "Доли функций складываются в T_srok проекта"
+
+    # Присоединение каталога: категория и тип операции по номеру функции
+    expected = defaultdict(float)
+    for result in results:
+        for fr in result.functions_results:
+            info = get_function_by_id(fr.function_id)
+            expected[(info.operation_type.value, info.category)] += fr.volume_adjusted
+    aggregate = table.group_by(["operation_type", "category"], ["Vk"])
+    got = {row[:2]: row[2] for row in aggregate.rows()}
+    assert got.keys() == expected.keys()
+    assert all(abs(got[k] - expected[k]) < 0.05 for k in expected)
+
+    # Квантили и средние по средству разработки
+    aggregate = table.group_by("language", ["Vk"], ["mean", "max"], quantiles=[0.5, 0.9])
+    for i, (language,) in enumerate(aggregate.key_values):
+        values = table.measures["Vk"][table.codes["language"] == table.labels["language"].index(language)]
+        assert np.allclose(aggregate.columns["Vk:q0.5"][i], np.quantile(values, 0.5))
+        assert np.allclose(aggregate.columns["Vk:q0.9"][i], np.quantile(values, 0.9))
+        assert np.isclose(aggregate.columns["Vk:mean"][i], values.mean())
+        assert aggregate.columns["Vk:max"][i] == values.max()
+
+    python = table.filter(language="Python")
+    assert set(python.group_by("language").key_values) == {("Python",)}
+    assert len(table.filter(language="Нет такого")) == 0
+    return True
+
+
+def test_portfolio_save_and_cli():
+    """Таблица сохраняется в .npz, командная строка читает каталоги и таблицу"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, project in enumerate(_portfolio()):
+            project.save(os.path.join(tmp, f"p{i}.json"))
+        table = PortfolioTable.from_paths([tmp])
+        saved = os.path.join(tmp, "portfolio.npz")
+        table.save(saved)
+        loaded = PortfolioTable.load(saved)
+        assert loaded.labels == table.labels
+        assert all(np.array_equal(loaded.measures[m], table.measures[m]) for m in table.measures)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert portfolio.main([saved, "--by", "component", "--by", "language", "category",
+                                   "--quantiles", "0.5"]) == 0
+        text = output.getvalue()
+        assert "Компонент" in text and "Категория" in text and "Vk:q0.5" in text
+    return True
+
+
+def test_calibration():
+    """A, C и доли подпроцессов восстанавливаются по синтетическим фактам"""
+    rng = np.random.default_rng(3)
+    truth = EngineProfile(name="истина", A=0.25, C=0.8, subprocess_coefficients={
+        "Анализ": 0.05, "Проектирование": 0.15, "Программирование": 0.6,
+        "Тестирование": 0.15, "Ввод в действие": 0.05,
+    })
+    engine = CalculationEngine(truth)
+    observations = []
+    for i in range(40):
+        project = Project.create_example()
+        scale = rng.uniform(0.1, 5.0)
+        for func in project.get_all_functions():
+            func.volume = int(func.volume * scale)
+        if i % 2:
+            project.coefficients.deadline = "76–85% от номинальной"
+        result = engine.calculate(project)
+        noise = lambda: float(np.exp(rng.normal(0, 0.05)))
+        observations.append(Observation(project, result.final_labor * noise(),
+                                        {sp.name: sp.labor * noise() for sp in result.subprocess_results}))
+
+    fitted = calibrate(observations, seed=1)
+    assert fitted.A.low <= 0.25 <= fitted.A.high, fitted.A
+    assert fitted.C.low <= 0.8 <= fitted.C.high, fitted.C
+    assert abs(fitted.shares["Программирование"].value - 0.6) < 0.02
+    assert fitted.mape < 0.05 < fitted.mape_default
+
+    without_shares = calibrate(observations, fit_shares=False, bootstrap=200, seed=1)
+    assert not without_shares.shares
+
+    # Проекты одного объёма не определяют степень C
+    try:
+        same = observations[0]
+        calibrate([Observation(same.project, same.actual_labor * (1 + i / 10)) for i in range(4)], bootstrap=10)
+        assert False, "Ожидалась ValueError"
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Набор фактов в CSV: пути к проектам относительно файла
+        dataset = os.path.join(tmp, "facts.csv")
+        with open(dataset, "w", encoding="utf-8") as f:
+            f.write("project;actual_labor\n")
+            for i, observation in enumerate(observations[:5]):
+                observation.project.save(os.path.join(tmp, f"p{i}.json"))
+                labor = f"{observation.actual_labor:.2f}".replace(".", ",")
+                f.write(f"p{i}.json;{labor}\n")
+        loaded = load_dataset(dataset)
+        assert len(loaded) == 5 and abs(loaded[0].actual_labor - observations[0].actual_labor) < 0.01
+        assert calibration.main([dataset, "--bootstrap", "100", "--seed", "1"]) == 0
+
+        # Профили версионируются, движок с профилем использует подобранные коэффициенты
+        profiles = os.path.join(tmp, "profiles")
+        save_profile(fitted.to_profile("отдел"), profiles)
+        save_profile(fitted.to_profile("отдел"), profiles)
+        assert profile_versions(profiles, "отдел") == [1, 2]
+        profile = load_profile(profiles, "отдел")
+        assert profile.version == 2 and profile.A == fitted.A.value
+        assert profile.fit["C_interval"] == [fitted.C.low, fitted.C.high]
+
+        result = CalculationEngine(profile).calculate(observations[0].project)
+        assert result.A == profile.A and result.C == profile.C
+        assert abs(result.final_labor / observations[0].actual_labor - 1) < 0.2
+
+        # Профиль выбирается строкой «имя[:версия]» в командных утилитах
+        assert parse_profile_spec("отдел:1") == ("отдел", 1) and parse_profile_spec("отдел") == ("отдел", None)
+        assert resolve_profile("отдел:1", profiles).version == 1 and resolve_profile(None, profiles) is None
+        project_path = observations[0].project.save(os.path.join(tmp, "project.json"))
+        report = os.path.join(tmp, "report.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert pipeline.main([project_path, "--json", report, "--workers", "1",
+                                  "--engine-profile", "отдел", "--profiles", profiles]) == 0
+        with open(report, encoding="utf-8") as f:
+            assert json.load(f)["result"]["final_labor"] == result.final_labor
+        table = PortfolioTable.from_paths([project_path], profile)
+        default = PortfolioTable.from_paths([project_path])
+        assert abs(table.measures["labor"].sum() - result.final_labor) < 0.05  # T_srok движка округлён
+        assert abs(default.measures["labor"].sum() - result.final_labor) > 1.0
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert schedule.main([project_path, "--engine-profile", "отдел:2", "--profiles", profiles]) == 0
+        assert f"{result.final_labor:.2f} чел.-дн." in output.getvalue()
+        for spec in ("нет", "отдел:9", "отдел:x"):
+            with contextlib.redirect_stderr(io.StringIO()):
+                try:
+                    leveling.main([project_path, "--capacity", "программист=1",
+                                   "--engine-profile", spec, "--profiles", profiles])
+                    assert False, f"Профиль {spec} не должен находиться"
+                except SystemExit as e:
+                    assert e.code == 2
+
+        # Профиль без доли подпроцесса не загружается
+        data = EngineProfile(name="неполный").to_dict()
+        del data["subprocess_coefficients"]["Анализ"]
+        with open(os.path.join(profiles, "неполный-v1.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        try:
+            load_profile(profiles, "неполный")
+            assert False, "Ожидалась ValueError"
+        except ValueError as e:
+            assert "Анализ" in str(e)
+
+    # Профиль методики даёт прежний расчёт
+    project = Project.create_example()
+    assert CalculationEngine(EngineProfile()).calculate(project) == CalculationEngine().calculate(project)
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов аналитики портфеля...\n")
+
+    try:
+        test_portfolio_group_by()
+        test_portfolio_save_and_cli()
+        test_calibration()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
@@ -3,14 +3,18 @@
 Тест расчёта на эталонном примере из методики
 """
 
+import copy
+import json
+import pickle
 import sys
+from dataclasses import asdict, replace
 from pathlib import Path
 
 # Добавляем путь к модулям
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.models.project import Project
-from app.models.calculation import CalculationEngine
+from app.models.calculation import CalculationEngine, FunctionResult, FunctionResultTable
 
 
 def test_example_calculation():
@@ -117,6 +121,101 @@ def test_example_calculation():
     return True
 
 
+def test_function_volume_helper():
+    """Тест расчёта объёма отдельной функции (используется сводной таблицей)"""
+    project = Project.create_example()
+    result = CalculationEngine().calculate(project)
+
+    for func, fr in zip(project.get_all_functions(), result.functions_results):
+        vm, vk = CalculationEngine.calculate_function_volume(func)
+        assert round(vm, 2) == fr.volume_corrected, f"Vm функции {func.function_id} не совпадает"
+        assert round(vk, 2) == fr.volume_adjusted, f"Vk функции {func.function_id} не совпадает"
+
+    return True
+
+
+def test_calculate_stream():
+    """Потоковый расчёт даёт те же итоги, что и расчёт проекта"""
+    project = Project.create_example()
+    project.constraint_type, project.constraint_value = "staff", 3
+    engine = CalculationEngine()
+    expected = engine.calculate(project)
+
+    def records():
+        # Генератор: функции не собираются в проект
+        for component in project.components:
+            for func in component.functions:
+                yield component.name, func
+
+    functions = []
+    result = engine.calculate_stream(records(), project.coefficients, project.work_fund,
+                                     project.constraint_type, project.constraint_value,
+                                     on_function=functions.append)
+    assert result.functions_results == [], "Потоковый расчёт не накапливает функции"
+    assert functions == expected.functions_results
+    streamed, full = result.to_dict(), expected.to_dict()
+    streamed.pop("functions_results")
+    full.pop("functions_results")
+    assert streamed == full, "Итоги потокового расчёта отличаются"
+
+    assert set(result.component_volumes) == {c.name for c in project.components}
+    assert abs(sum(result.component_volumes.values()) - result.total_volume) < 0.05
+    for component in project.components:
+        volume = sum(CalculationEngine.calculate_function_volume(f)[1] for f in component.functions)
+        assert result.component_volumes[component.name] == round(volume, 2)
+
+    empty = engine.calculate_stream(iter(()), project.coefficients)
+    assert empty.total_volume == 0 and empty.final_labor == 0
+    return True
+
+
+def test_function_result_table():
+    """Результаты по функциям хранятся столбцами, объекты создаются при обращении"""
+    project = Project.create_example()
+    result = CalculationEngine().calculate(project)
+    table = result.functions_results
+    assert isinstance(table, FunctionResultTable)
+    assert len(table) == project.get_function_count()
+
+    rows = list(table)
+    assert all(isinstance(fr, FunctionResult) for fr in rows)
+    assert table[0] == rows[0] and table[-1] == rows[-1] and table[1:3] == rows[1:3]
+    assert table == rows and table == FunctionResultTable(rows)
+    assert list(table.column("volume_adjusted")) == [fr.volume_adjusted for fr in rows]
+    assert table.column("component_name")[0] == project.components[0].name
+    try:
+        table[len(table)]
+        assert False, "Ожидалась IndexError"
+    except IndexError:
+        pass
+
+    # Словарь результата сериализуется в JSON, копия и pickle сохраняют столбцы
+    data = result.to_dict()
+    assert data["functions_results"][0] == asdict(rows[0])
+    json.dumps(data)
+    assert pickle.loads(pickle.dumps(result)) == result
+    assert copy.deepcopy(result).functions_results == table
+
+    # Нецелый объём из JSON не ломает целочисленный столбец
+    project.components[0].functions[0].volume = 100.5
+    widened = CalculationEngine().calculate(project).functions_results
+    assert widened[0].volume_base == 100.5 and widened[1].volume_base == rows[1].volume_base
+
+    # Целое вне диапазона int64 тоже расширяет столбец, строки не сдвигаются
+    table = FunctionResultTable(rows[:2])
+    huge = replace(rows[0], volume_base=2 ** 63, reuse_count=-2 ** 70)
+    table.append(huge)
+    table.append(rows[2])
+    assert len(table) == 4 and all(len(table.column(name)) == 4 for name, _ in table.COLUMNS)
+    assert table[2] == huge and table[3] == rows[2] and table[:2] == rows[:2]
+    try:
+        table.add("1.1", "Функция")
+        assert False, "Ожидалась TypeError"
+    except TypeError:
+        assert len(table.column("function_id")) == 4
+    return True
+
+
 def test_save_load_project():
     """Тест сохранения и загрузки проекта"""
     import tempfile
@@ -154,6 +253,9 @@ if __name__ == "__main__":
 
     try:
         test_example_calculation()
+        test_function_volume_helper()
+        test_calculate_stream()
+        test_function_result_table()
         test_save_load_project()
         print("\n" + "=" * 60)
         print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты экспорта: ход выполнения, отмена и атомарная запись
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app.export import common
+from app.export.common import ExportCancelled
+from app.export.json_export import export_to_json
+from app.export.docx_export import export_to_docx, DOCX_STEPS
+from app.export.xlsx_export import export_to_xlsx, XLSX_STEPS
+from app.export.pipeline import run_report_pipeline
+from app.export.columnar import FunctionDatasetWriter, COLUMN_NAMES, PYARROW_AVAILABLE
+from app.workers import ExportWorker
+
+
+def _example():
+    project = Project.create_example()
+    return project, CalculationEngine().calculate(project)
+
+
+def test_export_progress():
+    """Экспорт сообщает о каждом листе/разделе и завершается полным ходом"""
+    project, result = _example()
+    with tempfile.TemporaryDirectory() as tmp:
+        for export, steps, name in ((export_to_docx, DOCX_STEPS, "r.docx"), (export_to_xlsx, XLSX_STEPS, "r.xlsx")):
+            events = []
+            path = os.path.join(tmp, name)
+            export(project, result, path, on_progress=lambda d, t, m: events.append((d, t, m)))
+
+            assert os.path.getsize(path) > 1000
+            assert [d for d, _, _ in events] == list(range(steps + 1)), events
+            assert all(t == steps for _, t, _ in events)
+        assert sorted(os.listdir(tmp)) == ["r.docx", "r.xlsx"], "Временные файлы не должны оставаться"
+    return True
+
+
+def test_export_cancel_keeps_existing_file():
+    """Отменённый экспорт не трогает прежний файл и не оставляет временных"""
+    project, result = _example()
+    with tempfile.TemporaryDirectory() as tmp:
+        for export, name in ((export_to_docx, "r.docx"), (export_to_xlsx, "r.xlsx")):
+            path = os.path.join(tmp, name)
+            with open(path, "wb") as f:
+                f.write(b"old")
+
+            # Отмена на сохранении (последний этап): файл уже записан во временный
+            messages = []
+            try:
+                export(project, result, path,
+                       on_progress=lambda d, t, m: messages.append(m),
+                       is_cancelled=lambda: messages[-1:] == ["Сохранение файла"])
+                assert False, "Ожидалась отмена экспорта"
+            except ExportCancelled:
+                pass
+
+            with open(path, "rb") as f:
+                assert f.read() == b"old", "Прежний файл должен сохраниться"
+        assert sorted(os.listdir(tmp)) == ["r.docx", "r.xlsx"], "Временные файлы должны удаляться"
+    return True
+
+
+def test_export_file_mode():
+    """Отчёты создаются с правами по umask, а заменяемый файл сохраняет свои права"""
+    if os.name != "posix":
+        return True
+    project, result = _example()
+    default = 0o666 & ~common._UMASK
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "r.json")
+        export_to_json(project, result, path)
+        assert os.stat(path).st_mode & 0o777 == default, oct(os.stat(path).st_mode)
+
+        os.chmod(path, 0o640)
+        export_to_json(project, result, path)
+        assert os.stat(path).st_mode & 0o777 == 0o640, "Права заменяемого файла сохраняются"
+
+        outputs = {"json": os.path.join(tmp, "p.json")}
+        run_report_pipeline(project, result, outputs, max_workers=1)
+        assert os.stat(outputs["json"]).st_mode & 0o777 == default
+    return True
+
+
+def test_xlsx_streaming_layout():
+    """Потоковая книга: листы, шапка, строки функций, итоги и именованные стили"""
+    from openpyxl import load_workbook
+
+    project, result = _example()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "r.xlsx")
+        export_to_xlsx(project, result, path)
+        wb = load_workbook(path)
+
+        assert wb.sheetnames == ['Общие сведения', 'Функции', 'Коэффициенты', 'Подпроцессы', 'Итоги']
+        assert 'Ячейка таблицы' in wb.named_styles
+
+        ws = wb['Функции']
+        n = len(result.functions_results)
+        assert ws.max_row == n + 2, "Шапка, строки функций и строка итога"
+        assert ws['C1'].value == 'Название функции' and ws['C1'].font.bold
+        assert ws['B2'].value == result.functions_results[0].function_id
+        assert ws['B2'].style == 'Ячейка таблицы' and ws['B2'].border.left.style == 'thin'
+        assert ws.cell(row=n + 2, column=1).value == 'ИТОГО'
+        assert abs(ws.cell(row=n + 2, column=11).value - result.total_volume) < 1e-9
+
+        assert wb['Общие сведения']['B3'].value == project.name
+        assert 'A1:D1' in [str(r) for r in wb['Общие сведения'].merged_cells.ranges]
+        assert wb['Подпроцессы']['C4'].value == result.subprocess_results[0].labor
+        assert wb['Итоги']['A15'].value == f'T_baz = {result.base_labor:.2f} чел.-дн.'
+    return True
+
+
+def test_docx_bulk_tables():
+    """Массовая вставка строк даёт те же ячейки, что и python-docx"""
+    from docx import Document
+
+    project, result = _example()
+    # Служебные символы и разметка в названии не должны ломать документ
+    project.components[0].functions[0].function_name = "Ввод <данных> & \x07отчёт"
+    # Переводы строк и табуляция — разрывы строки и табуляция, как у cell.text
+    project.components[0].functions[1].function_name = "Первая строка\nвторая\tстолбец"
+    result = CalculationEngine().calculate(project)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "r.docx")
+        export_to_docx(project, result, path)
+        doc = Document(path)
+
+    # Таблица 0 — общие сведения, далее по таблице на компонент с функциями, затем каталог
+    comp_tables = [c for c in project.components if c.functions]
+    first = doc.tables[1]
+    assert [c.text for c in first.rows[0].cells] == ['№', 'Функция', 'Vi', 'ri', 'ki']
+    assert first.rows[0].cells[0].paragraphs[0].runs[0].bold
+    func = project.components[0].functions[0]
+    assert [c.text for c in first.rows[1].cells] == [
+        func.function_id, "Ввод <данных> & отчёт", str(func.volume),
+        str(func.reuse_count), f'{func.reuse_coefficient:.2f}',
+    ]
+    assert first.rows[1].cells[0].width == first.rows[0].cells[0].width, "Ширины столбцов как в шапке"
+    multiline = first.rows[2].cells[1]
+    assert multiline.text == "Первая строка\nвторая\tстолбец"
+    run = multiline.paragraphs[0]._p.r_lst[0]
+    assert [child.tag.split('}')[1] for child in run] == ['t', 'br', 't', 'tab', 't']
+
+    catalog = doc.tables[1 + len(comp_tables)]
+    assert len(catalog.rows) == len(result.functions_results) + 1
+    last = result.functions_results[-1]
+    assert catalog.rows[-1].cells[6].text == f'{last.volume_adjusted:.0f}'
+    assert catalog.style.name == 'Table Grid'
+    return True
+
+
+def test_docx_template_cache():
+    """Заготовка отчёта собирается один раз, копии заполняются для каждого проекта"""
+    from docx import Document
+    from app.export.docx_export import get_report_template
+
+    template = get_report_template()
+    data = template.data
+    project, result = _example()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        names = []
+        for i in range(3):
+            project.name = f"Проект {i}"
+            path = os.path.join(tmp, f"r{i}.docx")
+            export_to_docx(project, result, path)
+            names.append([p.text for p in Document(path).paragraphs if p.text.startswith("Проект ")])
+
+    assert get_report_template() is template, "Заготовка должна переиспользоваться"
+    assert template.data == data, "Копирование не должно менять заготовку"
+    assert names == [["Проект 0"], ["Проект 1"], ["Проект 2"]], names
+    assert set(template.style_ids) == set(template.STYLE_NAMES)
+    return True
+
+
+def test_report_pipeline():
+    """Конвейер: все форматы из одного результата, атомарная замена, сводка"""
+    import json
+
+    project, result = _example()
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {fmt: os.path.join(tmp, f"r.{fmt}") for fmt in ("docx", "xlsx", "json")}
+        summary = run_report_pipeline(project, result, outputs)
+
+        assert sorted(os.listdir(tmp)) == ["r.docx", "r.json", "r.xlsx"], "Временные файлы не должны оставаться"
+        assert set(summary.timings) == set(outputs) and summary.files == outputs
+        assert "Всего:" in summary.format()
+
+        with open(outputs["json"], encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["result"]["final_labor"] == result.final_labor
+        assert len(data["result"]["functions_results"]) == len(result.functions_results)
+        assert sum(c["function_count"] for c in data["components"]) == len(result.functions_results)
+        assert data["project"]["name"] == project.name
+
+        # Ошибка подготовки одного формата не затрагивает остальные файлы
+        with open(outputs["docx"], "wb") as f:
+            f.write(b"old")
+        try:
+            run_report_pipeline(project, result, {
+                "docx": outputs["docx"],
+                "xlsx": os.path.join(tmp, "нет", "r.xlsx"),
+            })
+            assert False, "Ожидалась ошибка записи"
+        except OSError:
+            pass
+        with open(outputs["docx"], "rb") as f:
+            assert f.read() == b"old"
+        assert sorted(os.listdir(tmp)) == ["r.docx", "r.json", "r.xlsx"]
+    return True
+
+
+def test_columnar_dataset():
+    """Колоночный набор: порции нескольких проектов со столбцом project"""
+    import csv
+
+    project, result = _example()
+    other = Project.create_example()
+    other.name = "Второй проект"
+    other_result = CalculationEngine().calculate(other)
+    n = len(result.functions_results)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "набор.csv")
+        with FunctionDatasetWriter(path) as writer:
+            writer.append(project.name, result)
+            writer.append(other.name, other_result)
+        assert writer.rows_written == 2 * n
+
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert tuple(rows[0]) == COLUMN_NAMES
+        assert len(rows) == 2 * n + 1
+        fr = result.functions_results[0]
+        assert rows[1][:4] == [project.name, fr.component_name, fr.function_id, str(fr.volume_base)]
+        assert float(rows[1][-1]) == fr.volume_adjusted
+        assert rows[-1][0] == "Второй проект"
+
+        # Ошибка во время записи не оставляет файла
+        try:
+            with FunctionDatasetWriter(os.path.join(tmp, "сбой.csv")) as writer:
+                writer.append(project.name, result)
+                raise RuntimeError("сбой")
+        except RuntimeError:
+            pass
+        assert sorted(os.listdir(tmp)) == ["набор.csv"]
+
+        path = os.path.join(tmp, "набор.parquet")
+        if PYARROW_AVAILABLE:
+            import pyarrow.parquet as pq
+
+            with FunctionDatasetWriter(path) as writer:
+                writer.append(project.name, result)
+                writer.append(other.name, other_result)
+            table = pq.read_table(path)
+            assert table.num_rows == 2 * n and tuple(table.column_names) == COLUMN_NAMES
+            assert table.column("Vk").to_pylist()[0] == fr.volume_adjusted
+        else:
+            try:
+                FunctionDatasetWriter(path)
+                assert False, "Без pyarrow Parquet недоступен"
+            except ImportError:
+                pass
+    return True
+
+
+def test_columnar_arrow():
+    """Parquet/Arrow: столбцы движка и расширенные столбцы; сбои не оставляют файлов"""
+    if not PYARROW_AVAILABLE:
+        return True
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from app.export import columnar
+
+    project, result = _example()
+    assert not isinstance(result.functions_results.column("volume_base"), list)
+    volumes = [fr.volume_base for fr in result.functions_results]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "набор.arrow")
+        with FunctionDatasetWriter(path) as writer:
+            writer.append(project.name, result)
+        with pa.OSFile(path, "rb") as f:
+            table = pa.ipc.open_file(f).read_all()
+        assert tuple(table.column_names) == COLUMN_NAMES
+        assert table.column("Vi").to_pylist() == volumes
+
+        # Целый объём, записанный дробным числом, расширяет столбец и пишется как целое
+        project.components[0].functions[0].volume = 100.0
+        widened = CalculationEngine().calculate(project)
+        assert isinstance(widened.functions_results.column("volume_base"), list)
+        path = os.path.join(tmp, "набор.parquet")
+        with FunctionDatasetWriter(path) as writer:
+            writer.append(project.name, widened)
+        assert pq.read_table(path).column("Vi").to_pylist() == [100] + volumes[1:]
+
+        # Дробный объём не усекается молча
+        project.components[0].functions[0].volume = 100.5
+        fractional = CalculationEngine().calculate(project)
+        try:
+            with FunctionDatasetWriter(os.path.join(tmp, "дробный.parquet")) as writer:
+                writer.append(project.name, fractional)
+            assert False, "Ожидалась ValueError"
+        except ValueError:
+            pass
+        assert sorted(os.listdir(tmp)) == ["набор.arrow", "набор.parquet"]
+
+        # Сбой открытия pyarrow-писателя не оставляет временного файла
+        def failing_open(self):
+            raise OSError("сбой")
+
+        open_arrow = columnar.FunctionDatasetWriter._open_arrow
+        columnar.FunctionDatasetWriter._open_arrow = failing_open
+        try:
+            FunctionDatasetWriter(os.path.join(tmp, "сбой.parquet"))
+            assert False, "Ожидалась OSError"
+        except OSError:
+            pass
+        finally:
+            columnar.FunctionDatasetWriter._open_arrow = open_arrow
+        assert sorted(os.listdir(tmp)) == ["набор.arrow", "набор.parquet"]
+    return True
+
+
+def test_export_worker():
+    """Фоновый экспорт работает со снимком и сообщает об отмене"""
+    project, result = _example()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "r.xlsx")
+        worker = ExportWorker("xlsx", project, result, path)
+        assert worker.project is not project and worker.result is not result, "Нужны снимки данных"
+
+        finished = []
+        worker.signals.finished.connect(finished.append)
+        worker.run()
+        assert finished == [path] and os.path.exists(path)
+
+        cancelled = []
+        path = os.path.join(tmp, "c.docx")
+        worker = ExportWorker("docx", project, result, path)
+        worker.signals.cancelled.connect(lambda: cancelled.append(True))
+        worker.cancel()
+        worker.run()
+        assert cancelled == [True]
+        assert not os.path.exists(path)
+        assert os.listdir(tmp) == ["r.xlsx"]
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов экспорта...\n")
+
+    try:
+        test_export_progress()
+        test_export_cancel_keeps_existing_file()
+        test_export_file_mode()
+        test_xlsx_streaming_layout()
+        test_docx_bulk_tables()
+        test_docx_template_cache()
+        test_report_pipeline()
+        test_columnar_dataset()
+        test_columnar_arrow()
+        test_export_worker()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
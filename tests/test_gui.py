@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты компонентов графического интерфейса (без отображения окон)
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Отключаем GUI для headless-тестирования
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication
+
+from app.change_bus import ChangeBus, ChangeKind, VOLUME_CHANGES
+from app.main_window import MainWindow
+from app.models.function_catalog import get_catalog_index, search_functions
+from app.widgets.function_selector import FunctionSelectorDialog
+from app.widgets.chart_widget import ChartRenderer, ChartWidget, aggregate_top_n
+
+
+def _app() -> QApplication:
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def test_change_bus_coalescing():
+    """Серия изменений доставляется подписчику одним вызовом"""
+    app = _app()
+    bus = ChangeBus()
+
+    all_calls = []
+    volume_calls = []
+    bus.subscribe(all_calls.append)
+    bus.subscribe(volume_calls.append, VOLUME_CHANGES)
+
+    for _ in range(100):
+        bus.publish(ChangeKind.FUNCTION)
+    bus.publish(ChangeKind.COEFFICIENTS)
+    assert not all_calls, "События должны доставляться в следующем проходе цикла событий"
+
+    app.processEvents()
+    assert all_calls == [frozenset({ChangeKind.FUNCTION, ChangeKind.COEFFICIENTS})], all_calls
+    assert volume_calls == [frozenset({ChangeKind.FUNCTION})], volume_calls
+
+    # Изменения, на которые подписчик не подписан, ему не доставляются
+    bus.publish(ChangeKind.NAME)
+    bus.flush()
+    assert len(all_calls) == 2
+    assert len(volume_calls) == 1
+
+    return True
+
+
+def test_background_calculation_drops_stale_results():
+    """Фоновый расчёт: результат устаревшего поколения отбрасывается"""
+    app = _app()
+    w = MainWindow()
+    w._load_example()
+
+    # Изменение проекта после запуска расчёта делает его результат устаревшим
+    w._submit_calculation(show_results=False)
+    w.change_bus.publish(ChangeKind.FUNCTION)
+    w.change_bus.flush()
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.calculation_result is None, "Устаревший результат не должен применяться"
+
+    # Ручной расчёт, ставший устаревшим, запускается заново и показывает результат
+    w._calculate()
+    assert w.statusbar.currentMessage() == "Выполняется расчёт..."
+    w.change_bus.publish(ChangeKind.COEFFICIENTS)
+    w.change_bus.flush()
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.calculation_result is None
+    assert w.statusbar.currentMessage() == "Выполняется расчёт..."
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.calculation_result is not None, "Актуальный результат должен применяться"
+    assert w.calculation_result.final_labor > 0
+    assert w.tabs.currentIndex() == MainWindow.TAB_RESULTS
+    assert w.statusbar.currentMessage() == "Расчёт выполнен"
+
+    # Фоновый пересчёт не отменяет показ результата, запрошенный пользователем
+    w.tabs.setCurrentIndex(MainWindow.TAB_COMPONENTS)
+    w._calculate()
+    w._submit_calculation(show_results=False)
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.tabs.currentIndex() == MainWindow.TAB_RESULTS
+    assert not w._show_results_on_finish and w._status_calc_generation == 0
+
+    # Без функций повторять нечего: сообщение о расчёте убирается
+    w._calculate()
+    for component in w.project.components:
+        component.functions.clear()
+    w.change_bus.publish(ChangeKind.FUNCTION)
+    w.change_bus.flush()
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.statusbar.currentMessage().startswith("Компонентов:"), w.statusbar.currentMessage()
+    assert not w._show_results_on_finish and w._status_calc_generation == 0
+
+    w.project.modified = False
+    w.close()
+    return True
+
+
+def test_lazy_tabs():
+    """Вкладки создаются при первом открытии и затем переиспользуются"""
+    app = _app()
+    w = MainWindow()
+    assert w.tabs.count() == 5
+    assert w.project_info is not None, "Первая вкладка создаётся сразу"
+    assert w.components_editor is None and w.coefficients_panel is None
+    assert w.results_view is None and w.export_tab is None
+
+    w._load_example()
+    w._submit_calculation(show_results=True)
+    w._calc_pool.waitForDone()
+    app.processEvents()
+    assert w.tabs.currentIndex() == MainWindow.TAB_RESULTS
+    assert w.results_view is not None
+    assert w.tabs.currentWidget() is w.results_view
+    assert w.results_view.result is w.calculation_result, "Созданная вкладка показывает готовый результат"
+
+    w.tabs.setCurrentIndex(MainWindow.TAB_COMPONENTS)
+    editor = w.components_editor
+    assert editor is not None and w.tabs.currentWidget() is editor
+    w.tabs.setCurrentIndex(MainWindow.TAB_PROJECT_INFO)
+    w.tabs.setCurrentIndex(MainWindow.TAB_COMPONENTS)
+    assert w.components_editor is editor, "Повторное открытие не пересоздаёт вкладку"
+    assert w.coefficients_panel is None
+
+    w.project.modified = False
+    w.close()
+    return True
+
+
+def test_function_selector_filter():
+    """Диалог выбора функций: фильтр по индексу каталога и отметки"""
+    _app()
+    dialog = FunctionSelectorDialog()
+
+    # По умолчанию выделена первая функция (группы загружены лениво)
+    assert len(dialog.get_selected_functions()) == 1
+    assert dialog.model.rowCount() > 0
+
+    dialog.search_edit.setText("отч")
+    dialog._apply_filter()
+    expected = {f.id for f in search_functions("отч")}
+    assert {f.id for f in dialog.model.functions()} == expected, "Фильтр должен совпадать с поиском по каталогу"
+
+    dialog._check_all_visible()
+    assert {f.id for f in dialog.get_selected_functions()} == expected
+    dialog._uncheck_all()
+    assert len(dialog.get_selected_functions()) == 1
+
+    # Сужение запроса использует предыдущий результат и даёт тот же ответ
+    index = get_catalog_index()
+    assert [f.id for f in index.filter("отчёт")] == [
+        f.id for f in index.functions if f in search_functions("отчёт")
+    ]
+
+    dialog.close()
+    return True
+
+
+def test_chart_rendering():
+    """Диаграммы: агрегация столбцов, повторное использование элементов, кэш"""
+    app = _app()
+
+    data = {f"Компонент {i}": float(i) for i in range(1, 101)}
+    top = aggregate_top_n(data, 10)
+    assert len(top) == 10, "Должно остаться 9 крупнейших значений и «Прочие»"
+    assert "Компонент 100" in top
+    assert top["Прочие (91)"] == sum(range(1, 92)), "«Прочие» — сумма остальных значений"
+    assert abs(sum(top.values()) - sum(data.values())) < 1e-9
+
+    # При тех же подписях сектора обновляются на месте
+    renderer = ChartRenderer("pie")
+    pie = {"A": 1.0, "B": 2.0, "C": 3.0}
+    buffer, w, h = renderer.render(pie, "Тест", 400, 300)
+    assert len(buffer) == w * h * 4
+    wedges = list(renderer._wedges)
+    renderer.render({"A": 3.0, "B": 2.0, "C": 1.0}, "Тест", 400, 300)
+    assert renderer._wedges == wedges, "Сектора должны переиспользоваться"
+    assert abs(wedges[0].theta2 - wedges[0].theta1 - 180.0) < 1e-9
+
+    # Нулевая сумма после диаграммы с данными: старые сектора не рисуются
+    renderer.render({"A": 0.0, "B": 0.0, "C": 0.0}, "Тест", 400, 300)
+    assert renderer._wedges == [] and renderer._autotexts == []
+    renderer.render(pie, "Тест", 400, 300)
+    assert len(renderer._wedges) == 3
+
+    renderer = ChartRenderer("bar")
+    renderer.render(pie, "", 400, 300)
+    bars = list(renderer._bars)
+    renderer.render({"A": 5.0, "B": 2.0, "C": 1.0}, "", 400, 300)
+    assert renderer._bars == bars, "Столбцы должны переиспользоваться"
+    assert bars[0].get_height() == 5.0
+
+    # Отрисовка в фоне, повторные данные берутся из кэша
+    chart = ChartWidget("bar")
+    chart.resize(400, 300)
+    chart.update_bar_chart(data, "Объём")
+    chart.wait_for_render()
+    app.processEvents()
+    assert not chart.image_label.pixmap().isNull(), "Изображение должно быть показано"
+    assert not chart._rendering
+
+    chart.image_label.clear()
+    chart.update_bar_chart(data, "Объём")
+    assert not chart._rendering, "Повторные данные должны браться из кэша"
+    assert not chart.image_label.pixmap().isNull()
+
+    # Ошибка отрисовки не оставляет виджет в состоянии «рисуется»
+    class FailingRenderer(ChartRenderer):
+        def render(self, *args):
+            raise RuntimeError("сбой отрисовки")
+
+    chart._renderer = FailingRenderer("bar")
+    chart.update_bar_chart({"Сбой": 1.0}, "Объём")
+    chart.wait_for_render()
+    app.processEvents()
+    assert not chart._rendering, "После ошибки отрисовка должна быть снова доступна"
+
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов интерфейса...\n")
+
+    try:
+        test_change_bus_coalescing()
+        test_background_calculation_drops_stale_results()
+        test_lazy_tabs()
+        test_function_selector_filter()
+        test_chart_rendering()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
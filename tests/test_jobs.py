@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты очереди заданий: выполнение, повторы, возобновление после сбоя
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import jobs
+from app.jobs import JobQueue, LeaseLost, worker_loop, DONE, FAILED, CANCELLED, RUNNING
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app.models.profiles import EngineProfile, save_profile
+
+
+def test_job_queue_runs_jobs():
+    """Задание считает проект, пишет отчёты и сохраняет результат"""
+    project = Project.create_example()
+    expected = CalculationEngine().calculate(project).to_dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        project_path = project.save(os.path.join(tmp, "p.json"))
+        db = os.path.join(tmp, "q.sqlite3")
+        with JobQueue(db) as queue:
+            job_id = queue.submit(project_path, {"json": os.path.join(tmp, "r.json"),
+                                                 "csv": os.path.join(tmp, "r.csv")})
+            estimate_id = queue.submit(project_path)
+            cancelled_id = queue.submit(project_path)
+            assert queue.cancel(cancelled_id)
+
+        assert worker_loop(db, drain=True, poll=0.01) == 2
+
+        with JobQueue(db) as queue:
+            job = queue.get(job_id)
+            assert job.status == DONE and job.progress == 1.0, job
+            assert job.attempts == 1
+            assert job.result == expected, "В задании должен сохраниться результат расчёта"
+            assert job.done_outputs == ["json", "csv"]
+            with open(os.path.join(tmp, "r.json"), encoding="utf-8") as f:
+                assert json.load(f)["result"]["final_labor"] == expected["final_labor"]
+            assert os.path.getsize(os.path.join(tmp, "r.csv")) > 0
+
+            assert queue.get(estimate_id).status == DONE
+            assert queue.get(cancelled_id).status == CANCELLED
+            assert queue.counts()[DONE] == 2
+    return True
+
+
+def test_job_queue_retries_and_resumes():
+    """Ошибки повторяются до предела; брошенное задание продолжается без готовых отчётов"""
+    saved_delay = jobs.RETRY_DELAY_SECONDS
+    jobs.RETRY_DELAY_SECONDS = 0.0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            project_path = Project.create_example().save(os.path.join(tmp, "p.json"))
+            db = os.path.join(tmp, "q.sqlite3")
+            json_path = os.path.join(tmp, "r.json")
+            csv_path = os.path.join(tmp, "r.csv")
+
+            with JobQueue(db) as queue:
+                resumed_id = queue.submit(project_path, {"json": json_path, "csv": csv_path})
+                missing_id = queue.submit(os.path.join(tmp, "нет.json"), max_attempts=2)
+
+                # Рабочий забрал задание, записал JSON и «упал»: аренда истекла
+                job = queue.claim("упавший", lease=-1.0)
+                assert job.id == resumed_id and job.status == RUNNING
+                with open(json_path, "w", encoding="utf-8") as f:
+                    f.write("уже готов")
+                queue.record(job.id, "упавший", done_outputs=["json"], project_mtime=os.path.getmtime(project_path))
+
+            worker_loop(db, drain=True, poll=0.01)
+
+            with JobQueue(db) as queue:
+                failed = queue.get(missing_id)
+                assert failed.status == FAILED and failed.attempts == 2, failed
+                assert "FileNotFoundError" in failed.error
+
+                resumed = queue.get(resumed_id)
+                assert resumed.status == DONE and resumed.attempts == 2, resumed
+                assert resumed.done_outputs == ["json", "csv"]
+                with open(json_path, encoding="utf-8") as f:
+                    assert f.read() == "уже готов", "Готовый отчёт не должен формироваться заново"
+                assert os.path.exists(csv_path)
+
+                assert queue.retry(missing_id)
+                assert queue.get(missing_id).attempts == 0
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                assert jobs.main([db, "list"]) == 0
+                assert jobs.main([db, "show", str(resumed_id)]) == 0
+            assert "Трудоёмкость" in output.getvalue() and "queued 1" in output.getvalue()
+            assert "чел.-дн." in output.getvalue()
+    finally:
+        jobs.RETRY_DELAY_SECONDS = saved_delay
+    return True
+
+
+def test_job_queue_lease():
+    """Рабочий, потерявший аренду, не меняет задание; аренда продлевается по таймеру"""
+    with tempfile.TemporaryDirectory() as tmp:
+        project_path = Project.create_example().save(os.path.join(tmp, "p.json"))
+        db = os.path.join(tmp, "q.sqlite3")
+        with JobQueue(db) as queue:
+            job_id = queue.submit(project_path)
+            stale = queue.claim("медленный", lease=-1.0)
+            owner = queue.claim("новый")
+            assert owner.id == stale.id == job_id and owner.attempts == 2
+
+            try:
+                queue.heartbeat(job_id, "медленный", 0.5, "Расчёт")
+                assert False, "Продление чужой аренды должно отклоняться"
+            except LeaseLost:
+                pass
+            try:
+                queue.record(job_id, "медленный", result={"final_labor": 0.0})
+                assert False, "Запись результата без аренды должна отклоняться"
+            except LeaseLost:
+                pass
+            assert not queue.complete(job_id, "медленный")
+            assert not queue.fail(job_id, "медленный", "ошибка")
+            assert not queue.release(job_id, "медленный")
+            job = queue.get(job_id)
+            assert job.status == RUNNING and job.worker == "новый" and job.result is None, job
+
+            # Таймер продлевает аренду без сообщений о ходе и замечает её потерю
+            keeper = jobs._LeaseKeeper(db, owner, interval=0.01)
+            queue._update(job_id, lease_until=time.time() + 0.05)
+            keeper.start()
+            time.sleep(0.2)
+            assert queue.get(job_id).lease_until > time.time() + 1.0, "Аренда должна продлеваться"
+            queue._update(job_id, worker="третий")
+            time.sleep(0.2)
+            assert keeper.lost
+            keeper.stop()
+
+            assert queue.complete(job_id, "третий")
+            assert queue.get(job_id).status == DONE
+    return True
+
+
+def test_job_queue_profile():
+    """Профиль движка сохраняется в задании; старая очередь получает новый столбец"""
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Project.create_example()
+        project_path = project.save(os.path.join(tmp, "p.json"))
+        profiles = os.path.join(tmp, "profiles")
+        profile = EngineProfile(name="отдел", A=0.25, C=0.8)
+        save_profile(profile, profiles)
+
+        # Очередь прежней схемы — без столбца profile
+        db = os.path.join(tmp, "q.sqlite3")
+        conn = sqlite3.connect(db)
+        conn.executescript(jobs.SCHEMA.replace("    profile TEXT,\n", ""))
+        conn.close()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert jobs.main([db, "submit", project_path, "--engine-profile", "отдел:1",
+                              "--profiles", profiles]) == 0
+            worker_loop(db, drain=True, poll=0.01)
+            assert jobs.main([db, "show", "1"]) == 0
+        assert "Профиль движка: отдел v1" in output.getvalue()
+
+        with JobQueue(db) as queue:
+            job = queue.get(1)
+            assert job.status == DONE and job.profile.A == 0.25
+            assert job.result == CalculationEngine(profile).calculate(project).to_dict()
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов очереди заданий...\n")
+
+    try:
+        test_job_queue_runs_jobs()
+        test_job_queue_retries_and_resumes()
+        test_job_queue_lease()
+        test_job_queue_profile()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
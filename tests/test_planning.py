@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты планирования: подбор численности и срока
+"""
+
+import copy
+import itertools
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app.models.coefficients import DEADLINE_COEFFICIENTS
+from app.planning.staffing import solve_staffing, deadline_level_index, DEADLINE_LEVELS
+from app.planning.scope import solve_knapsack, solve_scope, labor_multiplier
+from app.planning.schedule import build_schedule, phase_windows, schedule_projects
+from app.planning.leveling import level_resources, ProjectRequest, ROLES
+from app.planning import leveling
+
+
+def test_deadline_levels():
+    """Доля номинального срока относится к уровню по границам таблицы"""
+    ratios = np.array([0.5, 0.75, 0.76, 0.85, 0.86, 0.99, 1.0, 1.5])
+    levels = [DEADLINE_LEVELS[i][1] for i in deadline_level_index(ratios)]
+    assert [DEADLINE_COEFFICIENTS[l] for l in levels] == [1.43, 1.43, 1.14, 1.14, 1.05, 1.05, 1.00, 1.00]
+    return True
+
+
+def test_staffing_solver():
+    """Оптимум совпадает с полным перебором, план согласован с движком"""
+    project = Project.create_example()
+    rate = 4000.0
+    solution = solve_staffing(project, max_staff=6, deadline=14, cost_per_day=rate)
+    plan = solution.optimal
+    assert plan is not None and solution.feasible_count > 0
+
+    # Полный перебор тех же вариантов
+    best = None
+    for staff in range(1, 7):
+        for duration in np.arange(0.25, 14.125, 0.25):
+            k = DEADLINE_COEFFICIENTS[DEADLINE_LEVELS[int(deadline_level_index(duration / 12.0))][1]]
+            labor = round(solution.total_labor * k, 2)
+            capacity = staff * duration * project.work_fund
+            if capacity >= labor - 1e-9 and (best is None or capacity * rate < best[0]):
+                best = (capacity * rate, duration, staff)
+    assert (plan.cost, plan.duration, plan.staff) == best, (plan, best)
+
+    # Кратчайший срок не растёт с численностью
+    durations = [p.duration for p in solution.frontier]
+    assert durations == sorted(durations, reverse=True)
+    assert solution.fastest.duration == min(durations)
+
+    # План, перенесённый в проект, даёт ту же трудоёмкость в движке
+    planned = project.snapshot()
+    plan.apply(planned)
+    result = CalculationEngine().calculate(planned)
+    assert result.final_labor == plan.final_labor
+    assert result.average_staff <= plan.staff
+
+    assert [p.k_sr_srok for p in solution.penalties] == [1.43, 1.14, 1.05, 1.00]
+    assert solution.penalties[-1].extra_labor == 0
+
+    assert solve_staffing(project, max_staff=1, deadline=2).optimal is None, "Недостижимый план"
+    return True
+
+
+def test_knapsack_matches_brute_force():
+    """Ветви и границы дают оптимум полного перебора"""
+    rng = random.Random(7)
+    for _ in range(200):
+        n = rng.randint(1, 10)
+        weights = [rng.choice([0.0, rng.uniform(1, 50)]) for _ in range(n)]
+        values = [rng.choice([0.0, rng.uniform(0, 10), float(rng.randint(1, 5))]) for _ in range(n)]
+        capacity = rng.uniform(0, sum(weights) + 1)
+        result = solve_knapsack(weights, values, capacity)
+        best = max(
+            sum(values[i] for i in subset)
+            for k in range(n + 1) for subset in itertools.combinations(range(n), k)
+            if sum(weights[i] for i in subset) <= capacity
+        )
+        assert result.optimal and abs(result.value - best) < 1e-6, (weights, values, capacity)
+        assert sum(weights[i] for i in result.chosen) <= capacity + 1e-6
+    return True
+
+
+def test_scope_to_budget():
+    """Урезанный проект укладывается в бюджет, обязательные функции остаются"""
+    project = Project.create_example()
+    result = CalculationEngine().calculate(project)
+    assert abs(labor_multiplier(result) * result.total_volume ** result.C - result.final_labor) < 0.05
+
+    functions = project.get_all_functions()
+    required = [functions[0].id]
+    priorities = {f.id: i + 1 for i, f in enumerate(functions)}
+    target = result.final_labor * 0.7
+    solution = solve_scope(project, target, priorities=priorities, required=required)
+    assert solution.feasible and solution.optimal
+    assert solution.final_labor <= target, "T_srok урезанного проекта должна уложиться в бюджет"
+    assert functions[0] in solution.kept and solution.dropped
+    assert len(solution.kept) + len(solution.dropped) == len(functions)
+
+    trimmed = solution.apply(project)
+    assert trimmed.get_function_count() == len(solution.kept)
+    assert project.get_function_count() == len(functions), "Исходный проект не меняется"
+    assert CalculationEngine().calculate(trimmed).final_labor == solution.final_labor
+
+    # Бюджет по сроку и численности; весь проект помещается — ничего не исключается
+    assert not solve_scope(project, deadline=12, staff=2).dropped
+    assert not solve_scope(project, 1.0, required=required).feasible
+    return True
+
+
+def test_schedule():
+    """Фазы вписываются в срок, трудоёмкость по месяцам в сумме даёт T_srok"""
+    starts, ends = phase_windows(np.array([[1.0, 1.0, 2.0], [0.0, 0.0, 0.0]]), np.array([8.0, 3.0]))
+    assert np.allclose(starts, [[0, 2, 4], [0, 1, 2]]) and np.allclose(ends, [[2, 4, 8], [1, 2, 3]])
+    starts, ends = phase_windows(np.array([[1.0, 1.0]]), np.array([6.0]), overlap=0.5)
+    assert np.allclose(starts, [[0, 2]]) and np.allclose(ends, [[4, 6]]), "Вторая фаза стартует с середины первой"
+
+    engine = CalculationEngine()
+    projects = []
+    for value, kind in ((12, "duration"), (2.5, "duration"), (3, "staff")):
+        project = Project.create_example()
+        project.constraint_type, project.constraint_value = kind, value
+        projects.append(project)
+    results = [engine.calculate(p) for p in projects]
+
+    for profile in ("rayleigh", "uniform"):
+        schedule = build_schedule(results, overlap=0.2, profile=profile)
+        assert schedule.labor.shape == (3, 5, 12)
+        assert np.allclose(schedule.labor.sum(axis=(1, 2)), [r.final_labor for r in results])
+        assert np.allclose(schedule.end.max(axis=1), [r.total_duration for r in results])
+        assert (schedule.labor[1, :, 3:] == 0).all(), "Проект на 2.5 мес. не выходит за свой срок"
+        assert (schedule.staff >= 0).all()
+
+    # Фазы нулевой длительности (сроки округлены до 0.01) не теряют трудоёмкость
+    short = []
+    for kind, value in (("duration", 0.4), ("staff", 50), ("staff", 0)):
+        project = Project.create_example()
+        project.constraint_type, project.constraint_value = kind, value
+        short.append(engine.calculate(project))
+    assert any(sp.duration == 0 for r in short for sp in r.subprocess_results)
+    for profile in ("rayleigh", "uniform"):
+        schedule = build_schedule(short, profile=profile)
+        assert np.allclose(schedule.labor.sum(axis=(1, 2)), [r.final_labor for r in short])
+    # Последняя фаза нулевой длительности начинается ровно в конце целого срока
+    last_zero = copy.deepcopy(results[0])
+    last_zero.subprocess_results[-1].duration = 0.0
+    last_zero.total_duration = 12.0
+    schedule = build_schedule([last_zero])
+    assert schedule.start[0, -1] == 12.0 and schedule.labor[0, -1, -1] > 0
+    assert np.isclose(schedule.labor.sum(), last_zero.final_labor)
+
+    # Равномерно и последовательно: численность фазы постоянна — как в расчёте движка
+    staff_bound = build_schedule(results[2:], profile="uniform")
+    assert np.allclose(staff_bound.project_staff[0][:5], 3.0, atol=0.02)
+    # Кривая Рэлея: пик внутри фазы, выше среднего
+    rayleigh = build_schedule(results[:1])
+    programming = rayleigh.staff[0, 2]
+    assert 0 < programming.argmax() < 11 and programming.max() > programming[programming > 0].mean()
+
+    bars = rayleigh.gantt(0)
+    assert [b.phase for b in bars] == list(engine.SUBPROCESS_COEFFICIENTS)
+    assert all(a.end <= b.start + 1e-9 for a, b in zip(bars, bars[1:])), "Последовательные фазы"
+    assert "Программирование" in rayleigh.format(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "schedule.csv")
+        schedule = schedule_projects(projects)
+        schedule.write_csv(csv_path)
+        with open(csv_path, encoding="utf-8-sig") as f:
+            rows = [line.split(";") for line in f.read().splitlines()[1:]]
+        assert abs(sum(float(r[3]) for r in rows) - sum(r.final_labor for r in results)) < 1.0
+    return True
+
+
+def test_resource_leveling():
+    """Штат ролей не превышается, подпроцессы проекта идут по порядку, приоритеты соблюдаются"""
+    engine = CalculationEngine()
+    rng = random.Random(5)
+    requests = []
+    for i in range(300):
+        project = Project.create_example()
+        for func in project.get_all_functions():
+            func.volume = int(func.volume * rng.uniform(0.2, 3.0))
+        project.constraint_value = rng.choice([6, 9, 12])
+        requests.append(ProjectRequest(f"П{i}", engine.calculate(project), priority=rng.randint(0, 3),
+                                       release=rng.uniform(0, 12), due=rng.uniform(6, 60)))
+    capacity = {"аналитик": 3, "проектировщик": 6, "программист": 25, "тестировщик": 5, "внедренец": 2}
+    result = level_resources(requests, capacity)
+    assert len(result.assignments) == 300 * len(ROLES)
+    assert result.seconds < 1.0, f"Слишком медленно: {result.seconds:.2f} с"
+
+    # Занятость ролей по событиям: освобождение раньше занятия в тот же момент
+    events = sorted((t, sign, a.role, a.staff) for a in result.assignments
+                    for t, sign in ((a.start, 1), (a.finish, 0)))
+    busy = dict.fromkeys(capacity, 0)
+    for _, sign, role, staff in events:
+        busy[role] += staff if sign else -staff
+        assert busy[role] <= capacity[role], f"Превышен штат роли {role}"
+
+    by_project = {}
+    for a in result.assignments:
+        by_project.setdefault(a.project, []).append(a)
+    for request, schedule in zip(requests, result.projects):
+        chain = by_project[request.name]
+        assert [a.phase for a in chain] == list(ROLES)
+        assert chain[0].start >= request.release * 21 - 1e-9, "Проект не начинается до своего окна"
+        assert all(a.finish <= b.start + 1e-9 for a, b in zip(chain, chain[1:]))
+        assert abs(schedule.finish - chain[-1].finish) < 1e-9
+        assert abs(sum(a.labor for a in chain) - request.result.final_labor) < 0.01
+        assert schedule.lateness == max(0.0, schedule.finish - schedule.due)
+    assert 0 < result.utilization()["программист"] <= 1.0
+
+    # Один программист: важный проект выполняется первым, хотя его окно не раньше
+    project = Project.create_example()
+    project.constraint_type, project.constraint_value = "staff", 1
+    calculated = engine.calculate(project)
+    single = {role: 1 for role in ROLES.values()}
+    result = level_resources([ProjectRequest("обычный", calculated),
+                              ProjectRequest("важный", calculated, priority=1)], single)
+    first = [a for a in result.assignments if a.phase == "Программирование"]
+    assert first[0].project == "важный" and first[1].start >= first[0].finish - 1e-9
+
+    try:
+        level_resources(requests[:1], {"аналитик": 1})
+        assert False, "Ожидалась ошибка: нет штата программистов"
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project.save(os.path.join(tmp, "p.json"))
+        with open(os.path.join(tmp, "plan.json"), "w", encoding="utf-8") as f:
+            f.write('{"p.json": {"priority": 2, "release": 1, "due": 3}}')
+        argv = [os.path.join(tmp, "p.json"), "--plan", os.path.join(tmp, "plan.json"), "--capacity",
+                *(f"{role}=2" for role in ROLES.values())]
+        assert leveling.main(argv) == 0
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов планирования...\n")
+
+    try:
+        test_deadline_levels()
+        test_staffing_solver()
+        test_knapsack_matches_brute_force()
+        test_scope_to_budget()
+        test_schedule()
+        test_resource_leveling()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты HTTP-сервиса расчёта (только localhost)
+"""
+
+import asyncio
+import http.client
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app import service as service_module
+from app.service import EstimationService, project_hash
+
+
+def _request(port, method, path, body=b"", headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+async def _run_service_checks(executor):
+    project = Project.create_example()
+    data = project.to_dict()
+    expected = CalculationEngine().calculate(project).to_dict()
+    body = json.dumps(data).encode("utf-8")
+
+    service = EstimationService(executor=executor, cache_size=8, max_body_bytes=len(body) * 4)
+    _, port = await service.start("127.0.0.1", 0)
+    call = lambda *args, **kw: asyncio.to_thread(_request, port, *args, **kw)
+    try:
+        status, headers, raw = await call("POST", "/estimate", body)
+        assert status == 200, raw
+        assert json.loads(raw) == expected, "Результат сервиса должен совпадать с расчётом"
+        assert headers["X-Cache"] == "miss"
+
+        # Тот же проект с другим порядком ключей — попадание в кэш
+        reordered = json.dumps(dict(reversed(list(data.items())))).encode("utf-8")
+        status, headers, raw = await call("POST", "/estimate", reordered)
+        assert status == 200 and headers["X-Cache"] == "hit", "Кэш по содержимому проекта"
+
+        other = dict(data, work_fund=22)
+        assert project_hash(other) != project_hash(data)
+        status, _, raw = await call("POST", "/estimate/batch",
+                                    json.dumps([data, other, "мусор"]).encode("utf-8"))
+        assert status == 200, raw
+        results = json.loads(raw)
+        assert results[0] == expected
+        assert results[1]["work_fund"] == 22 and results[1]["total_volume"] == expected["total_volume"]
+        assert "error" in results[2], "Ошибка элемента пакета не должна ронять весь пакет"
+
+        ndjson = b"\n".join([body, b"{not json", json.dumps(other).encode("utf-8")]) + b"\n"
+        status, headers, raw = await call("POST", "/estimate/stream", ndjson)
+        assert status == 200 and headers["Transfer-Encoding"] == "chunked"
+        items = sorted((json.loads(line) for line in raw.splitlines()), key=lambda i: i["index"])
+        assert [i["index"] for i in items] == [0, 1, 2]
+        assert items[0]["result"] == expected and "error" in items[1] and "result" in items[2]
+
+        status, _, raw = await call("POST", "/estimate", b"x" * (len(body) * 4 + 1))
+        assert status == 413, "Превышение предела тела запроса"
+        status, _, _ = await call("POST", "/estimate", b"{oops")
+        assert status == 400
+        status, _, _ = await call("GET", "/estimate")
+        assert status == 405
+
+        status, _, raw = await call("GET", "/metrics")
+        text = raw.decode("utf-8")
+        assert status == 200
+        assert 'estimation_requests_total{endpoint="/estimate",status="200"} 2' in text
+        assert 'estimation_request_seconds_bucket{endpoint="/estimate",le="+Inf"}' in text
+        assert "estimation_cache_hits_total" in text and "estimation_calculation_seconds_count" in text
+    finally:
+        await service.close()
+
+
+def test_service_endpoints():
+    """Оценка, кэш, пакет, NDJSON-поток, пределы размера и метрики"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        asyncio.run(_run_service_checks(executor))
+    return True
+
+
+def test_service_process_pool():
+    """Расчёт в пуле процессов (spawn) по умолчанию"""
+    async def check():
+        service = EstimationService(workers=1)
+        _, port = await service.start("127.0.0.1", 0)
+        try:
+            data = Project.create_example().to_dict()
+            status, _, raw = await asyncio.to_thread(_request, port, "POST", "/estimate",
+                                                     json.dumps(data).encode("utf-8"))
+            assert status == 200 and "total_labor" in json.loads(raw), raw
+        finally:
+            await service.close()
+
+    asyncio.run(check())
+    return True
+
+
+def test_service_coalescing_survives_cancel():
+    """Отмена запросившего расчёт не оставляет ждущих того же проекта без ответа"""
+    release = threading.Event()
+    estimate_project = service_module.estimate_project
+
+    def slow_estimate(data, profile=None):
+        release.wait(10)
+        return estimate_project(data, profile)
+
+    async def check(executor):
+        service = EstimationService(executor=executor)
+        data = Project.create_example().to_dict()
+        owner = asyncio.create_task(service.estimate(data))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(service.estimate(data))
+        await asyncio.sleep(0.05)
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result, hit = await asyncio.wait_for(waiter, 10)
+        assert hit and "total_labor" in result
+        assert owner.cancelled()
+        assert project_hash(data) in service._cache and not service._inflight
+        await service.close()
+
+    service_module.estimate_project = slow_estimate
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            asyncio.run(check(executor))
+    finally:
+        service_module.estimate_project = estimate_project
+    return True
+
+
+def test_service_stream_bad_lines():
+    """Поток NDJSON: ошибка разбора и слишком длинная строка дают по одному элементу"""
+    async def check(executor):
+        service = EstimationService(executor=executor)
+        _, port = await service.start("127.0.0.1", 0)
+        call = lambda body: asyncio.to_thread(_request, port, "POST", "/estimate/stream", body)
+        try:
+            # json.loads падает с RecursionError — ответ всё равно завершается
+            status, _, raw = await call(b"[" * 200000 + b"\n{}\n")
+            items = sorted((json.loads(line) for line in raw.splitlines()), key=lambda i: i["index"])
+            assert status == 200 and [i["index"] for i in items] == [0, 1]
+            assert "error" in items[0]
+
+            # Длинная строка читается несколькими порциями, но считается одной строкой
+            data = json.dumps(Project.create_example().to_dict()).encode("utf-8")
+            service_module.MAX_LINE_BYTES = len(data)
+            status, _, raw = await call(b"x" * 200000 + b"\n" + b"y" * (len(data) + 1) + b"\n" + data)
+            items = sorted((json.loads(line) for line in raw.splitlines()), key=lambda i: i["index"])
+            assert status == 200 and [i["index"] for i in items] == [0, 1, 2]
+            assert "длиннее" in items[0]["error"] and "длиннее" in items[1]["error"]
+            assert "result" in items[2]
+        finally:
+            service_module.MAX_LINE_BYTES = max_line_bytes
+            await service.close()
+
+    max_line_bytes = service_module.MAX_LINE_BYTES
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        asyncio.run(check(executor))
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов HTTP-сервиса...\n")
+
+    try:
+        test_service_endpoints()
+        test_service_process_pool()
+        test_service_coalescing_survives_cancel()
+        test_service_stream_bad_lines()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
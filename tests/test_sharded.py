@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты расчёта перечня функций в нескольких процессах
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.models.project import Project, FunctionInstance
+from app.models.calculation import CalculationEngine, ExactSum
+from app.models.coefficients import DEV_ENVIRONMENT_COEFFICIENTS, DEVELOPER_EXPERIENCE
+from app import sharded
+from app.sharded import FunctionColumns, SharedColumns, calculate_sharded, shard_bounds
+
+
+def _records(n, seed=0):
+    rng = random.Random(seed)
+    languages = list(DEV_ENVIRONMENT_COEFFICIENTS)
+    experience = list(DEVELOPER_EXPERIENCE)
+    for _ in range(n):
+        yield f"Компонент {rng.randrange(40)}", FunctionInstance(
+            id="",
+            function_id=str(rng.randrange(100, 999)),
+            volume=rng.choice([rng.randint(1, 10 ** 6), rng.randint(1, 50)]),
+            language=rng.choice(languages),
+            reuse_count=rng.randint(1, 3),
+            reuse_coefficient=rng.choice([1.0, 0.7, 0.3, 0.13]),
+            complexity_level=rng.randint(1, 6),
+            developer_experience=rng.choice(experience),
+        )
+
+
+def test_exact_sums():
+    """Суммы частей сводятся к точной сумме — как math.fsum и ExactSum движка"""
+    rng = np.random.default_rng(1)
+    volume = np.concatenate([rng.uniform(0, 1e6, 5000), [1e-300, -3.5, 2.0 ** 60, -2.0 ** 60, 0.0, 5e-324],
+                             rng.normal(0, 1e-8, 500)])
+    rng.shuffle(volume)
+    component = rng.integers(0, 7, len(volume))
+    assert volume.sum() != math.fsum(volume), "Набор, на котором простое сложение неточно"
+
+    expected = [math.fsum(volume[component == c]) for c in range(7)]
+    exact = ExactSum()
+    for x in volume.tolist():
+        exact.add(x)
+    assert float(exact) == math.fsum(volume)
+
+    buckets = sharded.MAX_BUCKETS
+    try:
+        # Корзины «компонент × порядок» и конечности при большом числе компонентов
+        for limit in (buckets, 1):
+            sharded.MAX_BUCKETS = limit
+            parts = [sharded._exact_sums(volume[a:b], component[a:b], 7) for a, b in shard_bounds(len(volume), 5)]
+            total, components = sharded._reduce(parts, 7)
+            assert total == math.fsum(volume) and components == expected
+    finally:
+        sharded.MAX_BUCKETS = buckets
+    return True
+
+
+def test_sharded_matches_engine():
+    """Расчёт в нескольких процессах совпадает с движком до бита"""
+    project = Project.create_example()
+    engine = CalculationEngine()
+    expected = engine.calculate_stream(_records(20000), project.coefficients, project.work_fund,
+                                       project.constraint_type, project.constraint_value).to_dict()
+
+    columns = FunctionColumns.from_records(_records(20000))
+    assert len(columns) == 20000 and len(columns.components) == 40
+    args = (project.coefficients, project.work_fund, project.constraint_type, project.constraint_value)
+    single = calculate_sharded(columns, *args, workers=1).to_dict()
+    assert single == expected, "Один процесс: итоги отличаются от движка"
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for shards in (2, 7):
+            result = calculate_sharded(columns, *args, shards=shards, executor=pool).to_dict()
+            assert result == expected, f"{shards} частей: итоги отличаются от движка"
+
+    # Проект целиком: те же итоги, что и полный расчёт
+    full = engine.calculate(project).to_dict()
+    result = calculate_sharded(FunctionColumns.from_project(project), *args).to_dict()
+    full.pop("functions_results")
+    assert result.pop("functions_results") == []
+    assert result == full
+
+    empty = calculate_sharded(FunctionColumns.from_records(()), *args)
+    assert empty.total_volume == 0 and empty.component_volumes == {}
+    return True
+
+
+def test_shared_columns_and_cli():
+    """Блок общей памяти удаляется; перечень читается из CSV"""
+    columns = FunctionColumns.from_records(_records(100))
+    with SharedColumns(columns) as shared:
+        name = shared.name
+        view = np.ndarray(len(columns), dtype="<f8", buffer=shared.shm.buf)
+        assert (view == columns.arrays["volume"]).all()
+        del view
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        assert False, "Блок общей памяти не удалён"
+    except FileNotFoundError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("component;function_id;volume;language;reuse_count;reuse_coefficient\n")
+            f.write("АРМ;101;1000;C++;2;0,5\nАРМ;102;300;;;\nОтчёты;401;200;Java;1;1\n")
+        records = list(sharded.read_inventory(path))
+        assert [c for c, _ in records] == ["АРМ", "АРМ", "Отчёты"]
+        assert records[0][1].reuse_coefficient == 0.5 and records[1][1].reuse_count == 1
+        result = calculate_sharded(FunctionColumns.from_records(records), Project().coefficients)
+        assert result.component_volumes == CalculationEngine().calculate_stream(
+            iter(records), Project().coefficients).component_volumes
+        assert sharded.main([path, "--workers", "1"]) == 0
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов расчёта в нескольких процессах...\n")
+
+    try:
+        test_exact_sums()
+        test_sharded_matches_engine()
+        test_shared_columns_and_cli()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Тест времени запуска приложения: бюджет до первого окна
+и отложенная загрузка тяжёлых модулей
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.startup_profile import PROFILE_FLAG, parse_importtime
+
+ROOT = Path(__file__).parent.parent
+
+# Бюджет времени до первого окна (с запасом для медленных машин)
+STARTUP_BUDGET_MS = 3000
+
+
+def test_startup_budget():
+    """Первое окно показывается в пределах бюджета без matplotlib/openpyxl/docx"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ROOT / "main.py"), PROFILE_FLAG],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env, timeout=120,
+    )
+    assert process.returncode == 0, process.stderr[-2000:]
+
+    match = re.search(r"Время до первого окна: (\d+) мс", process.stdout)
+    assert match, f"Нет сводки запуска в выводе: {process.stdout}"
+    first_window_ms = int(match.group(1))
+    assert first_window_ms <= STARTUP_BUDGET_MS, \
+        f"Запуск занял {first_window_ms} мс при бюджете {STARTUP_BUDGET_MS} мс"
+
+    assert "Тяжёлые модули загружены: нет" in process.stdout, \
+        f"Тяжёлые модули не должны загружаться при запуске: {process.stdout}"
+
+    for name in ("matplotlib", "openpyxl", "docx"):
+        assert not re.search(rf"\|\s+{name}$", process.stderr, re.MULTILINE), \
+            f"{name} импортирован при запуске"
+
+    return True
+
+
+def test_parse_importtime():
+    """Разбор вывода -X importtime: только модули верхнего уровня"""
+    text = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   nested",
+        "import time:       200 |        300 | parent",
+        "import time:        50 |         50 | small",
+    ])
+    rows = parse_importtime(text)
+    assert rows == [("parent", 200, 300), ("small", 50, 50)], rows
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов времени запуска...\n")
+
+    try:
+        test_parse_importtime()
+        test_startup_budget()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты наблюдения за каталогом проектов
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.project import Project
+from app.models.calculation import CalculationEngine
+from app.watch import ProjectWatcher, COLUMN_NAMES
+
+
+def _labor(watcher, path):
+    for row in watcher.index.rows():
+        if row[0] == path:
+            return row[COLUMN_NAMES.index("final_labor")]
+    return None
+
+
+def test_watch_sync():
+    """Пересчёт только изменённых файлов; сводка в SQLite и CSV"""
+    project = Project.create_example()
+    with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(max_workers=2) as pool:
+        projects = os.path.join(tmp, "projects")
+        os.makedirs(os.path.join(projects, "sub"))
+        paths = [os.path.join(projects, "a.json"), os.path.join(projects, "sub", "b.json")]
+        for path in paths:
+            project.save(path)
+        broken = os.path.join(projects, "broken.json")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("{")
+        index_path = os.path.join(tmp, "index.sqlite3")
+        csv_path = os.path.join(tmp, "summary.csv")
+
+        with ProjectWatcher(projects, index_path, csv_path, executor=pool) as watcher:
+            stats = watcher.sync()
+            assert (stats.scanned, stats.estimated) == (3, 3), stats
+            expected = CalculationEngine().calculate(project).final_labor
+            assert _labor(watcher, paths[0]) == expected
+            with open(csv_path, encoding="utf-8-sig") as f:
+                rows = list(csv.DictReader(f, delimiter=";"))
+            assert len(rows) == 3
+            assert [r["error"] for r in rows if r["path"] == broken][0].startswith("JSONDecodeError")
+
+            assert watcher.sync().candidates == 0, "Без изменений файлы не читаются"
+
+            # Пересохранили без изменений: хэш совпал, расчёта нет
+            os.utime(paths[0], ns=(0, 10**18))
+            stats = watcher.sync()
+            assert (stats.candidates, stats.unchanged, stats.estimated) == (1, 1, 0), stats
+
+            project.work_fund = 22
+            project.save(paths[1])
+            os.remove(broken)
+            stats = watcher.sync()
+            assert (stats.estimated, stats.removed) == (1, 1), stats
+            assert _labor(watcher, paths[1]) == CalculationEngine().calculate(project).final_labor
+
+        # Новый процесс с тем же индексом не пересчитывает каталог заново
+        with ProjectWatcher(projects, index_path, executor=pool) as watcher:
+            assert watcher.sync().candidates == 0
+    return True
+
+
+def test_watch_run():
+    """В режиме наблюдения новый файл попадает в сводку без ручной сверки"""
+    with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(max_workers=1) as pool:
+        projects = os.path.join(tmp, "projects")
+        os.makedirs(projects)
+        with ProjectWatcher(projects, os.path.join(tmp, "index.sqlite3"), executor=pool) as watcher:
+            for use_inotify in (True, False):
+                stop = threading.Event()
+                synced = []
+                thread = threading.Thread(target=watcher.run, kwargs=dict(
+                    interval=0.05, use_inotify=use_inotify, stop=stop, on_sync=synced.append))
+                thread.start()
+                try:
+                    while not synced:
+                        time.sleep(0.01)
+                    path = os.path.join(projects, f"new_{use_inotify}.json")
+                    Project.create_example().save(path)
+                    deadline = time.monotonic() + 10
+                    while _labor(watcher, path) is None and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                finally:
+                    stop.set()
+                    thread.join()
+                assert _labor(watcher, path) is not None, f"Файл не попал в сводку (inotify={use_inotify})"
+    return True
+
+
+if __name__ == "__main__":
+    print("Запуск тестов наблюдения за каталогом...\n")
+
+    try:
+        test_watch_sync()
+        test_watch_run()
+        print("\n" + "=" * 60)
+        print("ВСЕ ТЕСТЫ ПРОЙДЕНЫ УСПЕШНО!")
+        print("=" * 60)
+    except AssertionError as e:
+        print(f"\nОШИБКА ТЕСТА: {e}")
+        sys.exit(1)